@@ -1,15 +1,20 @@
-from langchain import hub
+import threading
+
 from langchain.agents import AgentExecutor, create_structured_chat_agent
 
-from agent.llm import load_llm
+from agent.llm import llm_config_key, load_llm
+from agent.prompt import structured_chat_prompt
 from agent.tools import compare_shipping_emissions, distance_tool, emissions_tool
 
+_executor: AgentExecutor | None = None
+_executor_key: tuple | None = None
+_executor_lock = threading.Lock()
+
 
-async def build_agent():
+def _build_executor() -> AgentExecutor:
     tools = [emissions_tool, compare_shipping_emissions, distance_tool]
     llm = load_llm()
-    prompt = hub.pull("hwchase17/structured-chat-agent")
-    agent = create_structured_chat_agent(llm=llm, tools=tools, prompt=prompt)
+    agent = create_structured_chat_agent(llm=llm, tools=tools, prompt=structured_chat_prompt())
 
     return AgentExecutor(
         agent=agent,
@@ -19,3 +24,23 @@ async def build_agent():
         max_iterations=8,
         early_stopping_method="generate",
     )
+
+
+def get_agent() -> AgentExecutor:
+    """Return the shared executor, rebuilding it only when LLM settings change.
+
+    The executor keeps no per-conversation state, and reusing it keeps the
+    model client's HTTP connection pool warm between chat turns.
+    """
+
+    global _executor, _executor_key
+    key = llm_config_key()
+    with _executor_lock:
+        if _executor is None or _executor_key != key:
+            _executor = _build_executor()
+            _executor_key = key
+        return _executor
+
+
+async def build_agent() -> AgentExecutor:
+    return get_agent()
@@ -0,0 +1,453 @@
+"""Pooled HTTP access to the optional Carbon Interface estimate API.
+
+Requests reuse keep-alive connections: one synchronous client per API key, and
+one asynchronous client per API key and event loop. Validated estimates are
+cached by their canonical request payload, so a repeated shipment costs no
+provider round trip until the entry expires. A circuit breaker keeps rolling
+error and latency statistics and refuses calls while the provider is failing;
+calls are admitted when their request actually starts, and at most
+``PROVIDER_MAX_QUEUED`` hedged calls wait for a worker at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass
+from enum import StrEnum
+
+import httpx
+
+CARBON_INTERFACE_URL = "https://www.carboninterface.com/api/v1/estimates"
+PROVIDER_TIMEOUT_SECONDS = 15.0
+PROVIDER_MAX_CONNECTIONS = 10
+PROVIDER_MAX_QUEUED = 2 * PROVIDER_MAX_CONNECTIONS
+PROVIDER_CACHE_SIZE = 1_024
+PROVIDER_CACHE_TTL_SECONDS = 3_600.0
+PROVIDER_LATENCY_BUDGET_SECONDS = 2.0
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 5
+BREAKER_FAILURE_RATE = 0.5
+BREAKER_COOLDOWN_SECONDS = 30.0
+
+_Attributes = dict[str, object]
+
+
+class ProviderError(RuntimeError):
+    """Raised when the provider is unreachable or returns an unusable estimate."""
+
+
+class ProviderUnavailableError(ProviderError):
+    """Raised without a network call while the circuit breaker is open."""
+
+
+class ProviderTimeoutError(ProviderError):
+    """Raised when the provider has not answered within the caller's latency budget."""
+
+
+class _ResponseCache:
+    """Least-recently-used provider estimates that expire after a fixed TTL."""
+
+    def __init__(self, *, size: int, ttl_seconds: float) -> None:
+        self._size = size
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, _Attributes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> _Attributes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, attributes: _Attributes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, attributes)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def payload_key(payload: Mapping[str, object]) -> str:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+def _attributes(response: httpx.Response) -> _Attributes:
+    try:
+        response.raise_for_status()
+        attributes = response.json()["data"]["attributes"]
+        float(attributes["carbon_kg"])
+    except (KeyError, TypeError, ValueError, httpx.HTTPError) as exc:
+        raise ProviderError("Carbon Interface returned an unusable estimate.") from exc
+    return dict(attributes)
+
+
+class BreakerState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class Admission:
+    """Permission for one provider call, tied to the breaker state that granted it."""
+
+    generation: int
+    probe: bool = False
+
+
+@dataclass(frozen=True)
+class BreakerStats:
+    state: BreakerState
+    calls: int
+    failures: int
+    slow_calls: int
+    failure_rate: float
+    p95_latency_seconds: float | None
+
+
+class CircuitBreaker:
+    """Rolling error and latency statistics that stop calls to a failing provider.
+
+    The last ``window`` completed calls are kept. Once at least ``min_calls``
+    are recorded and the share of errors or calls slower than
+    ``slow_call_seconds`` reaches ``failure_rate``, the circuit opens and
+    requests are refused for ``cooldown_seconds``. The first request after the
+    cooldown is let through as a probe: success closes the circuit and clears
+    the window, failure opens it again. Outcomes recorded with an admission
+    from an earlier state are stale and ignored, so a slow call admitted before
+    the circuit opened cannot settle the probe.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        slow_call_seconds: float = PROVIDER_LATENCY_BUDGET_SECONDS,
+        cooldown_seconds: float = BREAKER_COOLDOWN_SECONDS,
+        clock=time.monotonic,
+    ) -> None:
+        self._outcomes: deque[tuple[bool, float]] = deque(maxlen=window)
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._slow_call_seconds = slow_call_seconds
+        self._cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> Admission | None:
+        """Admit one call, or return ``None`` while the circuit refuses calls."""
+
+        with self._lock:
+            if self._state is BreakerState.CLOSED:
+                return Admission(self._generation)
+            if self._state is BreakerState.OPEN:
+                if self._clock() - self._opened_at < self._cooldown_seconds:
+                    return None
+                self._transition(BreakerState.HALF_OPEN)
+                self._probing = False
+            if self._probing:
+                return None
+            self._probing = True
+            return Admission(self._generation, probe=True)
+
+    def record(
+        self,
+        *,
+        succeeded: bool,
+        latency_seconds: float,
+        admission: Admission | None = None,
+    ) -> None:
+        """Record a completed call under the admission it was granted, when known."""
+
+        healthy = succeeded and latency_seconds <= self._slow_call_seconds
+        with self._lock:
+            if admission is not None and admission.generation != self._generation:
+                return
+            if self._state is BreakerState.HALF_OPEN:
+                if admission is not None and not admission.probe:
+                    return
+                self._probing = False
+                if healthy:
+                    self._transition(BreakerState.CLOSED)
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append((succeeded, latency_seconds))
+            if self._state is BreakerState.CLOSED and self._tripped():
+                self._open()
+
+    def _transition(self, state: BreakerState) -> None:
+        self._state = state
+        self._generation += 1
+
+    def _open(self) -> None:
+        self._transition(BreakerState.OPEN)
+        self._opened_at = self._clock()
+
+    def _tripped(self) -> bool:
+        if len(self._outcomes) < self._min_calls:
+            return False
+        unhealthy = sum(
+            1
+            for succeeded, latency in self._outcomes
+            if not succeeded or latency > self._slow_call_seconds
+        )
+        return unhealthy / len(self._outcomes) >= self._failure_rate
+
+    def stats(self) -> BreakerStats:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            state = self._state
+        failures = sum(1 for succeeded, _ in outcomes if not succeeded)
+        slow = sum(
+            1 for succeeded, latency in outcomes if succeeded and latency > self._slow_call_seconds
+        )
+        latencies = sorted(latency for _, latency in outcomes)
+        return BreakerStats(
+            state=state,
+            calls=len(outcomes),
+            failures=failures,
+            slow_calls=slow,
+            failure_rate=round((failures + slow) / len(outcomes), 4) if outcomes else 0.0,
+            p95_latency_seconds=(
+                latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                if latencies
+                else None
+            ),
+        )
+
+
+class CarbonInterfaceClient:
+    """Carbon Interface estimates over pooled keep-alive connections.
+
+    With a latency budget, the caller stops waiting once the budget is spent
+    and falls back to its deterministic estimate; the provider request keeps
+    running in the background so its answer still reaches the cache and the
+    breaker statistics. When ``max_queued`` hedged requests are already in
+    flight or waiting for a worker, further ones are refused immediately.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        url: str = CARBON_INTERFACE_URL,
+        timeout_seconds: float = PROVIDER_TIMEOUT_SECONDS,
+        cache_ttl_seconds: float = PROVIDER_CACHE_TTL_SECONDS,
+        breaker: CircuitBreaker | None = None,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+        max_queued: int = PROVIDER_MAX_QUEUED,
+    ) -> None:
+        self.url = url
+        self.breaker = breaker or CircuitBreaker()
+        self._options = {
+            "headers": {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            "timeout": timeout_seconds,
+            "limits": httpx.Limits(
+                max_connections=PROVIDER_MAX_CONNECTIONS,
+                max_keepalive_connections=PROVIDER_MAX_CONNECTIONS,
+            ),
+        }
+        self._client = httpx.Client(transport=transport, **self._options)
+        self._executor = ThreadPoolExecutor(
+            max_workers=PROVIDER_MAX_CONNECTIONS,
+            thread_name_prefix="carbon-interface",
+        )
+        self._queue_slots = threading.BoundedSemaphore(max_queued)
+        self._async_transport = async_transport
+        self._async_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._background: set[asyncio.Task] = set()
+        self._cache = _ResponseCache(size=PROVIDER_CACHE_SIZE, ttl_seconds=cache_ttl_seconds)
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            for stale in [known for known in self._async_clients if known.is_closed()]:
+                del self._async_clients[stale]
+            client = self._async_clients[loop] = httpx.AsyncClient(
+                transport=self._async_transport,
+                **self._options,
+            )
+        return client
+
+    def _admit(self) -> Admission:
+        admission = self.breaker.allow_request()
+        if admission is None:
+            raise ProviderUnavailableError("Carbon Interface circuit is open.")
+        return admission
+
+    def _settle(
+        self,
+        key: str,
+        admission: Admission,
+        started: float,
+        response: httpx.Response | None,
+    ) -> _Attributes:
+        latency = time.monotonic() - started
+        try:
+            if response is None:
+                raise ProviderError("Carbon Interface is unreachable.")
+            attributes = _attributes(response)
+        except ProviderError:
+            self.breaker.record(succeeded=False, latency_seconds=latency, admission=admission)
+            raise
+        self.breaker.record(succeeded=True, latency_seconds=latency, admission=admission)
+        self._cache.put(key, attributes)
+        return attributes
+
+    def _fetch(self, key: str, payload: dict[str, object]) -> _Attributes:
+        admission = self._admit()
+        started = time.monotonic()
+        try:
+            response = self._client.post(self.url, json=payload)
+        except httpx.HTTPError:
+            response = None
+        return self._settle(key, admission, started, response)
+
+    async def _afetch(self, key: str, payload: dict[str, object]) -> _Attributes:
+        admission = self._admit()
+        started = time.monotonic()
+        try:
+            response = await self._async_client().post(self.url, json=payload)
+        except httpx.HTTPError:
+            response = None
+        return self._settle(key, admission, started, response)
+
+    def estimate(
+        self,
+        payload: Mapping[str, object],
+        *,
+        budget_seconds: float | None = None,
+    ) -> _Attributes:
+        key = payload_key(payload)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        if budget_seconds is None:
+            return self._fetch(key, dict(payload))
+        if not self._queue_slots.acquire(blocking=False):
+            raise ProviderUnavailableError("Carbon Interface request queue is full.")
+        try:
+            future = self._executor.submit(self._fetch, key, dict(payload))
+        except RuntimeError:
+            self._queue_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._queue_slots.release())
+        try:
+            return future.result(timeout=budget_seconds)
+        except FuturesTimeoutError as exc:
+            raise ProviderTimeoutError("Carbon Interface exceeded the latency budget.") from exc
+
+    async def aestimate(
+        self,
+        payload: Mapping[str, object],
+        *,
+        budget_seconds: float | None = None,
+    ) -> _Attributes:
+        key = payload_key(payload)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        if budget_seconds is None:
+            return await self._afetch(key, dict(payload))
+        # Shielded tasks outlive the callers that gave up on them, so they share
+        # the hedged thread requests' queue bound.
+        if not self._queue_slots.acquire(blocking=False):
+            raise ProviderUnavailableError("Carbon Interface request queue is full.")
+        try:
+            task = asyncio.ensure_future(self._afetch(key, dict(payload)))
+        except BaseException:
+            self._queue_slots.release()
+            raise
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        task.add_done_callback(lambda _: self._queue_slots.release())
+        task.add_done_callback(_consume_exception)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), budget_seconds)
+        except TimeoutError as exc:
+            raise ProviderTimeoutError("Carbon Interface exceeded the latency budget.") from exc
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def close(self) -> None:
+        """Close the pooled clients, including the asynchronous one of every live loop."""
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._client.close()
+        clients, self._async_clients = self._async_clients, {}
+        for loop, client in clients.items():
+            self._close_async_client(loop, client)
+
+    def _close_async_client(
+        self, loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient
+    ) -> None:
+        if loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is running:
+            task = loop.create_task(client.aclose())
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            loop.run_until_complete(client.aclose())
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+_clients: dict[str, CarbonInterfaceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def carbon_interface_client(
+    api_key: str,
+    *,
+    latency_budget_seconds: float = PROVIDER_LATENCY_BUDGET_SECONDS,
+) -> CarbonInterfaceClient:
+    """Return the shared pooled client and breaker for an API key."""
+
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = CarbonInterfaceClient(
+                api_key,
+                breaker=CircuitBreaker(slow_call_seconds=latency_budget_seconds),
+            )
+        return client
@@ -0,0 +1,178 @@
+"""Answer fully specified emissions questions without calling the language model.
+
+A chat message that names a weight, two bundled places, and at least one
+transport mode has a single deterministic answer. Those messages are priced
+with the calculator core and answered from a template; anything open-ended,
+incomplete, or outside the gazetteer is left to the agent. JSON messages are
+read in their stated ``weight_unit`` and ``distance_unit``, kilograms and
+kilometres by default like the calculator tools. Words beyond the shipment
+and ordinary question phrasing ("in French", "per pallet") are kept as the
+question's remainder, and such questions are left to the agent too.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from agent.utils.parser_service import parse_question
+from domain.emissions.bulk_distance import geodesic_lane_km
+from domain.emissions.calculator import (
+    CalculationResult,
+    ComparisonResult,
+    calculate_emissions,
+)
+from domain.emissions.distance import DistanceMethod
+from domain.emissions.modes import normalize_mode
+from domain.emissions.units import normalize_distance_km, normalize_weight_kg
+from domain.places.gazetteer import lookup_place
+from domain.routing.network import network_route_distance
+
+_INTENT = re.compile(r"\b(?:emissions?|footprint|co2e?|carbon|ghg|compare|calculate|estimate)\b")
+_OPEN_ENDED = re.compile(r"\b(?:why|explain|recommend|suggest|should|reduce|alternatives?)\b")
+# Phrasing that does not change what a calculate or compare question asks.
+_FILLER = frozenset(
+    (
+        "a about an and approximately are around between by calculate carbon cargo co2 co2e"
+        " compare comparing comparison do does emission emissions emit emits estimate"
+        " estimated footprint for freight from ghg goods how i in is it kg me mode modes much"
+        " my of on or please produce produced roughly send sending ship shipment shipping ships"
+        " the to total transport transporting using versus via vs what what's whats will with"
+        " would"
+    ).split()
+)
+
+
+@dataclass(frozen=True)
+class StructuredQuestion:
+    """Normalized parameters of a fully specified calculate or compare question."""
+
+    weight_kg: float
+    origin: str
+    destination: str
+    modes: tuple[str, ...]
+    distance_km: float | None = None
+    remainder: tuple[str, ...] = ()
+
+
+def _positive(value: object) -> float | None:
+    if isinstance(value, bool) or not isinstance(value, int | float) or value <= 0:
+        return None
+    return float(value)
+
+
+def _quantity(value: object, unit: object, normalize) -> float | None:
+    positive = _positive(value)
+    return None if positive is None else normalize(positive, unit)
+
+
+def _modes(value: object) -> tuple[str, ...]:
+    values = [value] if isinstance(value, str) else value
+    if not isinstance(values, list) or not values:
+        return ()
+    try:
+        return tuple(dict.fromkeys(normalize_mode(mode).value for mode in values))
+    except (AttributeError, ValueError):
+        return ()
+
+
+def _calculate(
+    mode: str,
+    question: StructuredQuestion,
+    origin,
+    destination,
+) -> tuple[CalculationResult, str]:
+    routed = (
+        None
+        if question.distance_km is not None
+        else network_route_distance(origin.name, destination.name, mode)
+    )
+    if question.distance_km is not None:
+        basis = "stated"
+        distance_km, method = question.distance_km, DistanceMethod.ROUTE
+    elif routed is not None:
+        basis = "route"
+        distance_km, method = routed.km, DistanceMethod.ROUTE
+    else:
+        basis = "straight-line"
+        distance_km = round(geodesic_lane_km(origin.coordinates, destination.coordinates), 6)
+        method = DistanceMethod.STRAIGHT_LINE
+    result = calculate_emissions(
+        weight_value=question.weight_kg,
+        distance_value=distance_km,
+        mode=mode,
+        distance_method=method,
+        origin=origin.name,
+        destination=destination.name,
+    )
+    return result, basis
+
+
+def _line(result: CalculationResult, basis: str) -> str:
+    return (
+        f"{result.mode.value} {result.emissions_kg:,.1f} kg CO2e "
+        f"({result.distance.km:,.0f} km {basis})"
+    )
+
+
+def structured_question(message: str) -> StructuredQuestion | None:
+    """Parse a calculate or compare question that names every parameter, or ``None``."""
+
+    normalized = message.lower()
+    if not _INTENT.search(normalized) or _OPEN_ENDED.search(normalized):
+        return None
+    parsed, words = parse_question(message)
+    if "shipments" in parsed:
+        return None
+    try:
+        weight_kg = _quantity(
+            parsed.get("weight_value"), parsed.get("weight_unit", "kg"), normalize_weight_kg
+        )
+        distance_km = _quantity(
+            parsed.get("distance_value"), parsed.get("distance_unit", "km"), normalize_distance_km
+        )
+    except ValueError:
+        return None
+    modes = _modes(parsed.get("transport_method"))
+    origin = str(parsed.get("origin") or "").strip()
+    destination = str(parsed.get("destination") or "").strip()
+    if weight_kg is None or not modes or not origin or not destination:
+        return None
+    # Message order and repeats are kept: "French, not German" differs from
+    # "German, not French".
+    remainder = tuple(word for word in words if word not in _FILLER)
+    return StructuredQuestion(weight_kg, origin, destination, modes, distance_km, remainder)
+
+
+def answer_structured(message: str) -> str | None:
+    """Return a templated answer for a fully specified question, or ``None``."""
+
+    question = structured_question(message)
+    return None if question is None else answer_question(question)
+
+
+def answer_question(question: StructuredQuestion) -> str | None:
+    """Return a templated answer for a parsed question, or ``None``."""
+
+    if question.remainder:
+        return None
+    origin = lookup_place(question.origin)
+    destination = lookup_place(question.destination)
+    if origin is None or destination is None or origin.name == destination.name:
+        return None
+
+    priced = [_calculate(mode, question, origin, destination) for mode in question.modes]
+    shipment = f"{question.weight_kg:,g} kg from {origin.name} to {destination.name}"
+    factor = priced[0][0].factor
+    footer = f" Factors: {factor.source} ({factor.version})."
+    if len(priced) == 1:
+        result, basis = priced[0]
+        return (
+            f"Shipping {shipment} by {result.mode.value} emits an estimated "
+            f"{result.emissions_kg:,.1f} kg CO2e over {result.distance.km:,.0f} km "
+            f"({basis} distance).{footer}"
+        )
+
+    summary = ComparisonResult(tuple(result for result, _ in priced)).to_dict()["summary"]
+    estimates = "; ".join(_line(result, basis) for result, basis in priced)
+    return f"{summary} Estimates for {shipment}: {estimates}.{footer}"
@@ -1,8 +1,26 @@
+from hashlib import sha256
+
 from langchain_openai import ChatOpenAI
 
 from config import settings
 
 
+def llm_config_key() -> tuple[object, ...]:
+    """Identify the settings a built model client depends on, without raw secrets."""
+
+    def fingerprint(secret: str | None) -> str | None:
+        return sha256(secret.encode()).hexdigest() if secret else None
+
+    return (
+        settings.assistant_enabled,
+        settings.llm_provider,
+        settings.openai_model,
+        fingerprint(settings.openai_api_key),
+        settings.openrouter_model,
+        fingerprint(settings.openrouter_api_key),
+    )
+
+
 def load_llm():
     if not settings.assistant_enabled:
         raise RuntimeError("The CarbonSage agent preview is disabled.")
@@ -0,0 +1,67 @@
+"""Structured-chat agent prompt bundled with the service.
+
+This is the ``hwchase17/structured-chat-agent`` prompt from the LangChain Hub,
+checked in so building the agent never fetches it over the network.
+"""
+
+from langchain_core.prompts import (
+    ChatPromptTemplate,
+    HumanMessagePromptTemplate,
+    MessagesPlaceholder,
+    SystemMessagePromptTemplate,
+)
+
+STRUCTURED_CHAT_SYSTEM = """Respond to the human as helpfully and accurately as possible. \
+You have access to the following tools:
+
+{tools}
+
+Use a json blob to specify a tool by providing an action key (tool name) and an action_input \
+key (tool input).
+
+Valid "action" values: "Final Answer" or {tool_names}
+
+Provide only ONE action per $JSON_BLOB, as shown:
+
+```
+{{
+  "action": $TOOL_NAME,
+  "action_input": $INPUT
+}}
+```
+
+Follow this format:
+
+Question: input question to answer
+Thought: consider previous and subsequent steps
+Action:
+```
+$JSON_BLOB
+```
+Observation: action result
+... (repeat Thought/Action/Observation N times)
+Thought: I know what to respond
+Action:
+```
+{{
+  "action": "Final Answer",
+  "action_input": "Final response to human"
+}}
+
+Begin! Reminder to ALWAYS respond with a valid json blob of a single action. Use tools if \
+necessary. Respond directly if appropriate. Format is Action:```$JSON_BLOB```then Observation"""
+
+STRUCTURED_CHAT_HUMAN = """{input}
+
+{agent_scratchpad}
+ (reminder to respond in a JSON blob no matter what)"""
+
+
+def structured_chat_prompt() -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages(
+        [
+            SystemMessagePromptTemplate.from_template(STRUCTURED_CHAT_SYSTEM),
+            MessagesPlaceholder("chat_history", optional=True),
+            HumanMessagePromptTemplate.from_template(STRUCTURED_CHAT_HUMAN),
+        ]
+    )
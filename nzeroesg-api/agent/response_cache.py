@@ -0,0 +1,108 @@
+"""Reuse assistant replies for repeated structured questions.
+
+Chat messages are keyed by what they ask, not how they are worded: the
+weight, places, modes, and any stated distance extracted by the parser, the
+words left over once ordinary phrasing is dropped, the factor catalog version,
+and the configured model. Rephrasings of the same comparison share one entry,
+"in French please" never serves the English reply, a new factor schedule or
+model never serves an older reply, and entries expire after a fixed TTL.
+Open-ended or incomplete messages are never cached.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from agent.fast_path import StructuredQuestion, structured_question
+from agent.llm import llm_config_key
+from config import settings
+from domain.emissions.factors import catalog_version
+from domain.places.gazetteer import place_key
+
+REPLY_CACHE_SIZE = 1_024
+REPLY_CACHE_TTL_SECONDS = 900.0
+
+
+class ReplyCache:
+    """Least-recently-used assistant replies that expire after a fixed TTL."""
+
+    def __init__(
+        self,
+        *,
+        size: int = REPLY_CACHE_SIZE,
+        ttl_seconds: float = REPLY_CACHE_TTL_SECONDS,
+        clock=time.monotonic,
+    ) -> None:
+        self._size = size
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, reply: str) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self._ttl_seconds, reply)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def reply_cache_key(message: str) -> str | None:
+    """Return the cache key for a structured question, or ``None`` when uncacheable."""
+
+    question = structured_question(message)
+    return None if question is None else question_cache_key(question)
+
+
+def question_cache_key(question: StructuredQuestion) -> str:
+    """Return the cache key for a parsed structured question."""
+
+    return json.dumps(
+        [
+            round(question.weight_kg, 6),
+            place_key(question.origin),
+            place_key(question.destination),
+            sorted(question.modes),
+            question.distance_km,
+            question.remainder,
+            catalog_version(),
+            llm_config_key(),
+        ],
+        separators=(",", ":"),
+    )
+
+
+_cache: ReplyCache | None = None
+_cache_lock = threading.Lock()
+
+
+def reply_cache() -> ReplyCache:
+    """Return the process-wide reply cache."""
+
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReplyCache(ttl_seconds=settings.assistant_reply_cache_ttl_seconds)
+        return _cache
@@ -0,0 +1,56 @@
+"""Pick the user-facing reply out of streamed structured-chat completions.
+
+The structured-chat agent answers every step with a Thought and a JSON action
+blob; only the ``action_input`` of a ``"Final Answer"`` action is meant for
+the user. ``FinalAnswerStream`` buffers each model run's chunks and returns
+the newly decoded part of that string as it arrives, so reasoning and
+tool-selection blobs are never streamed as reply text.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+
+_FINAL_ANSWER = re.compile(r'"action"\s*:\s*"Final Answer".*?"action_input"\s*:\s*"', re.DOTALL)
+
+
+def _string_end(text: str, start: int) -> int:
+    """Return where the complete part of a JSON string body starting at ``start`` ends."""
+
+    index = start
+    while index < len(text):
+        char = text[index]
+        if char == '"':
+            break
+        if char == "\\":
+            width = 6 if text[index + 1 : index + 2] == "u" else 2
+            if index + width > len(text):
+                break
+            index += width
+        else:
+            index += 1
+    return index
+
+
+class FinalAnswerStream:
+    """Incrementally decode the final answer of each streamed model run."""
+
+    def __init__(self) -> None:
+        self._buffers: dict[str, str] = {}
+        self._positions: dict[str, int] = {}
+
+    def feed(self, run_id: str, text: str) -> str:
+        """Add a chunk of one model run and return any newly completed answer text."""
+
+        buffer = self._buffers.get(run_id, "") + text
+        self._buffers[run_id] = buffer
+        start = self._positions.get(run_id)
+        if start is None:
+            match = _FINAL_ANSWER.search(buffer)
+            if match is None:
+                return ""
+            start = match.end()
+        end = _string_end(buffer, start)
+        self._positions[run_id] = end
+        return json.loads(f'"{buffer[start:end]}"') if end > start else ""
@@ -1,12 +1,18 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Literal
 
-import requests
-from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
 from langchain.tools import StructuredTool
 from pydantic import BaseModel, Field
 
-from config import settings
+from agent.carbon_interface import (
+    CarbonInterfaceClient,
+    ProviderError,
+    carbon_interface_client,
+)
+from config import database_url_for_runtime, settings
+from domain.emissions.bulk_distance import geodesic_lane_km
 from domain.emissions.calculator import calculate_emissions as deterministic_calculate
 from domain.emissions.distance import DistanceMethod
 from domain.emissions.factors import FACTOR_CATALOG
@@ -16,6 +22,10 @@ from domain.emissions.units import (
 from domain.emissions.units import (
     normalize_weight_kg as deterministic_weight_kg,
 )
+from domain.places.gazetteer import Place, lookup_place
+from persistence.geocodes import build_geocode_cache
+
+GEOCODE_TIMEOUT_SECONDS = 10
 
 TransportMode = Literal["plane", "air", "truck", "train", "ship", "ocean container"]
 
@@ -24,10 +34,15 @@ FALLBACK_EMISSION_FACTORS: dict[str, float] = {
     factor.mode.value: factor.value for factor in FACTOR_CATALOG
 }
 
+geocode_cache = build_geocode_cache(database_url_for_runtime())
+_geolocator: Nominatim | None = None
+
 
 class DistanceInput(BaseModel):
-    origin: str = Field(min_length=2, description="Origin city or location")
-    destination: str = Field(min_length=2, description="Destination city or location")
+    origin: str = Field(min_length=2, max_length=200, description="Origin city or location")
+    destination: str = Field(
+        min_length=2, max_length=200, description="Destination city or location"
+    )
 
 
 class ShippingEmissionsInput(BaseModel):
@@ -74,27 +89,104 @@ def fallback_emission_estimate(
     ).to_dict()
 
 
-def resolve_distance(origin: str, destination: str) -> dict[str, float | str]:
-    geolocator = Nominatim(user_agent="carbonsage-prototype")
-    origin_location = geolocator.geocode(origin, timeout=10)
-    destination_location = geolocator.geocode(destination, timeout=10)
+def _network_geocoder() -> Nominatim:
+    global _geolocator
+    if _geolocator is None:
+        _geolocator = Nominatim(user_agent="carbonsage-prototype")
+    return _geolocator
+
+
+def locate_place(name: str) -> Place:
+    """Resolve coordinates from the gazetteer, then the geocode cache, then Nominatim.
+
+    Names Nominatim could not resolve are cached as misses and fail without
+    another network call until the miss expires.
+    """
 
-    if not origin_location or not destination_location:
+    place = lookup_place(name) or geocode_cache.get(name)
+    if place is not None:
+        return place
+    if settings.geocoder == "offline":
+        raise ValueError(f"Could not resolve location without network geocoding: {name}")
+    if geocode_cache.is_missing(name):
         raise ValueError("Could not resolve one or both locations.")
 
-    distance_km = geodesic(
-        (origin_location.latitude, origin_location.longitude),
-        (destination_location.latitude, destination_location.longitude),
-    ).km
+    location = _network_geocoder().geocode(name, timeout=GEOCODE_TIMEOUT_SECONDS)
+    if not location:
+        geocode_cache.put_missing(name)
+        raise ValueError("Could not resolve one or both locations.")
+    place = Place(
+        name=name,
+        latitude=float(location.latitude),
+        longitude=float(location.longitude),
+        kind="geocoded",
+        source="nominatim",
+    )
+    geocode_cache.put(name, place)
+    return place
+
+
+def resolve_distance(origin: str, destination: str) -> dict[str, float | str]:
+    origin_place = locate_place(origin)
+    destination_place = locate_place(destination)
+
+    distance_km = geodesic_lane_km(origin_place.coordinates, destination_place.coordinates)
     return {
         "origin": origin,
         "destination": destination,
         "distance_km": round(distance_km, 1),
         "distance_method": "geodesic",
+        "origin_source": origin_place.source,
+        "destination_source": destination_place.source,
         "warning": "This is straight-line distance, not a mode-specific route.",
     }
 
 
+def _provider_payload(
+    weight_value: float,
+    distance_value: float,
+    transport_method: str,
+    weight_unit: str,
+    distance_unit: str,
+) -> dict[str, object]:
+    return {
+        "type": "shipping",
+        "weight_value": weight_value,
+        "weight_unit": weight_unit,
+        "distance_value": distance_value,
+        "distance_unit": distance_unit,
+        "transport_method": transport_method.lower(),
+    }
+
+
+def _provider() -> CarbonInterfaceClient:
+    return carbon_interface_client(
+        settings.carbon_interface_api_key,
+        latency_budget_seconds=settings.provider_latency_budget_seconds,
+    )
+
+
+def _provider_result(
+    attributes: dict[str, object],
+    *,
+    weight_value: float,
+    distance_value: float,
+    transport_method: str,
+    weight_unit: str,
+    distance_unit: str,
+) -> dict[str, object]:
+    emissions_kg = float(attributes["carbon_kg"])
+    return {
+        "method": str(attributes.get("transport_method", transport_method)).lower(),
+        "emissions_kg": emissions_kg,
+        "emissions_tonnes": float(attributes.get("carbon_mt") or round(emissions_kg / 1_000, 6)),
+        "weight_kg": round(normalize_weight_kg(weight_value, weight_unit), 3),
+        "distance_km": round(normalize_distance_km(distance_value, distance_unit), 3),
+        "source": "Carbon Interface API",
+        "data_quality": "provider_estimate",
+    }
+
+
 def calculate_shipping_emissions(
     weight_value: float,
     distance_value: float,
@@ -115,38 +207,88 @@ def calculate_shipping_emissions(
     if not settings.carbon_interface_api_key:
         return fallback
 
-    payload = {
-        "type": "shipping",
+    shipment = {
         "weight_value": weight_value,
+        "distance_value": distance_value,
+        "transport_method": transport_method,
         "weight_unit": weight_unit,
+        "distance_unit": distance_unit,
+    }
+    try:
+        attributes = _provider().estimate(
+            _provider_payload(**shipment),
+            budget_seconds=settings.provider_latency_budget_seconds,
+        )
+    except ProviderError:
+        return fallback
+    return _provider_result(attributes, **shipment)
+
+
+async def acalculate_shipping_emissions(
+    weight_value: float,
+    distance_value: float,
+    transport_method: str,
+    weight_unit: str = "kg",
+    distance_unit: str = "km",
+    distance_method: DistanceMethod = DistanceMethod.ROUTE,
+) -> dict[str, object]:
+    """Async variant that awaits the provider on the pooled async client."""
+
+    fallback = fallback_emission_estimate(
+        weight=weight_value,
+        distance=distance_value,
+        method=transport_method,
+        weight_unit=weight_unit,
+        distance_unit=distance_unit,
+        distance_method=distance_method,
+    )
+
+    if not settings.carbon_interface_api_key:
+        return fallback
+
+    shipment = {
+        "weight_value": weight_value,
         "distance_value": distance_value,
+        "transport_method": transport_method,
+        "weight_unit": weight_unit,
         "distance_unit": distance_unit,
-        "transport_method": transport_method.lower(),
     }
     try:
-        response = requests.post(
-            "https://www.carboninterface.com/api/v1/estimates",
-            headers={
-                "Authorization": f"Bearer {settings.carbon_interface_api_key}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=15,
+        attributes = await _provider().aestimate(
+            _provider_payload(**shipment),
+            budget_seconds=settings.provider_latency_budget_seconds,
         )
-        response.raise_for_status()
-        attributes = response.json()["data"]["attributes"]
-        emissions_kg = float(attributes["carbon_kg"])
-    except (KeyError, TypeError, ValueError, requests.RequestException):
+    except ProviderError:
         return fallback
+    return _provider_result(attributes, **shipment)
+
+
+def _comparison_distance(
+    distance_value: float | None,
+    distance_unit: str,
+    origin: str | None,
+    destination: str | None,
+) -> tuple[float, str, DistanceMethod]:
+    if distance_value is not None:
+        return distance_value, distance_unit, DistanceMethod.ROUTE
+    if origin and destination:
+        resolved = float(resolve_distance(origin, destination)["distance_km"])
+        return resolved, "km", DistanceMethod.STRAIGHT_LINE
+    raise ValueError("Provide a distance or both origin and destination.")
+
+
+def _comparison(results: dict[str, dict[str, object]]) -> dict[str, object]:
+    lowest_method = min(
+        results,
+        key=lambda method: float(results[method]["emissions_kg"]),
+    )
 
     return {
-        "method": str(attributes.get("transport_method", transport_method)).lower(),
-        "emissions_kg": emissions_kg,
-        "emissions_tonnes": float(attributes.get("carbon_mt") or round(emissions_kg / 1_000, 6)),
-        "weight_kg": round(normalize_weight_kg(weight_value, weight_unit), 3),
-        "distance_km": round(normalize_distance_km(distance_value, distance_unit), 3),
-        "source": "Carbon Interface API",
-        "data_quality": "provider_estimate",
+        "summary": (
+            f"{lowest_method.capitalize()} has the lowest estimated footprint for this shipment."
+        ),
+        "lowest_emissions_method": lowest_method,
+        "details": results,
     }
 
 
@@ -159,38 +301,57 @@ def compare_emissions(
     origin: str | None = None,
     destination: str | None = None,
 ) -> dict[str, object]:
-    resolved_distance = distance_value
-    resolved_distance_method = DistanceMethod.ROUTE
-    if resolved_distance is None and origin and destination:
-        resolved_distance = float(resolve_distance(origin, destination)["distance_km"])
-        distance_unit = "km"
-        resolved_distance_method = DistanceMethod.STRAIGHT_LINE
-    if resolved_distance is None:
-        raise ValueError("Provide a distance or both origin and destination.")
-
-    results = {
-        method: calculate_shipping_emissions(
+    distance, distance_unit, distance_method = _comparison_distance(
+        distance_value, distance_unit, origin, destination
+    )
+
+    def estimate(method: str) -> dict[str, object]:
+        return calculate_shipping_emissions(
             weight_value=weight_value,
-            distance_value=resolved_distance,
+            distance_value=distance,
             transport_method=method,
             weight_unit=weight_unit,
             distance_unit=distance_unit,
-            distance_method=resolved_distance_method,
+            distance_method=distance_method,
         )
-        for method in transport_method
-    }
-    lowest_method = min(
-        results,
-        key=lambda method: float(results[method]["emissions_kg"]),
-    )
 
-    return {
-        "summary": (
-            f"{lowest_method.capitalize()} has the lowest estimated footprint for this shipment."
-        ),
-        "lowest_emissions_method": lowest_method,
-        "details": results,
-    }
+    # Deterministic estimates take microseconds; only provider calls are fanned out.
+    if settings.carbon_interface_api_key and len(transport_method) > 1:
+        with ThreadPoolExecutor(max_workers=len(transport_method)) as executor:
+            estimates = list(executor.map(estimate, transport_method))
+    else:
+        estimates = [estimate(method) for method in transport_method]
+    return _comparison(dict(zip(transport_method, estimates, strict=True)))
+
+
+async def acompare_emissions(
+    weight_value: float,
+    transport_method: list[str],
+    weight_unit: str = "kg",
+    distance_unit: str = "km",
+    distance_value: float | None = None,
+    origin: str | None = None,
+    destination: str | None = None,
+) -> dict[str, object]:
+    """Async variant that requests every mode from the provider concurrently."""
+
+    distance, distance_unit, distance_method = await asyncio.to_thread(
+        _comparison_distance, distance_value, distance_unit, origin, destination
+    )
+    estimates = await asyncio.gather(
+        *(
+            acalculate_shipping_emissions(
+                weight_value=weight_value,
+                distance_value=distance,
+                transport_method=method,
+                weight_unit=weight_unit,
+                distance_unit=distance_unit,
+                distance_method=distance_method,
+            )
+            for method in transport_method
+        )
+    )
+    return _comparison(dict(zip(transport_method, estimates, strict=True)))
 
 
 distance_tool = StructuredTool.from_function(
@@ -206,6 +367,7 @@ distance_tool = StructuredTool.from_function(
 emissions_tool = StructuredTool.from_function(
     name="EmissionsCalculator",
     func=calculate_shipping_emissions,
+    coroutine=acalculate_shipping_emissions,
     args_schema=ShippingEmissionsInput,
     description="Estimate freight emissions for one transport mode.",
 )
@@ -213,6 +375,7 @@ emissions_tool = StructuredTool.from_function(
 compare_shipping_emissions = StructuredTool.from_function(
     name="OptionComparer",
     func=compare_emissions,
+    coroutine=acompare_emissions,
     args_schema=CompareInput,
     description="Compare estimated freight emissions across transport modes.",
 )
@@ -1,61 +1,186 @@
+"""Extract freight parameters from JSON or natural-language tool input.
+
+Natural language is tokenized in one left-to-right pass of a single
+precompiled pattern that recognizes ``from X to Y`` routes, numbers with a
+weight or distance unit, and transport-mode words. Weights are normalized to
+kilograms and distances to kilometres. When a weight, distance, or route
+repeats, a new shipment starts, so one message can describe several. A
+mode word directly followed by a number ("ship 500 kg") is read as a verb
+unless a preposition such as "by" or another mode's conjunction introduces it.
+``parse_question`` also returns the words no token consumed, so callers can
+tell a bare calculation from one that asks for something more.
+"""
+
 import json
 import re
 
+from domain.emissions.units import normalize_distance_km, normalize_weight_kg
 
-def parse_agent_input(text: str) -> dict[str, object]:
-    """Extract basic freight parameters from JSON or a natural-language query."""
+_MODE_SYNONYMS: dict[str, str] = {
+    "air": "plane",
+    "aerial": "plane",
+    "aircraft": "plane",
+    "plane": "plane",
+    "planes": "plane",
+    "rail": "train",
+    "railway": "train",
+    "train": "train",
+    "trains": "train",
+    "truck": "truck",
+    "trucks": "truck",
+    "road": "truck",
+    "lorry": "truck",
+    "van": "truck",
+    "ship": "ship",
+    "ships": "ship",
+    "vessel": "ship",
+    "ocean": "ship",
+    "sea": "ship",
+    "boat": "ship",
+}
+
+# Spelled unit -> (result field, canonical unit understood by ``domain.emissions.units``).
+_UNIT_SPELLINGS: dict[str, tuple[str, str]] = {
+    **dict.fromkeys(("g", "gr", "gram", "grams"), ("weight_value", "g")),
+    **dict.fromkeys(
+        ("kg", "kgs", "kilo", "kilos", "kilogram", "kilograms"), ("weight_value", "kg")
+    ),
+    **dict.fromkeys(("lb", "lbs", "pound", "pounds"), ("weight_value", "lb")),
+    **dict.fromkeys(
+        ("t", "mt", "ton", "tons", "tonne", "tonnes", "metric ton", "metric tons")
+        + ("metric tonne", "metric tonnes"),
+        ("weight_value", "mt"),
+    ),
+    **dict.fromkeys(
+        ("km", "kms", "kilometer", "kilometers", "kilometre", "kilometres"),
+        ("distance_value", "km"),
+    ),
+    **dict.fromkeys(("mi", "mile", "miles"), ("distance_value", "mi")),
+}
+_NORMALIZERS = {"weight_value": normalize_weight_kg, "distance_value": normalize_distance_km}
+# Spelled unit -> (result field, factor to kilograms or kilometres), resolved once.
+_UNITS: dict[str, tuple[str, float]] = {
+    spelling: (field, _NORMALIZERS[field](1.0, canonical))
+    for spelling, (field, canonical) in _UNIT_SPELLINGS.items()
+}
+
+
+def _alternation(words) -> str:
+    return "|".join(
+        re.escape(word).replace(r"\ ", r"\s+") for word in sorted(words, key=len, reverse=True)
+    )
+
+
+_ROUTE_END = r"(?=\s+(?:by|in|and|for|via|vs|using|with|on)\b|\s*\d|\s*[,.;:?!/]|\s*$)"
+# Matched against lowercased text: case-insensitive matching makes scanning
+# a message markedly slower.
+_TOKENS = re.compile(
+    rf"""
+    (?P<route>from\s+(?P<origin>[a-z][a-z\s,.'-]*?)\s+to\s+(?P<destination>[a-z][a-z\s]*?)
+        {_ROUTE_END})
+    | (?P<quantity>(?<![\w.])(?P<number>\d{{1,3}}(?:,\d{{3}})+(?:\.\d+)?|\d+(?:\.\d+)?)
+        \s*(?P<unit>{_alternation(_UNITS)})(?![a-z]))
+    | (?<![a-z])(?P<mode>{_alternation(_MODE_SYNONYMS)})(?![a-z])
+    """,
+    re.VERBOSE,
+)
+
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_VERB_OBJECT = re.compile(r"\s+\d")
+_MODE_PREPOSITION = re.compile(r"\b(?:by|via|using|on|per|and|or|vs|versus)\s+$")
+
+
+def _is_verb(text: str, match: re.Match[str]) -> bool:
+    """Whether a mode word is a verb, as in "to ship 500 kg", rather than a mode."""
+
+    return _VERB_OBJECT.match(text, match.end()) is not None and not _MODE_PREPOSITION.search(
+        text[max(match.start() - 8, 0) : match.start()]
+    )
+
+
+def _shipments(text: str, gaps: list[str] | None = None) -> list[dict[str, object]]:
+    shipments: list[dict[str, object]] = [{}]
+    end = 0
+    for match in _TOKENS.finditer(text):
+        kind = match.lastgroup
+        if kind == "mode" and _is_verb(text, match):
+            continue
+        if gaps is not None:
+            gaps.append(text[end : match.start()])
+            end = match.end()
+        current = shipments[-1]
+        if kind == "mode":
+            mode = _MODE_SYNONYMS[match["mode"]]
+            modes = current.setdefault("transport_method", [])
+            if mode not in modes:
+                modes.append(mode)
+        elif kind == "route":
+            if "origin" in current:
+                current = {}
+                shipments.append(current)
+            current["origin"] = match["origin"].strip()
+            current["destination"] = match["destination"].strip()
+        else:
+            unit = match["unit"]
+            field, factor = _UNITS.get(unit) or _UNITS[" ".join(unit.split())]
+            value = round(float(match["number"].replace(",", "")) * factor, 6)
+            if value <= 0:
+                continue
+            if field in current:
+                current = {}
+                shipments.append(current)
+            current[field] = value
+    if gaps is not None:
+        gaps.append(text[end:])
+
+    if len(shipments) > 1:
+        # A shipment without its own modes reuses the closest earlier
+        # shipment's modes, or the first named modes when none came before it.
+        shared = next((s["transport_method"] for s in shipments if "transport_method" in s), None)
+        if shared is not None:
+            for shipment in shipments:
+                shared = shipment.setdefault("transport_method", list(shared))
+    return shipments
+
+
+def _json_object(text: str) -> dict[str, object] | None:
+    if not text.lstrip().startswith("{"):
+        return None
     try:
         parsed = json.loads(text)
     except json.JSONDecodeError:
-        parsed = None
-    if isinstance(parsed, dict):
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _result(shipments: list[dict[str, object]]) -> dict[str, object]:
+    if len(shipments) == 1:
+        return shipments[0]
+    return {**shipments[0], "shipments": shipments}
+
+
+def parse_agent_input(text: str) -> dict[str, object]:
+    """Extract basic freight parameters from JSON or a natural-language query.
+
+    The first shipment's parameters are returned at the top level; when the
+    message describes more than one, all of them are also listed under
+    ``shipments`` in message order.
+    """
+    parsed = _json_object(text)
+    if parsed is not None:
         return parsed
+    return _result(_shipments(text.lower()))
 
-    normalized = text.lower()
-    result: dict[str, object] = {}
 
-    weight_match = re.search(
-        r"(\d+(?:\.\d+)?)\s*(kg|kilograms|tons|tonnes|g|grams|gr)",
-        normalized,
-    )
-    if weight_match:
-        weight, unit = weight_match.groups()
-        weight = float(weight)
-        if "ton" in unit:
-            result["weight_value"] = weight * 1000
-        elif unit.startswith("g") and "kg" not in unit:
-            result["weight_value"] = weight / 1000
-        else:
-            result["weight_value"] = weight
+def parse_question(text: str) -> tuple[dict[str, object], tuple[str, ...]]:
+    """Parse like ``parse_agent_input`` and also return the unparsed words.
 
-    route_match = re.search(
-        r"from\s+([a-z\s]+?)\s+to\s+([a-z\s]+?)(?:\s+by|\s+in|,|\.|\?|$)",
-        normalized,
-    )
-    if route_match:
-        result["origin"] = route_match.group(1).strip()
-        result["destination"] = route_match.group(2).strip()
-
-    synonym_map = {
-        "air": "plane",
-        "aerial": "plane",
-        "plane": "plane",
-        "rail": "train",
-        "train": "train",
-        "truck": "truck",
-        "road": "truck",
-        "lorry": "truck",
-        "van": "truck",
-        "ship": "ship",
-        "ocean": "ship",
-        "boat": "ship",
-    }
-    modes = []
-    for token in re.findall(r"\w+", normalized):
-        mode = synonym_map.get(token)
-        if mode and mode not in modes:
-            modes.append(mode)
-    if modes:
-        result["transport_method"] = modes
-
-    return result
+    The words are lowercased and in message order; a JSON object leaves none.
+    """
+    parsed = _json_object(text)
+    if parsed is not None:
+        return parsed, ()
+    gaps: list[str] = []
+    shipments = _shipments(text.lower(), gaps)
+    return _result(shipments), tuple(_WORD.findall(" ".join(gaps)))
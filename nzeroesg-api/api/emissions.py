@@ -1,9 +1,11 @@
 """Typed HTTP boundary for the deterministic emissions core."""
 
+import json
+import math
 from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import BaseModel, Field, ValidationError
 
 from api.workspaces import require_workspace_session, workspace_repository
 from domain.emissions.calculator import (
@@ -12,6 +14,8 @@ from domain.emissions.calculator import (
     calculate_emissions,
     compare_emissions,
 )
+from domain.emissions.modes import FreightMode, normalize_modes
+from domain.emissions.units import normalize_distances_km, normalize_weights_kg
 from domain.workspaces.sessions import WorkspaceSession
 from persistence.workspaces import QuotaExceededError, WorkspaceNotFoundError
 
@@ -24,6 +28,9 @@ TransportMethod = Literal[
     "ocean container",
 ]
 DistanceMethod = Literal["route", "straight_line"]
+MAX_BATCH_ITEMS = 10_000
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
 
 
 class EmissionsRequest(BaseModel):
@@ -99,6 +106,19 @@ class ComparisonResponse(BaseModel):
     details: dict[str, CalculationResponse]
 
 
+class BatchItemResponse(BaseModel):
+    index: int
+    result: CalculationResponse | None = None
+    error: str | None = None
+
+
+class BatchCalculationResponse(BaseModel):
+    item_count: int
+    succeeded: int
+    failed: int
+    items: list[BatchItemResponse]
+
+
 emissions_router = APIRouter(
     prefix="/emissions",
     tags=["emissions"],
@@ -135,6 +155,151 @@ async def calculate(
     return _calculation_response(result)
 
 
+@emissions_router.post("/calculate/batch", response_model=BatchCalculationResponse)
+async def calculate_batch(
+    request: Request,
+    workspace: Annotated[WorkspaceSession, Depends(require_workspace_session)],
+) -> BatchCalculationResponse:
+    """Price a JSON array or NDJSON stream of shipments for one analysis run."""
+
+    body = await _batch_body(request)
+    content_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    items = _batch_items(body, ndjson=content_type in NDJSON_CONTENT_TYPES)
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batches are limited to {MAX_BATCH_ITEMS} items.",
+        )
+
+    responses = _batch_responses(items)
+    succeeded = sum(1 for item in responses if item.error is None)
+    if succeeded:
+        _consume_analysis_run(workspace.workspace_id)
+    return BatchCalculationResponse(
+        item_count=len(responses),
+        succeeded=succeeded,
+        failed=len(responses) - succeeded,
+        items=responses,
+    )
+
+
+def _batch_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Batch bodies are limited to {MAX_BATCH_BYTES} bytes.",
+    )
+
+
+async def _batch_body(request: Request) -> bytes:
+    """Read the request body, refusing it as soon as it exceeds ``MAX_BATCH_BYTES``."""
+
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_BATCH_BYTES:
+        raise _batch_too_large()
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_BATCH_BYTES:
+            raise _batch_too_large()
+    return bytes(body)
+
+
+def _batch_items(body: bytes, *, ndjson: bool) -> list[object]:
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Batch bodies must be UTF-8 encoded.",
+        ) from exc
+    if ndjson:
+        return [_ndjson_item(line) for line in text.splitlines() if line.strip()]
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Batch body must be a JSON array or NDJSON.",
+        ) from exc
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Batch body must be a JSON array or NDJSON.",
+        )
+    return items
+
+
+def _ndjson_item(line: str) -> object:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        return ValueError(f"Invalid JSON: {exc.msg}.")
+
+
+def _batch_responses(items: list[object]) -> list[BatchItemResponse]:
+    """Validate every item, then normalize units and modes as columns before pricing."""
+
+    responses: list[BatchItemResponse | None] = []
+    payloads: list[tuple[int, EmissionsRequest]] = []
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            responses.append(BatchItemResponse(index=index, error=str(item)))
+            continue
+        try:
+            payloads.append((index, EmissionsRequest.model_validate(item)))
+        except ValidationError as exc:
+            responses.append(BatchItemResponse(index=index, error=_validation_message(exc)))
+            continue
+        responses.append(None)
+
+    weights_kg = normalize_weights_kg(
+        [payload.weight_value for _, payload in payloads],
+        [payload.weight_unit for _, payload in payloads],
+    )
+    distances_km = normalize_distances_km(
+        [payload.distance_value for _, payload in payloads],
+        [payload.distance_unit for _, payload in payloads],
+    )
+    modes = normalize_modes([payload.transport_method for _, payload in payloads])
+    for (index, payload), weight_kg, distance_km, mode in zip(
+        payloads, weights_kg, distances_km, modes, strict=True
+    ):
+        responses[index] = _batch_item(index, payload, weight_kg, distance_km, mode)
+    return responses
+
+
+def _batch_item(
+    index: int,
+    payload: EmissionsRequest,
+    weight_kg: float,
+    distance_km: float,
+    mode: FreightMode | None,
+) -> BatchItemResponse:
+    normalized = mode is not None and not math.isnan(weight_kg) and not math.isnan(distance_km)
+    try:
+        # Items that did not normalize go through the scalar path for its error message.
+        result = calculate_emissions(
+            weight_value=weight_kg if normalized else payload.weight_value,
+            weight_unit="kg" if normalized else payload.weight_unit,
+            distance_value=distance_km if normalized else payload.distance_value,
+            distance_unit="km" if normalized else payload.distance_unit,
+            mode=mode if normalized else payload.transport_method,
+            distance_method=payload.distance_method,
+            origin=payload.origin,
+            destination=payload.destination,
+        )
+    except ValueError as exc:
+        return BatchItemResponse(index=index, error=str(exc))
+    return BatchItemResponse(index=index, result=_calculation_response(result))
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
 @emissions_router.post("/compare", response_model=ComparisonResponse)
 async def compare(
     payload: ComparisonRequest,
@@ -32,7 +32,10 @@ from persistence.evidence import build_evidence_repository
 from persistence.workspaces import QuotaExceededError, WorkspaceNotFoundError
 
 evidence_router = APIRouter(tags=["evidence"])
-evidence_repository = build_evidence_repository(database_url_for_runtime())
+evidence_repository = build_evidence_repository(
+    database_url_for_runtime(),
+    storage=settings.embedding_storage,
+)
 embedding_adapter = build_embedding_adapter(
     provider=settings.embedding_provider,
     model=settings.embedding_model,
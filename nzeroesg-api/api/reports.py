@@ -4,20 +4,37 @@ from __future__ import annotations
 
 import csv
 import io
+import threading
 import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from hashlib import sha256
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from api.evidence import evidence_repository
-from api.shipments import shipment_repository
+from api.scenarios import compare_shipment_data
+from api.shipments import analyze_shipment_data, shipment_repository, workspace_shipment_data
 from api.workspaces import require_workspace_session
-from domain.scenarios.comparison import compare_shipment_modes
-from domain.shipments.analysis import analyze_shipments
+from domain.emissions.calculator import calculate_emissions
+from domain.emissions.factors import catalog_version
+from domain.evidence.models import SupplierCard
+from domain.scenarios.comparison import ScenarioComparison
+from domain.shipments.analysis import ShipmentAnalysis
+from domain.shipments.models import NormalizedShipment
 from domain.workspaces.sessions import WorkspaceSession
+from persistence.shipments import STREAM_BATCH_ROWS, ShipmentCursor
 
 reports_router = APIRouter(prefix="/reports", tags=["reports"])
+CSV_CHUNK_CHARS = 64 * 1024
+REPORT_SNAPSHOT_LIMIT = 256
+# Per-shipment scenario rows held across all cached snapshots.
+REPORT_SNAPSHOT_ROW_LIMIT = 100_000
 
 
 class ReportResponse(BaseModel):
@@ -29,45 +46,177 @@ class ReportResponse(BaseModel):
     methodology: dict[str, object]
 
 
-def _build_report(workspace_id: str, alternative_mode: str | None) -> ReportResponse:
-    shipments = shipment_repository.list_for_workspace(workspace_id)
-    analysis = analyze_shipments(shipments)
+@dataclass(frozen=True)
+class ReportSnapshot:
+    """Derived report state for one combination of workspace data versions."""
+
+    key: tuple[object, ...]
+    workspace_id: str
+    generated_at: int
+    analysis: ShipmentAnalysis
+    scenario: ScenarioComparison | None
+    suppliers: tuple[SupplierCard, ...]
+    scenario_shipments: bool
+
+    def to_response(self) -> ReportResponse:
+        analysis = self.analysis
+        return ReportResponse(
+            workspace_id=self.workspace_id,
+            generated_at=self.generated_at,
+            shipment_analysis=analysis.to_dict(),
+            scenario=self.scenario.to_dict() if self.scenario else None,
+            suppliers=[supplier.to_dict() for supplier in self.suppliers],
+            methodology={
+                "factor_source": analysis.factor_source,
+                "factor_version": analysis.factor_version,
+                "factor_applicability": analysis.factor_applicability,
+                "assumptions": list(analysis.assumptions),
+                "warnings": list(analysis.warnings),
+            },
+        )
+
+    @property
+    def cached_rows(self) -> int:
+        return len(self.scenario.shipment_results) if self.scenario else 0
+
+
+_snapshots: OrderedDict[tuple[object, ...], ReportSnapshot] = OrderedDict()
+_snapshots_lock = threading.Lock()
+_snapshot_rows = 0
+
+
+def _snapshot_key(
+    workspace_id: str,
+    alternative_mode: str | None,
+    *,
+    shipment_version: int | None = None,
+    evidence_version: int | None = None,
+) -> tuple[object, ...]:
+    if shipment_version is None:
+        shipment_version = shipment_repository.data_version(workspace_id)
+    if evidence_version is None:
+        evidence_version = evidence_repository.data_version(workspace_id)
+    return (
+        workspace_id,
+        shipment_version,
+        evidence_version,
+        catalog_version(),
+        (alternative_mode or "").strip().casefold(),
+    )
+
+
+def _etag(key: tuple[object, ...], representation: str) -> str:
+    digest = sha256(repr((key, representation)).encode("utf-8")).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def _not_modified(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+
+def _cached_snapshot(key: tuple[object, ...], *, scenario_shipments: bool) -> ReportSnapshot | None:
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is None or (scenario_shipments and not snapshot.scenario_shipments):
+            return None
+        _snapshots.move_to_end(key)
+        return snapshot
+
+
+def _remember_snapshot(snapshot: ReportSnapshot) -> None:
+    global _snapshot_rows
+    if snapshot.cached_rows > REPORT_SNAPSHOT_ROW_LIMIT:
+        return
+    with _snapshots_lock:
+        previous = _snapshots.pop(snapshot.key, None)
+        if previous is not None:
+            _snapshot_rows -= previous.cached_rows
+        _snapshots[snapshot.key] = snapshot
+        _snapshot_rows += snapshot.cached_rows
+        while len(_snapshots) > REPORT_SNAPSHOT_LIMIT or _snapshot_rows > REPORT_SNAPSHOT_ROW_LIMIT:
+            _, evicted = _snapshots.popitem(last=False)
+            _snapshot_rows -= evicted.cached_rows
+
+
+def _report_snapshot(
+    workspace_id: str,
+    alternative_mode: str | None,
+    *,
+    scenario_shipments: bool,
+) -> ReportSnapshot:
+    """Return the cached report for the current data, or derive and cache it.
+
+    Each data version is read together with the data it describes, so a
+    snapshot is never cached under a version newer than its contents.
+    Snapshots are bounded both in number and in per-shipment scenario rows.
+    """
+
+    cached = _cached_snapshot(
+        _snapshot_key(workspace_id, alternative_mode),
+        scenario_shipments=scenario_shipments,
+    )
+    if cached is not None:
+        return cached
+    shipment_version, data = workspace_shipment_data(workspace_id)
+    evidence_version = evidence_repository.data_version(workspace_id)
+    suppliers = evidence_repository.list_suppliers(workspace_id)
+    key = _snapshot_key(
+        workspace_id,
+        alternative_mode,
+        shipment_version=shipment_version,
+        evidence_version=evidence_version,
+    )
+    cached = _cached_snapshot(key, scenario_shipments=scenario_shipments)
+    if cached is not None:
+        return cached
     scenario = None
     if alternative_mode:
         try:
-            scenario = compare_shipment_modes(
-                shipments,
+            scenario = compare_shipment_data(
+                data,
                 alternative_mode=alternative_mode,
-            ).to_dict()
+                include_shipments=scenario_shipments,
+            )
         except ValueError as exc:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail=str(exc),
             ) from exc
-    return ReportResponse(
+    snapshot = ReportSnapshot(
+        key=key,
         workspace_id=workspace_id,
         generated_at=int(time.time()),
-        shipment_analysis=analysis.to_dict(),
+        analysis=analyze_shipment_data(data),
         scenario=scenario,
-        suppliers=[
-            supplier.to_dict() for supplier in evidence_repository.list_suppliers(workspace_id)
-        ],
-        methodology={
-            "factor_source": analysis.factor_source,
-            "factor_version": analysis.factor_version,
-            "factor_applicability": analysis.factor_applicability,
-            "assumptions": list(analysis.assumptions),
-            "warnings": list(analysis.warnings),
-        },
+        suppliers=suppliers,
+        scenario_shipments=scenario_shipments,
     )
+    if evidence_repository.data_version(workspace_id) == evidence_version:
+        _remember_snapshot(snapshot)
+    return snapshot
+
+
+def _cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
 
 
 @reports_router.get("/preview", response_model=ReportResponse)
 async def report_preview(
+    response: Response,
     workspace: Annotated[WorkspaceSession, Depends(require_workspace_session)],
     alternative_mode: Annotated[str | None, Query(max_length=30)] = None,
-) -> ReportResponse:
-    return _build_report(workspace.workspace_id, alternative_mode)
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> ReportResponse | Response:
+    key = _snapshot_key(workspace.workspace_id, alternative_mode)
+    etag = _etag(key, "preview")
+    if _not_modified(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+    snapshot = _report_snapshot(workspace.workspace_id, alternative_mode, scenario_shipments=True)
+    response.headers.update(_cache_headers(_etag(snapshot.key, "preview")))
+    return snapshot.to_response()
 
 
 def _safe_csv_cell(value: object) -> str:
@@ -77,35 +226,179 @@ def _safe_csv_cell(value: object) -> str:
     return text
 
 
-@reports_router.get("/export.csv")
-async def report_csv(
-    workspace: Annotated[WorkspaceSession, Depends(require_workspace_session)],
-    alternative_mode: Annotated[str | None, Query(max_length=30)] = None,
-) -> Response:
-    report = _build_report(workspace.workspace_id, alternative_mode)
-    output = io.StringIO(newline="")
-    writer = csv.writer(output)
-    writer.writerow(("section", "field", "value"))
-    writer.writerow(("report", "workspace_id", _safe_csv_cell(report.workspace_id)))
-    writer.writerow(("report", "generated_at", report.generated_at))
-    for field, value in report.shipment_analysis.items():
+def _summary_rows(snapshot: ReportSnapshot) -> Iterator[tuple[object, ...]]:
+    yield ("section", "field", "value")
+    yield ("report", "workspace_id", _safe_csv_cell(snapshot.workspace_id))
+    yield ("report", "generated_at", snapshot.generated_at)
+    summary = snapshot.analysis.to_dict()
+    for field, value in summary.items():
         if isinstance(value, dict | list):
             continue
-        writer.writerow(("shipment_analysis", field, _safe_csv_cell(value)))
-    for mode, breakdown in report.shipment_analysis.get("mode_breakdown", {}).items():
+        yield ("shipment_analysis", field, _safe_csv_cell(value))
+    for mode, breakdown in summary["mode_breakdown"].items():
         for field, value in breakdown.items():
-            writer.writerow((f"mode:{mode}", field, _safe_csv_cell(value)))
-    if report.scenario:
-        for field, value in report.scenario.items():
+            yield (f"mode:{mode}", field, _safe_csv_cell(value))
+    if snapshot.scenario is not None:
+        for field, value in snapshot.scenario.to_dict().items():
             if isinstance(value, dict | list):
                 continue
-            writer.writerow(("scenario", field, _safe_csv_cell(value)))
-    for supplier in report.suppliers:
-        writer.writerow(("supplier", "name", _safe_csv_cell(supplier["name"])))
-        writer.writerow(("supplier", "region", _safe_csv_cell(supplier["region"])))
-        writer.writerow(("supplier", "document_count", supplier["document_count"]))
-    return Response(
-        content=output.getvalue(),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=carbonsage-report.csv"},
-    )
+            yield ("scenario", field, _safe_csv_cell(value))
+    for supplier in snapshot.suppliers:
+        yield ("supplier", "name", _safe_csv_cell(supplier.name))
+        yield ("supplier", "region", _safe_csv_cell(supplier.region))
+        yield ("supplier", "document_count", supplier.document_count)
+
+
+class _ShipmentsChanged(Exception):
+    """The workspace shipments were replaced while detail rows were streaming."""
+
+
+def _pinned_shipments(workspace_id: str, version: int) -> Iterator[NormalizedShipment]:
+    """Yield the workspace shipments in keyset pages while they stay at ``version``.
+
+    The version is re-read after each page, so a page is only yielded when no
+    upload committed since the report summary was derived.
+    """
+
+    after: ShipmentCursor | None = None
+    while True:
+        page = tuple(
+            shipment_repository.iter_for_workspace(
+                workspace_id, after=after, limit=STREAM_BATCH_ROWS
+            )
+        )
+        if shipment_repository.data_version(workspace_id) != version:
+            raise _ShipmentsChanged
+        yield from (shipment for _, shipment in page)
+        if len(page) < STREAM_BATCH_ROWS:
+            return
+        after = page[-1][0]
+
+
+def _detail_rows(
+    shipments: Iterable[NormalizedShipment],
+    alternative_mode: str | None,
+) -> Iterator[tuple[object, ...]]:
+    for shipment in shipments:
+        result = calculate_emissions(
+            weight_value=shipment.weight_kg,
+            weight_unit="kg",
+            distance_value=shipment.distance_km,
+            distance_unit="km",
+            mode=shipment.transport_method,
+            distance_method=shipment.distance_method,
+            origin=shipment.origin,
+            destination=shipment.destination,
+        )
+        section = f"shipment:{shipment.source_row}"
+        fields: dict[str, object] = {
+            **shipment.to_dict(),
+            "emissions_kg": result.emissions_kg,
+            "factor_kg_co2e_per_tonne_km": result.factor.value,
+            "factor_source": result.factor.source,
+            "factor_version": result.factor.version,
+            "factor_geography": result.factor.geography,
+            "distance_method": result.distance.method.value,
+            "data_quality": result.data_quality,
+        }
+        if alternative_mode:
+            fields["alternative_emissions_kg"] = calculate_emissions(
+                weight_value=shipment.weight_kg,
+                weight_unit="kg",
+                distance_value=shipment.distance_km,
+                distance_unit="km",
+                mode=alternative_mode,
+                distance_method=shipment.distance_method,
+                origin=shipment.origin,
+                destination=shipment.destination,
+            ).emissions_kg
+        for field, value in fields.items():
+            yield (section, field, _safe_csv_cell(value))
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    """Whether ``Accept-Encoding`` admits gzip with a non-zero quality."""
+
+    for coding in (accept_encoding or "").split(","):
+        name, _, parameters = coding.partition(";")
+        if name.strip().lower() not in {"gzip", "*"}:
+            continue
+        quality = parameters.strip().lower().removeprefix("q=").strip() or "1"
+        try:
+            return float(quality) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def _csv_chunks(rows: Iterable[tuple[object, ...]]) -> Iterator[str]:
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CSV_CHUNK_CHARS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode("utf-8"))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@reports_router.get("/export.csv")
+async def report_csv(
+    workspace: Annotated[WorkspaceSession, Depends(require_workspace_session)],
+    alternative_mode: Annotated[str | None, Query(max_length=30)] = None,
+    detail: Annotated[bool, Query(description="Append one row group per shipment")] = False,
+    accept_encoding: Annotated[str | None, Header()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Stream the report as CSV, gzip-encoded when the client accepts it.
+
+    Summary rows come from the cached report snapshot. Detail rows are read
+    in keyset pages of ``STREAM_BATCH_ROWS`` pinned to the shipment version
+    that summary describes; if an upload replaces the shipments mid-export,
+    the stream ends with a ``report,detail_truncated`` row instead of mixing
+    the two uploads.
+    """
+
+    workspace_id = workspace.workspace_id
+    gzip = _accepts_gzip(accept_encoding)
+    representation = f"csv:detail={detail}:gzip={gzip}"
+    etag = _etag(_snapshot_key(workspace_id, alternative_mode), representation)
+    headers = {
+        "Content-Disposition": "attachment; filename=carbonsage-report.csv",
+        "Vary": "Accept-Encoding",
+        **_cache_headers(etag),
+    }
+    if _not_modified(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    snapshot = _report_snapshot(workspace_id, alternative_mode, scenario_shipments=False)
+    headers.update(_cache_headers(_etag(snapshot.key, representation)))
+    shipment_version = snapshot.key[1]
+
+    def rows() -> Iterator[tuple[object, ...]]:
+        yield from _summary_rows(snapshot)
+        if not detail:
+            return
+        try:
+            yield from _detail_rows(
+                _pinned_shipments(workspace_id, shipment_version),
+                snapshot.scenario.alternative_mode if snapshot.scenario else None,
+            )
+        except _ShipmentsChanged:
+            yield ("report", "detail_truncated", "Shipments changed during the export.")
+
+    content: Iterator[str] | Iterator[bytes] = _csv_chunks(rows())
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+        content = _gzip_chunks(content)
+    return StreamingResponse(content, media_type="text/csv", headers=headers)
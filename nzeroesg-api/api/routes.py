@@ -1,7 +1,10 @@
+import json
 import logging
+from collections.abc import AsyncIterator
 from time import perf_counter
 
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from config import settings
@@ -19,20 +22,103 @@ class ChatResponse(BaseModel):
     processing_time_ms: int
 
 
-@chat_router.post("", response_model=ChatResponse)
-@chat_router.post("/", response_model=ChatResponse, include_in_schema=False)
-async def chat(payload: ChatRequest) -> ChatResponse:
+def warm_assistant() -> None:
+    """Build the shared agent executor before the first chat request arrives."""
+
+    if not settings.assistant_enabled:
+        return
+    try:
+        from agent import get_agent
+
+        get_agent()
+    except Exception:
+        logger.exception("Assistant warm-up failed; the first chat request will retry.")
+
+
+def _require_enabled() -> None:
     if not settings.assistant_enabled:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="The CarbonSage agent preview is disabled in this environment.",
         )
 
-    started_at = perf_counter()
+
+def _structured_question(message: str):
+    from agent.fast_path import structured_question
+
+    return structured_question(message)
+
+
+def _fast_path_reply(question) -> str | None:
+    """Answer fully specified calculate or compare questions without the model."""
+
+    if question is None:
+        return None
+    from agent.fast_path import answer_question
+
     try:
-        from agent import build_agent
+        return answer_question(question)
+    except ValueError:
+        return None
 
-        agent = await build_agent()
+
+def _reply_cache_key(question) -> str | None:
+    if question is None or not settings.assistant_reply_cache:
+        return None
+    from agent.response_cache import question_cache_key
+
+    return question_cache_key(question)
+
+
+def _cached_reply(key: str | None) -> str | None:
+    if key is None:
+        return None
+    from agent.response_cache import reply_cache
+
+    return reply_cache().get(key)
+
+
+def _remember_reply(key: str | None, result: object) -> None:
+    reply = result.get("output") if isinstance(result, dict) else None
+    if key is None or not isinstance(reply, str) or not reply:
+        return
+    from agent.response_cache import reply_cache
+
+    reply_cache().put(key, reply)
+
+
+def _require_assistant():
+    try:
+        from agent import get_agent
+
+        return get_agent()
+    except RuntimeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+        ) from exc
+
+
+def _reply_text(result: object) -> str:
+    reply = result.get("output", "") if isinstance(result, dict) else str(result)
+    return reply or "The assistant did not return a response."
+
+
+@chat_router.post("", response_model=ChatResponse)
+@chat_router.post("/", response_model=ChatResponse, include_in_schema=False)
+async def chat(payload: ChatRequest) -> ChatResponse:
+    started_at = perf_counter()
+    _require_enabled()
+    question = _structured_question(payload.message)
+    cache_key = _reply_cache_key(question)
+    reply = _fast_path_reply(question) or _cached_reply(cache_key)
+    if reply is not None:
+        return ChatResponse(
+            reply=reply,
+            processing_time_ms=round((perf_counter() - started_at) * 1_000),
+        )
+    agent = _require_assistant()
+    try:
         result = await agent.ainvoke({"input": payload.message, "chat_history": []})
     except RuntimeError as exc:
         raise HTTPException(
@@ -46,13 +132,102 @@ async def chat(payload: ChatRequest) -> ChatResponse:
             detail="The assistant provider is temporarily unavailable.",
         ) from exc
 
-    reply = result.get("output", "") if isinstance(result, dict) else str(result)
+    _remember_reply(cache_key, result)
     return ChatResponse(
-        reply=reply or "The assistant did not return a response.",
+        reply=_reply_text(result),
         processing_time_ms=round((perf_counter() - started_at) * 1_000),
     )
 
 
+def _sse(event: str, data: dict[str, object]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _answered_events(reply: str, started_at: float) -> AsyncIterator[str]:
+    yield _sse("token", {"text": reply})
+    yield _sse(
+        "done",
+        {"reply": reply, "processing_time_ms": round((perf_counter() - started_at) * 1_000)},
+    )
+
+
+async def _chat_events(
+    agent,
+    message: str,
+    started_at: float,
+    cache_key: str | None = None,
+) -> AsyncIterator[str]:
+    from agent.streaming import FinalAnswerStream
+
+    answer = FinalAnswerStream()
+    reply: object = None
+    try:
+        async for event in agent.astream_events(
+            {"input": message, "chat_history": []},
+            version="v2",
+        ):
+            kind = event["event"]
+            data = event.get("data", {})
+            if kind == "on_chat_model_stream":
+                content = getattr(data.get("chunk"), "content", "")
+                text = answer.feed(event["run_id"], content) if isinstance(content, str) else ""
+                if text:
+                    yield _sse("token", {"text": text})
+            elif kind == "on_tool_start":
+                yield _sse("tool_start", {"tool": event["name"], "input": data.get("input")})
+            elif kind == "on_tool_end":
+                output = data.get("output")
+                yield _sse(
+                    "tool_end",
+                    {"tool": event["name"], "output": getattr(output, "content", output)},
+                )
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                reply = data.get("output")
+    except Exception:
+        logger.exception("Streaming assistant request failed")
+        yield _sse("error", {"detail": "The assistant provider is temporarily unavailable."})
+        return
+
+    _remember_reply(cache_key, reply)
+    yield _sse(
+        "done",
+        {
+            "reply": _reply_text(reply),
+            "processing_time_ms": round((perf_counter() - started_at) * 1_000),
+        },
+    )
+
+
+@chat_router.post("/stream")
+async def chat_stream(payload: ChatRequest) -> StreamingResponse:
+    """Stream model tokens and tool activity as server-sent events.
+
+    Events are ``token``, ``tool_start``, and ``tool_end`` while the agent
+    runs, where tokens carry only the text of the agent's final answer, never
+    its reasoning or tool-selection JSON, then one ``done`` event with the
+    reply and ``processing_time_ms``,
+    or an ``error`` event if the provider fails mid-stream. Questions the
+    deterministic fast path or the reply cache answers arrive as a single
+    ``token`` and ``done``.
+    """
+
+    started_at = perf_counter()
+    _require_enabled()
+    question = _structured_question(payload.message)
+    cache_key = _reply_cache_key(question)
+    reply = _fast_path_reply(question) or _cached_reply(cache_key)
+    events = (
+        _answered_events(reply, started_at)
+        if reply is not None
+        else _chat_events(_require_assistant(), payload.message, started_at, cache_key)
+    )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @chat_router.get("/health")
 async def health_check():
     return {"status": "ok", "assistant_enabled": settings.assistant_enabled}
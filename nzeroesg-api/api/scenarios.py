@@ -3,11 +3,18 @@
 from typing import Annotated, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from api.shipments import shipment_repository
+from api.shipments import workspace_shipment_table, workspace_shipments
 from api.workspaces import require_workspace_session, workspace_repository
-from domain.scenarios.comparison import compare_shipment_modes
+from domain.scenarios.comparison import ScenarioComparison, compare_shipment_modes
+from domain.scenarios.sweep import (
+    MAX_SWEEP_SCENARIOS,
+    ScenarioSpec,
+    ScenarioSweep,
+    sweep_shipment_scenarios,
+)
+from domain.shipments.columnar import compare_shipment_table, sweep_shipment_table
 from domain.workspaces.sessions import WorkspaceSession
 from persistence.workspaces import QuotaExceededError, WorkspaceNotFoundError
 
@@ -35,6 +42,73 @@ class ScenarioResponse(BaseModel):
     assumptions: list[str]
 
 
+class SweepScenarioRequest(BaseModel):
+    alternative_transport_method: ScenarioMode
+    shift_percent: float = Field(default=100, gt=0, le=100)
+    min_distance_km: float | None = Field(default=None, ge=0)
+    min_weight_kg: float | None = Field(default=None, ge=0)
+
+
+class SweepRequest(BaseModel):
+    scenarios: list[SweepScenarioRequest] = Field(
+        default_factory=list,
+        max_length=MAX_SWEEP_SCENARIOS,
+        description="Leave empty to shift every shipment to each supported mode.",
+    )
+
+
+class SweepResponse(BaseModel):
+    shipment_count: int
+    baseline_total_kg: float
+    baseline_by_mode: dict[str, float]
+    results: list[dict[str, object]]
+    factor_source: str
+    factor_version: str
+    assumptions: list[str]
+
+
+def compare_workspace_modes(
+    workspace_id: str,
+    *,
+    alternative_mode: str,
+    include_shipments: bool = True,
+) -> ScenarioComparison:
+    table = workspace_shipment_table(workspace_id)
+    if table is not None:
+        return compare_shipment_table(
+            table,
+            alternative_mode=alternative_mode,
+            include_shipments=include_shipments,
+        )
+    return compare_shipment_modes(
+        workspace_shipments(workspace_id),
+        alternative_mode=alternative_mode,
+        include_shipments=include_shipments,
+    )
+
+
+def compare_shipment_data(
+    data: object,
+    *,
+    alternative_mode: str,
+    include_shipments: bool = True,
+) -> ScenarioComparison:
+    """Compare rows or an Arrow table returned by ``workspace_shipment_data``."""
+
+    compare = compare_shipment_modes if isinstance(data, tuple) else compare_shipment_table
+    return compare(data, alternative_mode=alternative_mode, include_shipments=include_shipments)
+
+
+def sweep_workspace_scenarios(
+    workspace_id: str,
+    scenarios: tuple[ScenarioSpec, ...],
+) -> ScenarioSweep:
+    table = workspace_shipment_table(workspace_id)
+    if table is not None:
+        return sweep_shipment_table(table, scenarios)
+    return sweep_shipment_scenarios(workspace_shipments(workspace_id), scenarios)
+
+
 def _consume_analysis_run(workspace_id: str) -> None:
     try:
         workspace_repository.consume_quota(workspace_id, "analysis_runs_per_day")
@@ -55,10 +129,9 @@ async def compare_scenario(
     payload: ScenarioRequest,
     workspace: Annotated[WorkspaceSession, Depends(require_workspace_session)],
 ) -> ScenarioResponse:
-    shipments = shipment_repository.list_for_workspace(workspace.workspace_id)
     try:
-        comparison = compare_shipment_modes(
-            shipments,
+        comparison = compare_workspace_modes(
+            workspace.workspace_id,
             alternative_mode=payload.alternative_transport_method,
         )
     except ValueError as exc:
@@ -68,3 +141,30 @@ async def compare_scenario(
         ) from exc
     _consume_analysis_run(workspace.workspace_id)
     return ScenarioResponse.model_validate(comparison.to_dict())
+
+
+@scenarios_router.post("/sweep", response_model=SweepResponse)
+async def sweep_scenarios(
+    payload: SweepRequest,
+    workspace: Annotated[WorkspaceSession, Depends(require_workspace_session)],
+) -> SweepResponse:
+    """Rank many modal-shift scenarios for one analysis run."""
+
+    try:
+        scenarios = tuple(
+            ScenarioSpec(
+                alternative_mode=scenario.alternative_transport_method,
+                shift_share=scenario.shift_percent / 100,
+                min_distance_km=scenario.min_distance_km,
+                min_weight_kg=scenario.min_weight_kg,
+            )
+            for scenario in payload.scenarios
+        )
+        sweep = sweep_workspace_scenarios(workspace.workspace_id, scenarios)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc),
+        ) from exc
+    _consume_analysis_run(workspace.workspace_id)
+    return SweepResponse.model_validate(sweep.to_dict())
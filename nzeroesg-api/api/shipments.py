@@ -1,25 +1,38 @@
 """Typed HTTP boundary for bounded shipment CSV ingestion."""
 
+import json
+from collections.abc import Iterator
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from api.workspaces import require_workspace_session, workspace_repository
-from config import database_url_for_runtime
+from config import database_url_for_runtime, settings
 from domain.shipments.analysis import ShipmentAnalysis, analyze_shipments
+from domain.shipments.columnar import analyze_shipment_table
 from domain.shipments.ingestion import (
     ALLOWED_CONTENT_TYPES,
     MAX_FILE_BYTES,
     parse_shipments_csv,
 )
+from domain.shipments.lanes import TOP_LANE_LIMIT, lane_scenario_deltas
 from domain.shipments.models import NormalizedShipment
 from domain.workspaces.sessions import WorkspaceSession
-from persistence.shipments import build_shipment_repository
+from persistence.shipments import (
+    ColumnarShipmentRepository,
+    ShipmentCursor,
+    build_shipment_repository,
+)
 from persistence.workspaces import QuotaExceededError, WorkspaceNotFoundError
 
 shipments_router = APIRouter(prefix="/shipments", tags=["shipments"])
-shipment_repository = build_shipment_repository(database_url_for_runtime())
+shipment_repository = build_shipment_repository(
+    database_url_for_runtime(),
+    store=settings.shipment_store,
+    snapshot_dir=settings.shipment_snapshot_dir,
+)
 
 
 class ShipmentErrorResponse(BaseModel):
@@ -74,6 +87,56 @@ class ShipmentUploadResponse(BaseModel):
     analysis: ShipmentAnalysisResponse
 
 
+class LaneResponse(BaseModel):
+    origin: str
+    destination: str
+    transport_method: str
+    shipment_count: int
+    weight_kg: float
+    tonne_km: float
+    emissions_kg: float
+
+
+class LaneDeltaResponse(LaneResponse):
+    alternative_mode: str
+    alternative_emissions_kg: float
+    delta_kg: float
+
+
+class LaneListResponse(BaseModel):
+    lanes: list[LaneResponse]
+    scenario_deltas: list[LaneDeltaResponse] | None = None
+
+
+def workspace_shipments(workspace_id: str) -> Iterator[NormalizedShipment]:
+    return (shipment for _, shipment in shipment_repository.iter_for_workspace(workspace_id))
+
+
+def workspace_shipment_table(workspace_id: str):
+    """Return the Arrow table for the workspace when the columnar store is enabled."""
+
+    if isinstance(shipment_repository, ColumnarShipmentRepository):
+        return shipment_repository.shipment_table(workspace_id)
+    return None
+
+
+def workspace_shipment_data(workspace_id: str) -> tuple[int, object]:
+    """Return the shipment data version with the rows, or Arrow table, it describes."""
+
+    if isinstance(shipment_repository, ColumnarShipmentRepository):
+        return shipment_repository.versioned_table(workspace_id)
+    snapshot = shipment_repository.snapshot(workspace_id)
+    return snapshot.version, snapshot.shipments
+
+
+def analyze_shipment_data(data: object) -> ShipmentAnalysis:
+    """Analyze rows or an Arrow table returned by :func:`workspace_shipment_data`."""
+
+    if isinstance(data, tuple):
+        return analyze_shipments(data)
+    return analyze_shipment_table(data)
+
+
 def _analysis_response(analysis: ShipmentAnalysis) -> ShipmentAnalysisResponse:
     return ShipmentAnalysisResponse.model_validate(analysis.to_dict())
 
@@ -151,3 +214,62 @@ async def list_shipments(
 ) -> ShipmentUploadResponse:
     rows = shipment_repository.list_for_workspace(workspace.workspace_id)
     return _response(rows)
+
+
+@shipments_router.get("/rows")
+async def stream_shipment_rows(
+    workspace: Annotated[WorkspaceSession, Depends(require_workspace_session)],
+    after: Annotated[str | None, Query(description="Cursor of the last row already read")] = None,
+    limit: Annotated[int | None, Query(ge=1)] = None,
+) -> StreamingResponse:
+    """Stream stored rows as NDJSON in keyset order without building the full listing."""
+
+    try:
+        position = ShipmentCursor.decode(after) if after else None
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc),
+        ) from exc
+    rows = shipment_repository.iter_for_workspace(
+        workspace.workspace_id,
+        after=position,
+        limit=limit,
+    )
+    return StreamingResponse(_ndjson_rows(rows), media_type="application/x-ndjson")
+
+
+def _ndjson_rows(rows: Iterator[tuple[ShipmentCursor, NormalizedShipment]]) -> Iterator[str]:
+    for cursor, shipment in rows:
+        yield json.dumps({**shipment.to_dict(), "cursor": cursor.encode()}) + "\n"
+
+
+@shipments_router.get("/lanes", response_model=LaneListResponse)
+async def list_shipment_lanes(
+    workspace: Annotated[WorkspaceSession, Depends(require_workspace_session)],
+    limit: Annotated[int, Query(ge=1, le=500)] = TOP_LANE_LIMIT,
+    alternative_mode: Annotated[str | None, Query(max_length=30)] = None,
+) -> LaneListResponse:
+    """Return top lanes, and optionally the lanes that gain most from a mode shift."""
+
+    lanes = shipment_repository.list_lanes(
+        workspace.workspace_id,
+        limit=None if alternative_mode else limit,
+    )
+    deltas = None
+    if alternative_mode:
+        try:
+            deltas = lane_scenario_deltas(lanes, alternative_mode=alternative_mode, limit=limit)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(exc),
+            ) from exc
+    return LaneListResponse(
+        lanes=[LaneResponse.model_validate(lane.to_dict()) for lane in lanes[:limit]],
+        scenario_deltas=(
+            None
+            if deltas is None
+            else [LaneDeltaResponse.model_validate(delta.to_dict()) for delta in deltas]
+        ),
+    )
@@ -14,7 +14,12 @@ _signer = SessionSigner(
     settings.demo_session_secret,
     ttl_seconds=settings.demo_workspace_ttl_hours * 60 * 60,
 )
-workspace_repository = build_workspace_repository(database_url_for_runtime())
+workspace_repository = build_workspace_repository(
+    database_url_for_runtime(),
+    quota_accounting=settings.quota_accounting,
+    flush_interval_seconds=settings.quota_flush_interval_seconds,
+    max_unflushed=settings.quota_max_unflushed,
+)
 
 
 class WorkspaceSessionResponse(BaseModel):
@@ -67,7 +72,12 @@ async def require_workspace_session(
     status_code=status.HTTP_201_CREATED,
 )
 async def create_demo_session(response: Response) -> WorkspaceSessionResponse:
-    workspace_repository.purge_expired()
+    expired = workspace_repository.purge_expired()
+    if expired:
+        # Imported here: the shipments API depends on this module.
+        from api.shipments import shipment_repository
+
+        shipment_repository.purge_workspaces(expired)
     session, token = _signer.issue()
     workspace_repository.create(session)
     _set_session_cookie(response, token)
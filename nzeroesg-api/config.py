@@ -31,6 +31,10 @@ def _demo_session_secret() -> str:
 class Settings:
     environment: str = os.getenv("APP_ENV", "development")
     assistant_enabled: bool = _as_bool(os.getenv("ASSISTANT_ENABLED"))
+    assistant_reply_cache: bool = _as_bool(os.getenv("ASSISTANT_REPLY_CACHE"), default=True)
+    assistant_reply_cache_ttl_seconds: float = float(
+        os.getenv("ASSISTANT_REPLY_CACHE_TTL_SECONDS", "900")
+    )
     demo_session_secret: str = _demo_session_secret()
     demo_workspace_ttl_hours: int = int(os.getenv("DEMO_WORKSPACE_TTL_HOURS", "24"))
     database_url: str | None = os.getenv("DATABASE_URL") or None
@@ -44,7 +48,17 @@ class Settings:
     embedding_provider: str = os.getenv("EMBEDDING_PROVIDER", "").strip().lower()
     embedding_model: str | None = os.getenv("EMBEDDING_MODEL") or None
     embedding_dimensions: int = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+    embedding_storage: str = os.getenv("EMBEDDING_STORAGE", "full").strip().lower()
+    quota_accounting: str = os.getenv("QUOTA_ACCOUNTING", "direct").strip().lower()
+    quota_flush_interval_seconds: float = float(os.getenv("QUOTA_FLUSH_INTERVAL_SECONDS", "2"))
+    quota_max_unflushed: int = int(os.getenv("QUOTA_MAX_UNFLUSHED", "5"))
+    shipment_store: str = os.getenv("SHIPMENT_STORE", "rows").strip().lower()
+    shipment_snapshot_dir: str | None = os.getenv("SHIPMENT_SNAPSHOT_DIR") or None
+    geocoder: str = os.getenv("GEOCODER", "nominatim").strip().lower()
     carbon_interface_api_key: str | None = os.getenv("CARBON_INTERFACE_API_KEY")
+    provider_latency_budget_seconds: float = float(
+        os.getenv("PROVIDER_LATENCY_BUDGET_SECONDS", "2")
+    )
     cors_origins: tuple[str, ...] = _as_csv(
         os.getenv("CORS_ORIGINS"),
         default=("http://localhost:3000", "http://127.0.0.1:3000"),
@@ -1,22 +1,33 @@
 """Deterministic freight-emissions calculation primitives."""
 
+from domain.emissions.bulk_distance import (
+    StraightLineMethod,
+    bulk_distances_km,
+    geodesic_lane_km,
+)
 from domain.emissions.calculator import (
+    CalculationCacheStats,
     CalculationResult,
     ComparisonResult,
     calculate_emissions,
+    calculation_cache_stats,
+    clear_calculation_cache,
     compare_emissions,
 )
 from domain.emissions.distance import Distance, DistanceMethod
-from domain.emissions.factors import EmissionFactor, factor_for
-from domain.emissions.modes import FreightMode, normalize_mode
+from domain.emissions.factors import EmissionFactor, catalog_version, factor_for
+from domain.emissions.modes import FreightMode, normalize_mode, normalize_modes
 from domain.emissions.units import (
     DistanceUnit,
     WeightUnit,
     normalize_distance_km,
+    normalize_distances_km,
     normalize_weight_kg,
+    normalize_weights_kg,
 )
 
 __all__ = [
+    "CalculationCacheStats",
     "CalculationResult",
     "ComparisonResult",
     "Distance",
@@ -24,11 +35,20 @@ __all__ = [
     "DistanceUnit",
     "EmissionFactor",
     "FreightMode",
+    "StraightLineMethod",
     "WeightUnit",
+    "bulk_distances_km",
     "calculate_emissions",
+    "calculation_cache_stats",
+    "catalog_version",
+    "clear_calculation_cache",
     "compare_emissions",
     "factor_for",
+    "geodesic_lane_km",
     "normalize_distance_km",
+    "normalize_distances_km",
     "normalize_mode",
+    "normalize_modes",
     "normalize_weight_kg",
+    "normalize_weights_kg",
 ]
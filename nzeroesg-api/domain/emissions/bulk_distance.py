@@ -0,0 +1,128 @@
+"""Straight-line distances for many lanes in one call.
+
+Coordinates arrive as parallel origin and destination columns. Repeated lanes
+are collapsed first, so an upload pays for each distinct lane once. Both
+methods are memoized per lane across calls; haversine distances for the lanes
+not seen before are evaluated as one Arrow compute expression when pyarrow is
+installed, and with a plain loop otherwise.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from enum import Enum
+from functools import lru_cache
+
+from geopy.distance import geodesic
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - exercised only before optional local setup
+    pa = None
+    pc = None
+
+EARTH_RADIUS_KM = 6_371.0088
+LANE_CACHE_SIZE = 16_384
+
+Coordinates = tuple[float, float]
+_Lane = tuple[Coordinates, Coordinates]
+
+
+class StraightLineMethod(str, Enum):
+    HAVERSINE = "haversine"
+    GEODESIC = "geodesic"
+
+
+@lru_cache(maxsize=LANE_CACHE_SIZE)
+def geodesic_lane_km(origin: Coordinates, destination: Coordinates) -> float:
+    """Ellipsoidal (WGS-84) distance for one lane, memoized by coordinates."""
+
+    return geodesic(origin, destination).km
+
+
+def _haversine_arrow(lanes: Sequence[_Lane]) -> list[float]:
+    to_radians = math.pi / 180
+
+    def column(values) -> pa.Array:
+        return pc.multiply(pa.array(values, pa.float64()), to_radians)
+
+    origin_lat = column([origin[0] for origin, _ in lanes])
+    origin_lon = column([origin[1] for origin, _ in lanes])
+    destination_lat = column([destination[0] for _, destination in lanes])
+    destination_lon = column([destination[1] for _, destination in lanes])
+    half_lat = pc.sin(pc.divide(pc.subtract(destination_lat, origin_lat), 2))
+    half_lon = pc.sin(pc.divide(pc.subtract(destination_lon, origin_lon), 2))
+    chord = pc.add(
+        pc.multiply(half_lat, half_lat),
+        pc.multiply(
+            pc.multiply(pc.cos(origin_lat), pc.cos(destination_lat)),
+            pc.multiply(half_lon, half_lon),
+        ),
+    )
+    angle = pc.asin(pc.sqrt(pc.min_element_wise(chord, 1.0)))
+    return pc.multiply(angle, 2 * EARTH_RADIUS_KM).to_pylist()
+
+
+def _haversine_loop(lanes: Sequence[_Lane]) -> list[float]:
+    distances = []
+    for (origin_lat, origin_lon), (destination_lat, destination_lon) in lanes:
+        phi1 = math.radians(origin_lat)
+        phi2 = math.radians(destination_lat)
+        half_lat = math.sin((phi2 - phi1) / 2)
+        half_lon = math.sin(math.radians(destination_lon - origin_lon) / 2)
+        chord = half_lat * half_lat + math.cos(phi1) * math.cos(phi2) * half_lon * half_lon
+        distances.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(chord, 1.0))))
+    return distances
+
+
+_haversine_lanes: OrderedDict[_Lane, float] = OrderedDict()
+_haversine_lock = threading.Lock()
+
+
+def _haversine_km(lanes: Sequence[_Lane]) -> list[float]:
+    """Haversine distances for distinct lanes, computing only lanes not memoized yet."""
+
+    with _haversine_lock:
+        known = [_haversine_lanes.get(lane) for lane in lanes]
+        for lane, km in zip(lanes, known, strict=True):
+            if km is not None:
+                _haversine_lanes.move_to_end(lane)
+    missing = [lane for lane, km in zip(lanes, known, strict=True) if km is None]
+    if not missing:
+        return known
+    values = _haversine_arrow(missing) if pc is not None else _haversine_loop(missing)
+    computed = dict(zip(missing, values, strict=True))
+    with _haversine_lock:
+        _haversine_lanes.update(computed)
+        while len(_haversine_lanes) > LANE_CACHE_SIZE:
+            _haversine_lanes.popitem(last=False)
+    return [computed[lane] if km is None else km for lane, km in zip(lanes, known, strict=True)]
+
+
+def bulk_distances_km(
+    origins: Sequence[Coordinates],
+    destinations: Sequence[Coordinates],
+    *,
+    method: str | StraightLineMethod = StraightLineMethod.HAVERSINE,
+) -> array:
+    """Return one straight-line distance in kilometres per origin/destination pair."""
+
+    if len(origins) != len(destinations):
+        raise ValueError("Origins and destinations must have the same length.")
+    method = StraightLineMethod(method)
+    lanes: dict[_Lane, int] = {}
+    positions = [
+        lanes.setdefault((tuple(origin), tuple(destination)), len(lanes))
+        for origin, destination in zip(origins, destinations, strict=True)
+    ]
+    unique = list(lanes)
+    if method is StraightLineMethod.GEODESIC:
+        values = [geodesic_lane_km(origin, destination) for origin, destination in unique]
+    else:
+        values = _haversine_km(unique)
+    return array("d", (round(values[position], 6) for position in positions))
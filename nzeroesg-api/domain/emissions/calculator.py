@@ -2,6 +2,7 @@
 
 from collections.abc import Sequence
 from dataclasses import dataclass
+from functools import lru_cache
 
 from domain.emissions.distance import (
     Distance,
@@ -9,12 +10,19 @@ from domain.emissions.distance import (
     route_distance,
     straight_line_distance,
 )
-from domain.emissions.factors import EmissionFactor, factor_for
+from domain.emissions.factors import EmissionFactor, catalog_version, factor_for
 from domain.emissions.modes import FreightMode, normalize_mode
-from domain.emissions.units import DistanceUnit, WeightUnit, normalize_weight_kg
+from domain.emissions.units import (
+    DistanceUnit,
+    WeightUnit,
+    normalize_distance_km,
+    normalize_weight_kg,
+)
 
+CALCULATION_CACHE_SIZE = 8_192
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class CalculationResult:
     """Stable calculation output with formula and provenance."""
 
@@ -91,6 +99,70 @@ def _normalize_distance_method(
         raise ValueError(f"Unsupported distance method: {method}") from exc
 
 
+@dataclass(frozen=True)
+class CalculationCacheStats:
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+
+    @property
+    def hit_rate(self) -> float | None:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else None
+
+    def to_dict(self) -> dict[str, int | float | None]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "size": self.size,
+            "max_size": self.max_size,
+        }
+
+
+@lru_cache(maxsize=CALCULATION_CACHE_SIZE)
+def _calculate(
+    mode: FreightMode,
+    weight_kg: float,
+    distance_km: float,
+    distance_method: DistanceMethod,
+    origin: str | None,
+    destination: str | None,
+    factor_catalog_version: str,
+) -> CalculationResult:
+    # ``factor_catalog_version`` is only part of the key: a new factor schedule
+    # never reuses results priced with the previous one.
+    if distance_method is DistanceMethod.STRAIGHT_LINE:
+        distance = straight_line_distance(distance_km, origin=origin, destination=destination)
+    else:
+        distance = route_distance(distance_km, origin=origin, destination=destination)
+    factor = factor_for(mode)
+    emissions_kg = (weight_kg / 1_000) * distance.km * factor.value
+    return CalculationResult(
+        mode=mode,
+        emissions_kg=round(emissions_kg, 6),
+        weight_kg=weight_kg,
+        distance=distance,
+        factor=factor,
+        warnings=distance.warnings,
+    )
+
+
+def calculation_cache_stats() -> CalculationCacheStats:
+    info = _calculate.cache_info()
+    return CalculationCacheStats(
+        hits=info.hits,
+        misses=info.misses,
+        size=info.currsize,
+        max_size=info.maxsize or 0,
+    )
+
+
+def clear_calculation_cache() -> None:
+    _calculate.cache_clear()
+
+
 def calculate_emissions(
     *,
     weight_value: float,
@@ -102,36 +174,19 @@ def calculate_emissions(
     origin: str | None = None,
     destination: str | None = None,
 ) -> CalculationResult:
-    """Calculate emissions without providers, persistence, or network calls."""
-    normalized_mode = normalize_mode(mode)
-    normalized_weight = normalize_weight_kg(weight_value, weight_unit)
-    normalized_distance_method = _normalize_distance_method(distance_method)
-    if normalized_distance_method is DistanceMethod.STRAIGHT_LINE:
-        distance = straight_line_distance(
-            distance_value,
-            distance_unit,
-            origin=origin,
-            destination=destination,
-        )
-    elif normalized_distance_method is DistanceMethod.ROUTE:
-        distance = route_distance(
-            distance_value,
-            distance_unit,
-            origin=origin,
-            destination=destination,
-        )
-    else:
-        raise ValueError(f"Unsupported distance method: {distance_method}")
-
-    factor = factor_for(normalized_mode)
-    emissions_kg = (normalized_weight / 1_000) * distance.km * factor.value
-    return CalculationResult(
-        mode=normalized_mode,
-        emissions_kg=round(emissions_kg, 6),
-        weight_kg=normalized_weight,
-        distance=distance,
-        factor=factor,
-        warnings=distance.warnings,
+    """Calculate emissions without providers, persistence, or network calls.
+
+    Results are immutable, so identical normalized inputs under the same
+    factor catalog version share one memoized result.
+    """
+    return _calculate(
+        normalize_mode(mode),
+        normalize_weight_kg(weight_value, weight_unit),
+        normalize_distance_km(distance_value, distance_unit),
+        _normalize_distance_method(distance_method),
+        origin,
+        destination,
+        catalog_version(),
     )
 
 
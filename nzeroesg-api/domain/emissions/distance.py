@@ -5,13 +5,17 @@ from enum import Enum
 
 from domain.emissions.units import DistanceUnit, normalize_distance_km
 
+STRAIGHT_LINE_WARNING = (
+    "Straight-line fallback distance; mode-specific route distance was not provided."
+)
+
 
 class DistanceMethod(str, Enum):
     ROUTE = "route"
     STRAIGHT_LINE = "straight_line"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Distance:
     """A normalized distance and the method used to obtain it."""
 
@@ -44,11 +48,7 @@ def _distance(
         method=method,
         origin=origin,
         destination=destination,
-        warnings=(
-            "Straight-line fallback distance; mode-specific route distance was not provided.",
-        )
-        if method is DistanceMethod.STRAIGHT_LINE
-        else (),
+        warnings=(STRAIGHT_LINE_WARNING,) if method is DistanceMethod.STRAIGHT_LINE else (),
     )
 
 
@@ -87,6 +87,14 @@ FACTOR_CATALOG: tuple[EmissionFactor, ...] = (
 )
 
 
+_CATALOG_VERSION = "+".join(sorted({factor.version for factor in FACTOR_CATALOG}))
+
+
+def catalog_version() -> str:
+    """Identify the factor schedule so derived results can be cached against it."""
+    return _CATALOG_VERSION
+
+
 def factor_for(
     mode: str | FreightMode,
     *,
@@ -1,6 +1,10 @@
 """Supported freight modes and input normalization."""
 
+from collections.abc import Iterable
 from enum import Enum
+from functools import lru_cache
+
+MODE_CACHE_SIZE = 256
 
 
 class FreightMode(str, Enum):
@@ -28,13 +32,43 @@ _MODE_ALIASES: dict[str, FreightMode] = {
 }
 
 
-def normalize_mode(mode: str | FreightMode) -> FreightMode:
-    """Return the canonical mode for a supported user-facing alias."""
-    if isinstance(mode, FreightMode):
-        return mode
-
+@lru_cache(maxsize=MODE_CACHE_SIZE)
+def _parse_mode(mode: str) -> FreightMode:
     normalized = " ".join(mode.strip().lower().split())
     try:
         return _MODE_ALIASES[normalized]
     except KeyError as exc:
         raise ValueError(f"Unsupported transport mode: {mode}") from exc
+
+
+def normalize_mode(mode: str | FreightMode) -> FreightMode:
+    """Return the canonical mode for a supported user-facing alias.
+
+    Canonical aliases resolve with one lookup; other spellings are cleaned
+    once and memoized, since uploads repeat the same few values per row.
+    """
+    if isinstance(mode, FreightMode):
+        return mode
+    if not isinstance(mode, str):
+        raise ValueError(f"Unsupported transport mode: {mode}")
+    return _MODE_ALIASES.get(mode) or _parse_mode(mode)
+
+
+def normalize_modes(modes: Iterable[str | FreightMode]) -> tuple[FreightMode | None, ...]:
+    """Normalize a column of modes, resolving each distinct spelling once.
+
+    Unsupported modes are ``None`` so callers can report each invalid row.
+    """
+    resolved: dict[str | FreightMode, FreightMode | None] = {}
+    normalized: list[FreightMode | None] = []
+    for mode in modes:
+        if mode in resolved:
+            normalized.append(resolved[mode])
+            continue
+        try:
+            canonical = normalize_mode(mode)
+        except ValueError:
+            canonical = None
+        resolved[mode] = canonical
+        normalized.append(canonical)
+    return tuple(normalized)
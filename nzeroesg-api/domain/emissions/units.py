@@ -1,7 +1,12 @@
 """Unit types and deterministic normalization helpers."""
 
 import math
+from array import array
+from collections.abc import Iterable
 from enum import Enum
+from functools import lru_cache
+
+UNIT_CACHE_SIZE = 256
 
 
 class WeightUnit(str, Enum):
@@ -17,6 +22,24 @@ class DistanceUnit(str, Enum):
     MILE = "mi"
 
 
+# Keyed by the canonical unit string. ``str`` enum members hash and compare
+# like their values, so enum and already-canonical string inputs resolve with
+# one dictionary lookup.
+_KG_PER_WEIGHT_UNIT: dict[str, float] = {
+    WeightUnit.GRAM.value: 0.001,
+    WeightUnit.KILOGRAM.value: 1.0,
+    WeightUnit.POUND.value: 0.453592,
+    WeightUnit.METRIC_TONNE.value: 1_000.0,
+}
+_KM_PER_DISTANCE_UNIT: dict[str, float] = {
+    DistanceUnit.METER.value: 0.001,
+    DistanceUnit.KILOMETER.value: 1.0,
+    DistanceUnit.MILE.value: 1.60934,
+}
+_WEIGHT_UNITS: dict[str, WeightUnit] = {unit.value: unit for unit in WeightUnit}
+_DISTANCE_UNITS: dict[str, DistanceUnit] = {unit.value: unit for unit in DistanceUnit}
+
+
 def _positive_finite(value: float, label: str) -> float:
     try:
         normalized = float(value)
@@ -28,42 +51,97 @@ def _positive_finite(value: float, label: str) -> float:
     return normalized
 
 
-def _weight_unit(unit: str | WeightUnit) -> WeightUnit:
-    if isinstance(unit, WeightUnit):
-        return unit
+@lru_cache(maxsize=UNIT_CACHE_SIZE)
+def _parse_weight_unit(unit: str) -> WeightUnit:
     try:
-        return WeightUnit(unit.strip().lower())
-    except (AttributeError, ValueError) as exc:
+        return _WEIGHT_UNITS[unit.strip().lower()]
+    except KeyError as exc:
         raise ValueError(f"Unsupported weight unit: {unit}") from exc
 
 
-def _distance_unit(unit: str | DistanceUnit) -> DistanceUnit:
-    if isinstance(unit, DistanceUnit):
-        return unit
+@lru_cache(maxsize=UNIT_CACHE_SIZE)
+def _parse_distance_unit(unit: str) -> DistanceUnit:
     try:
-        return DistanceUnit(unit.strip().lower())
-    except (AttributeError, ValueError) as exc:
+        return _DISTANCE_UNITS[unit.strip().lower()]
+    except KeyError as exc:
         raise ValueError(f"Unsupported distance unit: {unit}") from exc
 
 
+def _weight_unit(unit: str | WeightUnit) -> WeightUnit:
+    if not isinstance(unit, str):
+        raise ValueError(f"Unsupported weight unit: {unit}")
+    return _WEIGHT_UNITS.get(unit) or _parse_weight_unit(unit)
+
+
+def _distance_unit(unit: str | DistanceUnit) -> DistanceUnit:
+    if not isinstance(unit, str):
+        raise ValueError(f"Unsupported distance unit: {unit}")
+    return _DISTANCE_UNITS.get(unit) or _parse_distance_unit(unit)
+
+
 def normalize_weight_kg(value: float, unit: str | WeightUnit) -> float:
     """Normalize a positive weight to kilograms."""
-    conversions = {
-        WeightUnit.GRAM: 0.001,
-        WeightUnit.KILOGRAM: 1.0,
-        WeightUnit.POUND: 0.453592,
-        WeightUnit.METRIC_TONNE: 1_000.0,
-    }
     normalized = _positive_finite(value, "Weight")
-    return round(normalized * conversions[_weight_unit(unit)], 6)
+    return round(normalized * _KG_PER_WEIGHT_UNIT[_weight_unit(unit)], 6)
 
 
 def normalize_distance_km(value: float, unit: str | DistanceUnit) -> float:
     """Normalize a positive distance to kilometres."""
-    conversions = {
-        DistanceUnit.METER: 0.001,
-        DistanceUnit.KILOMETER: 1.0,
-        DistanceUnit.MILE: 1.60934,
-    }
     normalized = _positive_finite(value, "Distance")
-    return round(normalized * conversions[_distance_unit(unit)], 6)
+    return round(normalized * _KM_PER_DISTANCE_UNIT[_distance_unit(unit)], 6)
+
+
+def _normalize_many(
+    values: Iterable[float | None],
+    units: str | Enum | Iterable[str | Enum],
+    *,
+    factors: dict[str, float],
+    resolve,
+) -> array:
+    def unit_factor(unit: str | Enum) -> float:
+        factor = resolved.get(unit)
+        if factor is None:
+            try:
+                factor = factors[resolve(unit)]
+            except ValueError:
+                factor = math.nan
+            resolved[unit] = factor
+        return factor
+
+    resolved: dict[str | Enum, float] = {}
+    normalized = array("d")
+    if isinstance(units, str):
+        pairs = ((value, units) for value in values)
+    else:
+        pairs = zip(values, units, strict=True)
+    for value, unit in pairs:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = math.nan
+        if not math.isfinite(number) or number <= 0:
+            normalized.append(math.nan)
+            continue
+        normalized.append(round(number * unit_factor(unit), 6))
+    return normalized
+
+
+def normalize_weights_kg(
+    values: Iterable[float | None],
+    units: str | WeightUnit | Iterable[str | WeightUnit],
+) -> array:
+    """Normalize a column of weights to kilograms, resolving each distinct unit once.
+
+    ``units`` is one unit for every value or one unit per value. Entries that
+    are not finite positive numbers, or whose unit is unsupported, are NaN, so
+    callers can report every invalid row instead of stopping at the first.
+    """
+    return _normalize_many(values, units, factors=_KG_PER_WEIGHT_UNIT, resolve=_weight_unit)
+
+
+def normalize_distances_km(
+    values: Iterable[float | None],
+    units: str | DistanceUnit | Iterable[str | DistanceUnit],
+) -> array:
+    """Normalize a column of distances to kilometres like ``normalize_weights_kg``."""
+    return _normalize_many(values, units, factors=_KM_PER_DISTANCE_UNIT, resolve=_distance_unit)
@@ -16,6 +16,7 @@ from domain.evidence.models import (
     SupplierCard,
     SupplierMetadata,
 )
+from domain.evidence.quantization import EmbeddingStorage, PackedVector, pack_vector
 
 __all__ = [
     "EvidenceChunk",
@@ -28,8 +29,11 @@ __all__ = [
     "EmbeddingAdapter",
     "EmbeddingProviderError",
     "EmbeddingSpec",
+    "EmbeddingStorage",
+    "PackedVector",
     "PendingEmbeddingDocument",
     "SupplierCard",
     "SupplierMetadata",
     "extract_evidence",
+    "pack_vector",
 ]
@@ -49,6 +49,33 @@ class RetrievalMetrics:
         }
 
 
+@dataclass(frozen=True)
+class RetrievalImpact:
+    """Metric deltas of a candidate configuration against a baseline run."""
+
+    baseline: RetrievalMetrics
+    candidate: RetrievalMetrics
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "baseline": self.baseline.to_dict(),
+            "candidate": self.candidate.to_dict(),
+            "recall_at_k_delta": round(self.candidate.recall_at_k - self.baseline.recall_at_k, 6),
+            "mean_reciprocal_rank_delta": round(
+                self.candidate.mean_reciprocal_rank - self.baseline.mean_reciprocal_rank,
+                6,
+            ),
+            "citation_coverage_delta": round(
+                self.candidate.citation_coverage - self.baseline.citation_coverage,
+                6,
+            ),
+            "mean_latency_ms_delta": round(
+                self.candidate.mean_latency_ms - self.baseline.mean_latency_ms,
+                3,
+            ),
+        }
+
+
 def evaluate_retrieval(
     cases: tuple[RetrievalEvaluationCase, ...],
     results: tuple[RetrievalEvaluationResult, ...],
@@ -131,3 +158,17 @@ def evaluate_retrieval(
         mean_latency_ms=sum(latencies) / len(latencies),
         provider_cost_usd=provider_cost,
     )
+
+
+def compare_retrieval(
+    cases: tuple[RetrievalEvaluationCase, ...],
+    baseline: tuple[RetrievalEvaluationResult, ...],
+    candidate: tuple[RetrievalEvaluationResult, ...],
+    *,
+    k: int = 5,
+) -> RetrievalImpact:
+    """Grade two captures of the same cases, e.g. full versus quantized storage."""
+    return RetrievalImpact(
+        baseline=evaluate_retrieval(cases, baseline, k=k),
+        candidate=evaluate_retrieval(cases, candidate, k=k),
+    )
@@ -11,7 +11,7 @@ class SupplierMetadata:
     transport_modes: tuple[str, ...]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EvidenceChunk:
     chunk_index: int
     content: str
@@ -51,7 +51,7 @@ class SupplierCard:
         }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EvidenceMatch:
     supplier_name: str
     filename: str
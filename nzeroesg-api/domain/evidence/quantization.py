@@ -0,0 +1,81 @@
+"""Compact embedding storage modes and their in-process vector encodings."""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Sequence
+from dataclasses import dataclass
+from enum import StrEnum
+
+from domain.evidence.embeddings import EmbeddingProviderError
+
+BINARY_RERANK_CANDIDATES = 80
+_PACK_FORMATS = {"full": "f", "half": "e", "binary": "f"}
+
+
+class EmbeddingStorage(StrEnum):
+    """How chunk embeddings are stored and compared.
+
+    ``full`` keeps float32 vectors, ``half`` keeps float16 vectors, and
+    ``binary`` keeps sign bits for candidate selection plus float32 vectors
+    for re-ranking the shortlisted candidates.
+    """
+
+    FULL = "full"
+    HALF = "half"
+    BINARY = "binary"
+
+
+def parse_embedding_storage(value: str | EmbeddingStorage) -> EmbeddingStorage:
+    if isinstance(value, EmbeddingStorage):
+        return value
+    try:
+        return EmbeddingStorage(value.strip().lower() or EmbeddingStorage.FULL.value)
+    except (AttributeError, ValueError) as exc:
+        raise ValueError("EMBEDDING_STORAGE must be 'full', 'half', or 'binary'.") from exc
+
+
+def binary_bits(values: Sequence[float]) -> str:
+    """Return the sign-bit string used by pgvector ``binary_quantize``."""
+
+    return "".join("1" if value > 0 else "0" for value in values)
+
+
+def hamming_distance(left: int, right: int) -> int:
+    return (left ^ right).bit_count()
+
+
+@dataclass(frozen=True)
+class PackedVector:
+    """An embedding packed into contiguous float32 or float16 bytes."""
+
+    storage: EmbeddingStorage
+    dimensions: int
+    data: bytes
+    code: int = 0
+
+    @property
+    def nbytes(self) -> int:
+        code_bytes = self.dimensions // 8 if self.storage is EmbeddingStorage.BINARY else 0
+        return len(self.data) + code_bytes
+
+    def values(self) -> tuple[float, ...]:
+        return struct.unpack(
+            f"<{self.dimensions}{_PACK_FORMATS[self.storage.value]}",
+            self.data,
+        )
+
+
+def pack_vector(values: Sequence[float], storage: EmbeddingStorage) -> PackedVector:
+    try:
+        data = struct.pack(f"<{len(values)}{_PACK_FORMATS[storage.value]}", *values)
+    except (OverflowError, struct.error) as exc:
+        raise EmbeddingProviderError(
+            f"Embedding values cannot be stored with {storage.value} precision."
+        ) from exc
+    return PackedVector(
+        storage=storage,
+        dimensions=len(values),
+        data=data,
+        code=int(binary_bits(values), 2) if storage is EmbeddingStorage.BINARY else 0,
+    )
@@ -0,0 +1,5 @@
+"""Place-name normalization and offline coordinates."""
+
+from domain.places.gazetteer import Place, gazetteer_index, lookup_place, place_key
+
+__all__ = ["Place", "gazetteer_index", "lookup_place", "place_key"]
@@ -0,0 +1,86 @@
+"""Offline place coordinates for distance resolution without a network call.
+
+The bundled gazetteer covers major freight cities, container ports, and cargo
+airports. Each entry is indexed under its name, its aliases (such as IATA
+codes), and its name qualified by region and country, so common spellings of
+a lane resolve with one dictionary lookup.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+GAZETTEER_PATH = Path(__file__).with_name("gazetteer.json")
+
+_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def place_key(value: str) -> str:
+    """Normalize a place name so case, spacing, and comma variants share one key."""
+
+    return _SEPARATORS.sub(" ", value).strip().casefold()
+
+
+@dataclass(frozen=True, slots=True)
+class Place:
+    """Coordinates for a named location and where they came from."""
+
+    name: str
+    latitude: float
+    longitude: float
+    kind: str
+    source: str
+
+    @property
+    def coordinates(self) -> tuple[float, float]:
+        return (self.latitude, self.longitude)
+
+    def to_dict(self) -> dict[str, str | float]:
+        return {
+            "name": self.name,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "kind": self.kind,
+            "source": self.source,
+        }
+
+
+def _entry_keys(entry: dict) -> tuple[str, ...]:
+    name = entry["name"]
+    qualified = [name, *entry.get("aliases", ())]
+    region = entry.get("region")
+    country = entry["country"]
+    if region:
+        qualified += [f"{name} {region}", f"{name} {region} {country}"]
+    qualified.append(f"{name} {country}")
+    return tuple(dict.fromkeys(place_key(value) for value in qualified))
+
+
+@lru_cache(maxsize=1)
+def gazetteer_index() -> dict[str, Place]:
+    """Load the bundled gazetteer once, keyed by every normalized spelling."""
+
+    entries = json.loads(GAZETTEER_PATH.read_text(encoding="utf-8"))
+    index: dict[str, Place] = {}
+    for entry in entries:
+        place = Place(
+            name=entry["name"],
+            latitude=float(entry["latitude"]),
+            longitude=float(entry["longitude"]),
+            kind=entry["kind"],
+            source="gazetteer",
+        )
+        for key in _entry_keys(entry):
+            if index.setdefault(key, place) is not place:
+                raise ValueError(f"Gazetteer key {key!r} is defined more than once.")
+    return index
+
+
+def lookup_place(name: str) -> Place | None:
+    """Return bundled coordinates for a place name, or ``None`` when unknown."""
+
+    return gazetteer_index().get(place_key(name))
@@ -0,0 +1,15 @@
+"""Route distances over bundled road, rail, and sea-lane networks."""
+
+from domain.routing.network import (
+    RouteNetwork,
+    network_route_distance,
+    network_route_distances,
+    route_network,
+)
+
+__all__ = [
+    "RouteNetwork",
+    "network_route_distance",
+    "network_route_distances",
+    "route_network",
+]
@@ -0,0 +1,248 @@
+"""Mode-specific route distances over bundled, simplified transport networks.
+
+Road, rail, and sea-lane graphs are read from JSON edge lists next to this
+module. Each graph is loaded once per process and indexed with a few
+landmarks: exact shortest-path distances from every landmark to every node.
+By the triangle inequality those distances bound the remaining distance from
+below, so point-to-point queries run A* with an admissible heuristic (the ALT
+technique) and settle only part of the graph. Many-to-many queries run one
+Dijkstra search per distinct origin that stops once every requested
+destination is settled. Every answered lane is memoized on the network.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import threading
+from array import array
+from collections.abc import Iterable, Sequence
+from dataclasses import replace
+from functools import cache
+from pathlib import Path
+
+from domain.emissions.distance import Distance, route_distance
+from domain.emissions.modes import FreightMode, normalize_mode
+from domain.places.gazetteer import gazetteer_index, lookup_place
+
+NETWORK_DIR = Path(__file__).parent
+NETWORK_FILES = {
+    FreightMode.TRUCK: "road.json",
+    FreightMode.TRAIN: "rail.json",
+    FreightMode.SHIP: "sea.json",
+}
+ROUTE_LANDMARKS = 8
+
+_Edge = tuple[str, str, float]
+
+
+class RouteNetwork:
+    """An undirected weighted graph between gazetteer places for one mode."""
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        mode: FreightMode,
+        description: str,
+        edges: Iterable[_Edge],
+        landmarks: int = ROUTE_LANDMARKS,
+    ) -> None:
+        self.name = name
+        self.mode = mode
+        self.description = description
+        self._places = {place.name for place in gazetteer_index().values()}
+        self._nodes: dict[str, int] = {}
+        self._adjacency: list[list[tuple[int, float]]] = []
+        for origin, destination, km in edges:
+            if not math.isfinite(km) or km <= 0:
+                raise ValueError(
+                    f"Route edge {origin} - {destination} must have a positive length."
+                )
+            left = self._node_id(origin)
+            right = self._node_id(destination)
+            self._adjacency[left].append((right, float(km)))
+            self._adjacency[right].append((left, float(km)))
+        self._landmarks = self._select_landmarks(landmarks)
+        self._memo: dict[tuple[int, int], float | None] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> RouteNetwork:
+        document = json.loads(path.read_text(encoding="utf-8"))
+        return cls(
+            name=document["network"],
+            mode=normalize_mode(document["mode"]),
+            description=document["description"],
+            edges=(
+                (origin, destination, float(km)) for origin, destination, km in document["edges"]
+            ),
+        )
+
+    def _node_id(self, name: str) -> int:
+        node = self._nodes.get(name)
+        if node is None:
+            if name not in self._places:
+                raise ValueError(f"Route node {name!r} is not a gazetteer place.")
+            node = self._nodes[name] = len(self._adjacency)
+            self._adjacency.append([])
+        return node
+
+    @property
+    def node_names(self) -> tuple[str, ...]:
+        return tuple(self._nodes)
+
+    def node_for(self, place: str) -> int | None:
+        """Map any gazetteer spelling of a place to its node, if it is on this network."""
+
+        resolved = lookup_place(place)
+        return None if resolved is None else self._nodes.get(resolved.name)
+
+    def _dijkstra(self, source: int, targets: set[int] | None = None) -> array:
+        distances = array("d", [math.inf]) * len(self._adjacency)
+        distances[source] = 0.0
+        remaining = None if targets is None else set(targets)
+        queue = [(0.0, source)]
+        while queue:
+            distance, node = heapq.heappop(queue)
+            if distance > distances[node]:
+                continue
+            if remaining is not None:
+                remaining.discard(node)
+                if not remaining:
+                    break
+            for neighbour, km in self._adjacency[node]:
+                candidate = distance + km
+                if candidate < distances[neighbour]:
+                    distances[neighbour] = candidate
+                    heapq.heappush(queue, (candidate, neighbour))
+        return distances
+
+    def _select_landmarks(self, count: int) -> tuple[array, ...]:
+        """Pick landmarks farthest-first, so unreached components are covered first."""
+
+        if not self._adjacency:
+            return ()
+        tables = [self._dijkstra(0)]
+        while len(tables) < min(count, len(self._adjacency)):
+            closest = [min(table[node] for table in tables) for node in range(len(self._adjacency))]
+            farthest = max(range(len(closest)), key=closest.__getitem__)
+            if closest[farthest] <= 0:
+                break
+            tables.append(self._dijkstra(farthest))
+        return tuple(tables)
+
+    def _lower_bound(self, node: int, target: int) -> float:
+        bound = 0.0
+        for table in self._landmarks:
+            if math.isfinite(table[node]) and math.isfinite(table[target]):
+                bound = max(bound, abs(table[target] - table[node]))
+        return bound
+
+    def _astar(self, source: int, target: int) -> float | None:
+        best = {source: 0.0}
+        queue = [(self._lower_bound(source, target), 0.0, source)]
+        while queue:
+            _, distance, node = heapq.heappop(queue)
+            if node == target:
+                return distance
+            if distance > best[node]:
+                continue
+            for neighbour, km in self._adjacency[node]:
+                candidate = distance + km
+                if candidate < best.get(neighbour, math.inf):
+                    best[neighbour] = candidate
+                    heapq.heappush(
+                        queue,
+                        (candidate + self._lower_bound(neighbour, target), candidate, neighbour),
+                    )
+        return None
+
+    def shortest_km(self, origin: str, destination: str) -> float | None:
+        """Shortest network distance between two places, or ``None`` when unroutable."""
+
+        source = self.node_for(origin)
+        target = self.node_for(destination)
+        if source is None or target is None:
+            return None
+        key = (source, target)
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        km = self._astar(source, target)
+        with self._lock:
+            self._memo[key] = self._memo[(target, source)] = km
+        return km
+
+    def many_to_many(self, lanes: Sequence[tuple[str, str]]) -> tuple[float | None, ...]:
+        """Answer many lanes with at most one bounded search per distinct origin."""
+
+        nodes = [
+            (self.node_for(origin), self.node_for(destination)) for origin, destination in lanes
+        ]
+        with self._lock:
+            missing: dict[int, set[int]] = {}
+            for source, target in nodes:
+                if source is not None and target is not None and (source, target) not in self._memo:
+                    missing.setdefault(source, set()).add(target)
+        for source, targets in missing.items():
+            distances = self._dijkstra(source, targets)
+            with self._lock:
+                for target in targets:
+                    km = distances[target] if math.isfinite(distances[target]) else None
+                    self._memo[(source, target)] = self._memo[(target, source)] = km
+        with self._lock:
+            return tuple(
+                None if source is None or target is None else self._memo[(source, target)]
+                for source, target in nodes
+            )
+
+
+@cache
+def route_network(mode: str | FreightMode) -> RouteNetwork | None:
+    """Load and index the bundled network for a mode, once per process."""
+
+    filename = NETWORK_FILES.get(normalize_mode(mode))
+    return None if filename is None else RouteNetwork.load(NETWORK_DIR / filename)
+
+
+def _network_distance(
+    network: RouteNetwork, km: float | None, origin: str, destination: str
+) -> Distance | None:
+    # A lane whose ends share a node has no route to estimate; callers fall
+    # back to straight lines or report the row rather than price 0 km.
+    if km is None or km <= 0:
+        return None
+    return replace(
+        route_distance(round(km, 6), origin=origin, destination=destination),
+        warnings=(f"Route distance estimated from the bundled simplified {network.name} network.",),
+    )
+
+
+def network_route_distances(
+    lanes: Sequence[tuple[str, str]],
+    mode: str | FreightMode,
+) -> tuple[Distance | None, ...]:
+    """Estimate route distances for many lanes of one mode; unroutable lanes are ``None``."""
+
+    network = route_network(mode)
+    if network is None:
+        return (None,) * len(lanes)
+    return tuple(
+        _network_distance(network, km, origin, destination)
+        for (origin, destination), km in zip(lanes, network.many_to_many(lanes), strict=True)
+    )
+
+
+def network_route_distance(
+    origin: str,
+    destination: str,
+    mode: str | FreightMode,
+) -> Distance | None:
+    """Estimate one mode-specific route distance from the bundled networks."""
+
+    network = route_network(mode)
+    if network is None:
+        return None
+    return _network_distance(network, network.shortest_km(origin, destination), origin, destination)
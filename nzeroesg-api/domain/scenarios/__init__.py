@@ -1,5 +1,20 @@
 """Deterministic shipment scenario comparisons."""
 
 from domain.scenarios.comparison import ScenarioComparison, compare_shipment_modes
+from domain.scenarios.sweep import (
+    ScenarioSpec,
+    ScenarioSweep,
+    SweepResult,
+    default_sweep_scenarios,
+    sweep_shipment_scenarios,
+)
 
-__all__ = ["ScenarioComparison", "compare_shipment_modes"]
+__all__ = [
+    "ScenarioComparison",
+    "ScenarioSpec",
+    "ScenarioSweep",
+    "SweepResult",
+    "compare_shipment_modes",
+    "default_sweep_scenarios",
+    "sweep_shipment_scenarios",
+]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from dataclasses import dataclass
 
 from domain.emissions.calculator import calculate_emissions
@@ -77,20 +78,26 @@ class ScenarioComparison:
 
 
 def compare_shipment_modes(
-    shipments: tuple[NormalizedShipment, ...] | list[NormalizedShipment],
+    shipments: Iterable[NormalizedShipment],
     *,
     alternative_mode: str,
+    include_shipments: bool = True,
 ) -> ScenarioComparison:
-    if not shipments:
-        raise ValueError("Upload at least one valid shipment before running a scenario.")
+    """Compare every shipment against one alternative mode in a single pass.
+
+    With ``include_shipments=False`` only the totals are kept, so a repository
+    stream of any size can be summarized in constant memory.
+    """
+
     normalized_alternative = normalize_mode(alternative_mode).value
     results: list[ScenarioShipment] = []
-    assumptions: list[str] = []
-    sources: list[str] = []
-    versions: list[str] = []
+    assumptions: dict[str, None] = {}
+    sources: dict[str, None] = {}
+    versions: dict[str, None] = {}
     baseline_total = 0.0
     alternative_total = 0.0
-    baseline_modes = {shipment.transport_method for shipment in shipments}
+    shipment_count = 0
+    baseline_modes: set[str] = set()
     for shipment in shipments:
         baseline = calculate_emissions(
             weight_value=shipment.weight_kg,
@@ -98,7 +105,7 @@ def compare_shipment_modes(
             distance_value=shipment.distance_km,
             distance_unit="km",
             mode=shipment.transport_method,
-            distance_method="route",
+            distance_method=shipment.distance_method,
             origin=shipment.origin,
             destination=shipment.destination,
         )
@@ -108,35 +115,40 @@ def compare_shipment_modes(
             distance_value=shipment.distance_km,
             distance_unit="km",
             mode=normalized_alternative,
-            distance_method="route",
+            distance_method=shipment.distance_method,
             origin=shipment.origin,
             destination=shipment.destination,
         )
+        shipment_count += 1
+        baseline_modes.add(shipment.transport_method)
         baseline_total += baseline.emissions_kg
         alternative_total += alternative.emissions_kg
-        results.append(
-            ScenarioShipment(
-                shipment_id=shipment.shipment_id,
-                origin=shipment.origin,
-                destination=shipment.destination,
-                baseline_mode=shipment.transport_method,
-                alternative_mode=normalized_alternative,
-                baseline_emissions_kg=baseline.emissions_kg,
-                alternative_emissions_kg=alternative.emissions_kg,
+        if include_shipments:
+            results.append(
+                ScenarioShipment(
+                    shipment_id=shipment.shipment_id,
+                    origin=shipment.origin,
+                    destination=shipment.destination,
+                    baseline_mode=shipment.transport_method,
+                    alternative_mode=normalized_alternative,
+                    baseline_emissions_kg=baseline.emissions_kg,
+                    alternative_emissions_kg=alternative.emissions_kg,
+                )
             )
-        )
         for factor in (baseline.factor, alternative.factor):
-            sources.append(factor.source)
-            versions.append(factor.version)
-            assumptions.extend(factor.assumptions)
+            sources[factor.source] = None
+            versions[factor.version] = None
+            assumptions.update(dict.fromkeys(factor.assumptions))
+    if not shipment_count:
+        raise ValueError("Upload at least one valid shipment before running a scenario.")
     return ScenarioComparison(
         baseline_mode=(next(iter(baseline_modes)) if len(baseline_modes) == 1 else "mixed"),
         alternative_mode=normalized_alternative,
-        shipment_count=len(shipments),
+        shipment_count=shipment_count,
         baseline_total_kg=round(baseline_total, 6),
         alternative_total_kg=round(alternative_total, 6),
         shipment_results=tuple(results),
-        factor_source=next(iter(dict.fromkeys(sources))),
-        factor_version=next(iter(dict.fromkeys(versions))),
-        assumptions=tuple(dict.fromkeys(assumptions)),
+        factor_source=next(iter(sources)),
+        factor_version=next(iter(versions)),
+        assumptions=tuple(assumptions),
     )
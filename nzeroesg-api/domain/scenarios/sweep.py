@@ -0,0 +1,372 @@
+"""Multi-scenario sweeps evaluated from one pass over normalized shipments.
+
+Emissions are linear in tonne-kilometres, so a scenario only needs the
+tonne-kilometres each baseline mode contributes above a threshold. The sweep
+reads shipments once into Arrow columns, sorts them by distance and by weight
+with Arrow compute, keeps cumulative sums of tonne-kilometres per baseline
+mode, and then prices every scenario with a bisect and a handful of
+multiplications instead of rescanning the dataset. Scenarios with both a
+distance and a weight threshold are evaluated as one vectorized mask.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, replace
+from typing import Protocol
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - exercised only before optional local setup
+    pa = None
+    pc = None
+
+from domain.emissions.factors import EmissionFactor, factor_for
+from domain.emissions.modes import SUPPORTED_FREIGHT_MODES, FreightMode, normalize_mode
+from domain.shipments.models import NormalizedShipment
+
+MAX_SWEEP_SCENARIOS = 64
+
+_Eligible = tuple[dict[FreightMode, float], dict[FreightMode, int]]
+_MODES = tuple(FreightMode)
+
+
+@dataclass(frozen=True)
+class ScenarioSpec:
+    """Shift a share of shipments at or above optional thresholds to one mode."""
+
+    alternative_mode: FreightMode
+    shift_share: float = 1.0
+    min_distance_km: float | None = None
+    min_weight_kg: float | None = None
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "alternative_mode", normalize_mode(self.alternative_mode))
+        if not math.isfinite(self.shift_share) or not 0 < self.shift_share <= 1:
+            raise ValueError("Scenario shift share must be greater than 0 and at most 1.")
+        for label, threshold in (
+            ("distance", self.min_distance_km),
+            ("weight", self.min_weight_kg),
+        ):
+            if threshold is not None and (not math.isfinite(threshold) or threshold < 0):
+                raise ValueError(f"Scenario minimum {label} must be a finite number >= 0.")
+
+    @property
+    def label(self) -> str:
+        parts = [f"{round(self.shift_share * 100, 2):g}% to {self.alternative_mode.value}"]
+        if self.min_distance_km is not None:
+            parts.append(f"distance >= {self.min_distance_km:g} km")
+        if self.min_weight_kg is not None:
+            parts.append(f"weight >= {self.min_weight_kg:g} kg")
+        return ", ".join(parts)
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "label": self.label,
+            "alternative_mode": self.alternative_mode.value,
+            "shift_share": self.shift_share,
+            "min_distance_km": self.min_distance_km,
+            "min_weight_kg": self.min_weight_kg,
+        }
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    """One ranked scenario of a sweep.
+
+    ``eligible_shipment_count`` counts the shipments whose mode and thresholds
+    qualify for the shift; only ``shift_share`` of their tonne-kilometres moves,
+    which is what ``shifted_tonne_km`` and the emissions figures reflect.
+    """
+
+    rank: int
+    scenario: ScenarioSpec
+    total_kg: float
+    delta_kg: float
+    delta_percent: float | None
+    eligible_shipment_count: int
+    shifted_tonne_km: float
+    emissions_by_baseline_mode: dict[str, float]
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "rank": self.rank,
+            **self.scenario.to_dict(),
+            "total_kg": self.total_kg,
+            "delta_kg": self.delta_kg,
+            "delta_percent": self.delta_percent,
+            "eligible_shipment_count": self.eligible_shipment_count,
+            "shifted_tonne_km": self.shifted_tonne_km,
+            "emissions_by_baseline_mode": dict(self.emissions_by_baseline_mode),
+        }
+
+
+@dataclass(frozen=True)
+class ScenarioSweep:
+    shipment_count: int
+    baseline_total_kg: float
+    baseline_by_mode: dict[str, float]
+    results: tuple[SweepResult, ...]
+    factor_source: str
+    factor_version: str
+    assumptions: tuple[str, ...]
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "shipment_count": self.shipment_count,
+            "baseline_total_kg": self.baseline_total_kg,
+            "baseline_by_mode": dict(self.baseline_by_mode),
+            "results": [result.to_dict() for result in self.results],
+            "factor_source": self.factor_source,
+            "factor_version": self.factor_version,
+            "assumptions": list(self.assumptions),
+        }
+
+
+def default_sweep_scenarios() -> tuple[ScenarioSpec, ...]:
+    """Return a full shift to every supported mode."""
+
+    return tuple(ScenarioSpec(alternative_mode=mode) for mode in SUPPORTED_FREIGHT_MODES)
+
+
+class SweepColumns(Protocol):
+    """Shipment columns a sweep can price scenarios from."""
+
+    total_tonne_km: dict[FreightMode, float]
+    total_counts: dict[FreightMode, int]
+
+    def __len__(self) -> int: ...
+
+    def eligible(self, scenario: ScenarioSpec) -> _Eligible: ...
+
+
+def _view(values: pa.Array) -> memoryview:
+    """Zero-copy view of a null-free float64 or int64 array for bisect and indexing."""
+
+    width = values.type.byte_width
+    data = memoryview(values.buffers()[1])
+    return data[values.offset * width : (values.offset + len(values)) * width].cast(
+        "d" if pa.types.is_floating(values.type) else "q"
+    )
+
+
+def _running_totals(values: pa.Array) -> memoryview:
+    """Cumulative sums with a leading zero, so position ``n`` sums the first ``n`` values."""
+
+    return _view(pa.concat_arrays([pa.array([0], values.type), pc.cumulative_sum(values)]))
+
+
+@dataclass(frozen=True)
+class _ThresholdColumn:
+    """Shipments sorted by one measure, largest first, with per-mode running totals."""
+
+    negated_keys: memoryview
+    tonne_km: dict[FreightMode, memoryview]
+    counts: dict[FreightMode, memoryview]
+
+    @classmethod
+    def build(cls, measures: pa.Array, codes: pa.Array, tonne_km: pa.Array) -> _ThresholdColumn:
+        order = pc.array_sort_indices(measures, order="descending")
+        codes = codes.take(order)
+        tonne_km = tonne_km.take(order)
+        totals: dict[FreightMode, memoryview] = {}
+        counts: dict[FreightMode, memoryview] = {}
+        for code in pc.unique(codes).to_pylist():
+            in_mode = pc.equal(codes, code)
+            totals[_MODES[code]] = _running_totals(pc.if_else(in_mode, tonne_km, 0.0))
+            counts[_MODES[code]] = _running_totals(pc.cast(in_mode, pa.int64()))
+        return cls(
+            negated_keys=_view(pc.negate(measures.take(order))),
+            tonne_km=totals,
+            counts=counts,
+        )
+
+    def at_or_above(self, threshold: float) -> _Eligible:
+        eligible = bisect_right(self.negated_keys, -threshold)
+        tonne_km = dict.fromkeys(FreightMode, 0.0)
+        counts = dict.fromkeys(FreightMode, 0)
+        for mode, values in self.tonne_km.items():
+            tonne_km[mode] = values[eligible]
+            counts[mode] = self.counts[mode][eligible]
+        return tonne_km, counts
+
+
+class ArrowSweepColumns:
+    """Sweep columns held as Arrow arrays.
+
+    Single thresholds resolve against lazily sorted running totals; combined
+    distance and weight thresholds are one vectorized mask and group-by.
+    """
+
+    def __init__(self, weight_kg, distance_km, transport_methods) -> None:
+        if pa is None:
+            raise RuntimeError("pyarrow is required for scenario sweeps.")
+        self._measures = {
+            "weight_kg": _combined(weight_kg, pa.float64()),
+            "distance_km": _combined(distance_km, pa.float64()),
+        }
+        modes = _combined(transport_methods, pa.string())
+        names = pc.unique(modes)
+        self._codes = pa.array(
+            [_MODES.index(normalize_mode(name)) for name in names.to_pylist()], pa.int8()
+        ).take(pc.index_in(modes, value_set=names))
+        self._tonne_km = pc.multiply(
+            pc.divide(self._measures["weight_kg"], 1_000.0), self._measures["distance_km"]
+        )
+        self._thresholds: dict[str, _ThresholdColumn] = {}
+        self.total_tonne_km, self.total_counts = self._grouped(None)
+
+    @classmethod
+    def from_shipments(cls, shipments: Iterable[NormalizedShipment]) -> ArrowSweepColumns:
+        weight_kg: list[float] = []
+        distance_km: list[float] = []
+        modes: list[str] = []
+        for shipment in shipments:
+            weight_kg.append(shipment.weight_kg)
+            distance_km.append(shipment.distance_km)
+            modes.append(shipment.transport_method)
+        return cls(
+            pa.array(weight_kg, pa.float64()),
+            pa.array(distance_km, pa.float64()),
+            pa.array(modes, pa.string()).dictionary_encode(),
+        )
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def _grouped(self, mask) -> _Eligible:
+        tonne_km = dict.fromkeys(FreightMode, 0.0)
+        counts = dict.fromkeys(FreightMode, 0)
+        values = pa.table({"code": self._codes, "tonne_km": self._tonne_km})
+        if mask is not None:
+            values = values.filter(mask)
+        for row in (
+            values.group_by("code")
+            .aggregate([("tonne_km", "sum"), ("tonne_km", "count")])
+            .to_pylist()
+        ):
+            tonne_km[_MODES[row["code"]]] = row["tonne_km_sum"]
+            counts[_MODES[row["code"]]] = row["tonne_km_count"]
+        return tonne_km, counts
+
+    def _threshold(self, measure: str, threshold: float) -> _Eligible:
+        column = self._thresholds.get(measure)
+        if column is None:
+            column = self._thresholds[measure] = _ThresholdColumn.build(
+                self._measures[measure], self._codes, self._tonne_km
+            )
+        return column.at_or_above(threshold)
+
+    def eligible(self, scenario: ScenarioSpec) -> _Eligible:
+        if scenario.min_distance_km is not None and scenario.min_weight_kg is not None:
+            return self._grouped(
+                pc.and_(
+                    pc.greater_equal(self._measures["distance_km"], scenario.min_distance_km),
+                    pc.greater_equal(self._measures["weight_kg"], scenario.min_weight_kg),
+                )
+            )
+        if scenario.min_distance_km is not None:
+            return self._threshold("distance_km", scenario.min_distance_km)
+        if scenario.min_weight_kg is not None:
+            return self._threshold("weight_kg", scenario.min_weight_kg)
+        return self.total_tonne_km, self.total_counts
+
+
+def _combined(values, value_type: pa.DataType) -> pa.Array:
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    return pc.cast(values, value_type)
+
+
+def sweep_shipment_scenarios(
+    shipments: Iterable[NormalizedShipment],
+    scenarios: Sequence[ScenarioSpec] | None = None,
+) -> ScenarioSweep:
+    """Price many modal-shift scenarios from one read of the shipments.
+
+    Results are ranked from the lowest to the highest total; ties keep the
+    order in which scenarios were requested.
+    """
+
+    return sweep_columns(ArrowSweepColumns.from_shipments(shipments), scenarios)
+
+
+def sweep_columns(
+    columns: SweepColumns,
+    scenarios: Sequence[ScenarioSpec] | None = None,
+) -> ScenarioSweep:
+    """Rank scenarios from prepared columns, such as a columnar shipment table."""
+
+    scenarios = tuple(scenarios) if scenarios else default_sweep_scenarios()
+    if len(scenarios) > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"A sweep can evaluate at most {MAX_SWEEP_SCENARIOS} scenarios.")
+    if not len(columns):
+        raise ValueError("Upload at least one valid shipment before running a scenario.")
+
+    factors: dict[FreightMode, EmissionFactor] = {mode: factor_for(mode) for mode in FreightMode}
+    baseline_by_mode = {
+        mode: columns.total_tonne_km[mode] * factors[mode].value
+        for mode in FreightMode
+        if columns.total_counts[mode]
+    }
+    baseline_total = sum(baseline_by_mode.values())
+
+    priced: list[tuple[float, int, SweepResult]] = []
+    for position, scenario in enumerate(scenarios):
+        eligible_tonne_km, eligible_counts = columns.eligible(scenario)
+        alternative_factor = factors[scenario.alternative_mode].value
+        by_mode: dict[str, float] = {}
+        shifted_tonne_km = 0.0
+        eligible_count = 0
+        for mode, baseline_kg in baseline_by_mode.items():
+            if mode is scenario.alternative_mode:
+                by_mode[mode.value] = round(baseline_kg, 6)
+                continue
+            moved = eligible_tonne_km[mode] * scenario.shift_share
+            by_mode[mode.value] = round(
+                baseline_kg + moved * (alternative_factor - factors[mode].value), 6
+            )
+            shifted_tonne_km += moved
+            eligible_count += eligible_counts[mode]
+        total = round(sum(by_mode.values()), 6)
+        delta = round(total - baseline_total, 6)
+        priced.append(
+            (
+                total,
+                position,
+                SweepResult(
+                    rank=0,
+                    scenario=scenario,
+                    total_kg=total,
+                    delta_kg=delta,
+                    delta_percent=(
+                        round((delta / baseline_total) * 100, 4) if baseline_total else None
+                    ),
+                    eligible_shipment_count=eligible_count,
+                    shifted_tonne_km=round(shifted_tonne_km, 6),
+                    emissions_by_baseline_mode=by_mode,
+                ),
+            )
+        )
+    priced.sort(key=lambda item: (item[0], item[1]))
+
+    used_factors = [factors[mode] for mode in baseline_by_mode] + [
+        factors[scenario.alternative_mode] for scenario in scenarios
+    ]
+    assumptions: dict[str, None] = {}
+    for factor in used_factors:
+        assumptions.update(dict.fromkeys(factor.assumptions))
+    return ScenarioSweep(
+        shipment_count=len(columns),
+        baseline_total_kg=round(baseline_total, 6),
+        baseline_by_mode={mode.value: round(value, 6) for mode, value in baseline_by_mode.items()},
+        results=tuple(
+            replace(result, rank=rank) for rank, (_, _, result) in enumerate(priced, start=1)
+        ),
+        factor_source=used_factors[0].source,
+        factor_version=used_factors[0].version,
+        assumptions=tuple(assumptions),
+    )
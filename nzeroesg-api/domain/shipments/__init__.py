@@ -7,15 +7,27 @@ from domain.shipments.ingestion import (
     ShipmentParseResult,
     parse_shipments_csv,
 )
+from domain.shipments.lanes import (
+    LaneAggregate,
+    LaneScenarioDelta,
+    aggregate_lanes,
+    lane_scenario_deltas,
+    top_lanes,
+)
 from domain.shipments.models import NormalizedShipment, ValidationIssue
 
 __all__ = [
+    "LaneAggregate",
+    "LaneScenarioDelta",
     "MAX_FILE_BYTES",
     "MAX_ROWS",
     "NormalizedShipment",
     "ShipmentAnalysis",
     "ShipmentParseResult",
     "ValidationIssue",
+    "aggregate_lanes",
     "analyze_shipments",
+    "lane_scenario_deltas",
     "parse_shipments_csv",
+    "top_lanes",
 ]
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from dataclasses import dataclass
 
 from domain.emissions.calculator import calculate_emissions
 from domain.emissions.factors import factor_for
 from domain.shipments.models import NormalizedShipment
 
+HOTSPOT_LIMIT = 10
+
 
 @dataclass(frozen=True)
 class ModeBreakdown:
@@ -23,7 +26,7 @@ class ModeBreakdown:
         }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ShipmentHotspot:
     shipment_id: str
     origin: str
@@ -72,19 +75,34 @@ class ShipmentAnalysis:
         }
 
 
+def _top_hotspots(hotspots: list[ShipmentHotspot]) -> list[ShipmentHotspot]:
+    return sorted(
+        hotspots,
+        key=lambda hotspot: (-hotspot.emissions_kg, hotspot.shipment_id),
+    )[:HOTSPOT_LIMIT]
+
+
 def analyze_shipments(
-    shipments: tuple[NormalizedShipment, ...] | list[NormalizedShipment],
+    shipments: Iterable[NormalizedShipment],
     *,
     parser_warnings: tuple[str, ...] = (),
 ) -> ShipmentAnalysis:
+    """Aggregate shipments in one pass with memory bounded by modes and factors.
+
+    ``shipments`` may be any iterable, including a repository stream, so
+    exports of large workspaces never hold every row or hotspot at once.
+    """
+
     mode_totals: dict[str, list[float]] = {}
     hotspots: list[ShipmentHotspot] = []
+    shipment_count = 0
+    first_mode: str | None = None
     total_weight = 0.0
     total_emissions = 0.0
-    factor_sources: list[str] = []
-    factor_versions: list[str] = []
-    assumptions: list[str] = []
-    warnings = list(parser_warnings)
+    factor_sources: dict[str, None] = {}
+    factor_versions: dict[str, None] = {}
+    assumptions: dict[str, None] = {}
+    warnings = dict.fromkeys(parser_warnings)
 
     for shipment in shipments:
         result = calculate_emissions(
@@ -93,10 +111,13 @@ def analyze_shipments(
             distance_value=shipment.distance_km,
             distance_unit="km",
             mode=shipment.transport_method,
-            distance_method="route",
+            distance_method=shipment.distance_method,
             origin=shipment.origin,
             destination=shipment.destination,
         )
+        shipment_count += 1
+        if first_mode is None:
+            first_mode = shipment.transport_method
         total_weight += shipment.weight_kg
         total_emissions += result.emissions_kg
         mode_values = mode_totals.setdefault(shipment.transport_method, [0.0, 0.0, 0.0])
@@ -112,19 +133,20 @@ def analyze_shipments(
                 emissions_kg=result.emissions_kg,
             )
         )
+        if len(hotspots) > HOTSPOT_LIMIT * 10:
+            hotspots = _top_hotspots(hotspots)
         factor = factor_for(shipment.transport_method)
-        factor_sources.append(factor.source)
-        factor_versions.append(factor.version)
-        assumptions.extend(factor.assumptions)
-        warnings.extend(result.warnings)
-
-    unique_sources = tuple(dict.fromkeys(factor_sources))
-    unique_versions = tuple(dict.fromkeys(factor_versions))
-    unique_assumptions = tuple(dict.fromkeys(assumptions))
+        factor_sources[factor.source] = None
+        factor_versions[factor.version] = None
+        assumptions.update(dict.fromkeys(factor.assumptions))
+        warnings.update(dict.fromkeys(result.warnings))
+
+    unique_sources = tuple(factor_sources)
+    unique_versions = tuple(factor_versions)
     if len(unique_sources) > 1 or len(unique_versions) > 1:
-        warnings.append("Multiple factor records are present in this analysis.")
+        warnings["Multiple factor records are present in this analysis."] = None
     return ShipmentAnalysis(
-        shipment_count=len(shipments),
+        shipment_count=shipment_count,
         total_weight_kg=round(total_weight, 6),
         total_emissions_kg=round(total_emissions, 6),
         mode_breakdown={
@@ -135,13 +157,8 @@ def analyze_shipments(
             )
             for mode, values in mode_totals.items()
         },
-        hotspots=tuple(
-            sorted(
-                hotspots,
-                key=lambda hotspot: (-hotspot.emissions_kg, hotspot.shipment_id),
-            )[:10]
-        ),
-        warnings=tuple(dict.fromkeys(warnings)),
+        hotspots=tuple(_top_hotspots(hotspots)),
+        warnings=tuple(warnings),
         factor_source=(
             unique_sources[0] if len(unique_sources) == 1 else "Multiple factor records"
         ),
@@ -149,9 +166,9 @@ def analyze_shipments(
             unique_versions[0] if len(unique_versions) == 1 else "Multiple factor versions"
         ),
         factor_applicability=(
-            factor_for(shipments[0].transport_method).applicability
-            if shipments
+            factor_for(first_mode).applicability
+            if first_mode is not None
             else "No factor was applied because no valid rows were accepted."
         ),
-        assumptions=unique_assumptions,
+        assumptions=tuple(assumptions),
     )
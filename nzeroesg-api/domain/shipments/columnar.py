@@ -0,0 +1,279 @@
+"""Columnar shipment tables and vectorized analysis kernels.
+
+A workspace's shipments can be held as an Arrow table instead of one frozen
+``NormalizedShipment`` per row. The kernels here compute the same analysis,
+scenario, and sweep results as the row-oriented functions with Arrow compute
+functions, so large tenants never materialize per-row Python objects.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - exercised only before optional local setup
+    pa = None
+    pc = None
+
+from domain.emissions.distance import STRAIGHT_LINE_WARNING, DistanceMethod
+from domain.emissions.factors import EmissionFactor, factor_for
+from domain.emissions.modes import FreightMode, normalize_mode
+from domain.scenarios.comparison import ScenarioComparison, ScenarioShipment
+from domain.scenarios.sweep import (
+    ArrowSweepColumns,
+    ScenarioSpec,
+    ScenarioSweep,
+    sweep_columns,
+)
+from domain.shipments.analysis import (
+    HOTSPOT_LIMIT,
+    ModeBreakdown,
+    ShipmentAnalysis,
+    ShipmentHotspot,
+    analyze_shipments,
+)
+from domain.shipments.models import NormalizedShipment
+
+COLUMNAR_BATCH_ROWS = 65_536
+_Eligible = tuple[dict[FreightMode, float], dict[FreightMode, int]]
+SHIPMENT_COLUMNS = (
+    "shipment_id",
+    "origin",
+    "destination",
+    "weight_kg",
+    "distance_km",
+    "transport_method",
+    "source_row",
+    "distance_method",
+)
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the columnar shipment store.")
+
+
+def shipment_schema() -> pa.Schema:
+    require_pyarrow()
+    return pa.schema(
+        [
+            ("shipment_id", pa.string()),
+            ("origin", pa.string()),
+            ("destination", pa.string()),
+            ("weight_kg", pa.float64()),
+            ("distance_km", pa.float64()),
+            ("transport_method", pa.dictionary(pa.int8(), pa.string())),
+            ("source_row", pa.int32()),
+            ("distance_method", pa.dictionary(pa.int8(), pa.string())),
+        ]
+    )
+
+
+def shipment_table(
+    shipments: Iterable[NormalizedShipment],
+    *,
+    batch_rows: int = COLUMNAR_BATCH_ROWS,
+) -> pa.Table:
+    """Build an Arrow table from shipments in bounded record batches."""
+
+    schema = shipment_schema()
+    batches: list[pa.RecordBatch] = []
+    columns: dict[str, list] = {name: [] for name in SHIPMENT_COLUMNS}
+
+    def flush() -> None:
+        batches.append(
+            pa.RecordBatch.from_arrays(
+                [
+                    pa.array(columns[field.name], type=field.type)
+                    if not pa.types.is_dictionary(field.type)
+                    else pa.array(columns[field.name], type=pa.string())
+                    .dictionary_encode()
+                    .cast(field.type)
+                    for field in schema
+                ],
+                schema=schema,
+            )
+        )
+        for values in columns.values():
+            values.clear()
+
+    for shipment in shipments:
+        for name in SHIPMENT_COLUMNS:
+            columns[name].append(getattr(shipment, name))
+        if len(columns["shipment_id"]) >= batch_rows:
+            flush()
+    if columns["shipment_id"] or not batches:
+        flush()
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def iter_table_shipments(table: pa.Table) -> Iterator[NormalizedShipment]:
+    """Yield row records one batch at a time for callers that need objects."""
+
+    for batch in table.select(list(SHIPMENT_COLUMNS)).to_batches():
+        for row in batch.to_pylist():
+            yield NormalizedShipment(**row)
+
+
+@dataclass(frozen=True)
+class _Kernels:
+    modes: pa.Array
+    mode_order: tuple[str, ...]
+    factors: dict[str, EmissionFactor]
+    tonne_km: pa.Array
+    emissions_kg: pa.Array
+
+
+def _kernels(table: pa.Table) -> _Kernels:
+    modes = pc.cast(table.column("transport_method"), pa.string()).combine_chunks()
+    mode_order = tuple(pc.unique(modes).to_pylist())
+    factors = {mode: factor_for(mode) for mode in mode_order}
+    row_factors = pa.array([factors[mode].value for mode in mode_order], pa.float64()).take(
+        pc.index_in(modes, value_set=pa.array(mode_order, pa.string()))
+    )
+    tonne_km = pc.multiply(
+        pc.divide(table.column("weight_kg"), 1_000.0),
+        table.column("distance_km"),
+    ).combine_chunks()
+    return _Kernels(
+        modes=modes,
+        mode_order=mode_order,
+        factors=factors,
+        tonne_km=tonne_km,
+        emissions_kg=pc.round(pc.multiply(tonne_km, row_factors), 6),
+    )
+
+
+def _sum(values) -> float:
+    return pc.sum(values).as_py() or 0.0
+
+
+def analyze_shipment_table(
+    table: pa.Table,
+    *,
+    parser_warnings: tuple[str, ...] = (),
+) -> ShipmentAnalysis:
+    """Columnar equivalent of :func:`analyze_shipments`."""
+
+    if not table.num_rows:
+        return analyze_shipments((), parser_warnings=parser_warnings)
+    kernels = _kernels(table)
+    weight = table.column("weight_kg").combine_chunks()
+    grouped = (
+        pa.table({"mode": kernels.modes, "weight": weight, "emissions": kernels.emissions_kg})
+        .group_by("mode", use_threads=False)
+        .aggregate([("weight", "count"), ("weight", "sum"), ("emissions", "sum")])
+        .to_pylist()
+    )
+    mode_breakdown = {
+        row["mode"]: ModeBreakdown(
+            shipment_count=row["weight_count"],
+            weight_kg=row["weight_sum"],
+            emissions_kg=row["emissions_sum"],
+        )
+        for row in grouped
+    }
+
+    hottest = pc.select_k_unstable(
+        pa.table({"emissions": kernels.emissions_kg, "id": table.column("shipment_id")}),
+        k=HOTSPOT_LIMIT,
+        sort_keys=[("emissions", "descending"), ("id", "ascending")],
+    )
+    hotspot_rows = (
+        table.select(["shipment_id", "origin", "destination"])
+        .take(hottest)
+        .append_column("transport_method", kernels.modes.take(hottest))
+        .append_column("emissions_kg", kernels.emissions_kg.take(hottest))
+        .to_pylist()
+    )
+    hotspots = sorted(
+        (ShipmentHotspot(**row) for row in hotspot_rows),
+        key=lambda hotspot: (-hotspot.emissions_kg, hotspot.shipment_id),
+    )
+
+    factors = [kernels.factors[mode] for mode in kernels.mode_order]
+    sources = tuple(dict.fromkeys(factor.source for factor in factors))
+    versions = tuple(dict.fromkeys(factor.version for factor in factors))
+    warnings = dict.fromkeys(parser_warnings)
+    straight_line = pc.equal(
+        pc.cast(table.column("distance_method"), pa.string()),
+        DistanceMethod.STRAIGHT_LINE.value,
+    )
+    if pc.any(straight_line).as_py():
+        warnings[STRAIGHT_LINE_WARNING] = None
+    if len(sources) > 1 or len(versions) > 1:
+        warnings["Multiple factor records are present in this analysis."] = None
+    assumptions: dict[str, None] = {}
+    for factor in factors:
+        assumptions.update(dict.fromkeys(factor.assumptions))
+    return ShipmentAnalysis(
+        shipment_count=table.num_rows,
+        total_weight_kg=round(_sum(weight), 6),
+        total_emissions_kg=round(_sum(kernels.emissions_kg), 6),
+        mode_breakdown=mode_breakdown,
+        hotspots=tuple(hotspots),
+        warnings=tuple(warnings),
+        factor_source=sources[0] if len(sources) == 1 else "Multiple factor records",
+        factor_version=versions[0] if len(versions) == 1 else "Multiple factor versions",
+        factor_applicability=factors[0].applicability,
+        assumptions=tuple(assumptions),
+    )
+
+
+def compare_shipment_table(
+    table: pa.Table,
+    *,
+    alternative_mode: str,
+    include_shipments: bool = True,
+) -> ScenarioComparison:
+    """Columnar equivalent of :func:`compare_shipment_modes`."""
+
+    if not table.num_rows:
+        raise ValueError("Upload at least one valid shipment before running a scenario.")
+    alternative = factor_for(normalize_mode(alternative_mode))
+    kernels = _kernels(table)
+    alternative_kg = pc.round(pc.multiply(kernels.tonne_km, alternative.value), 6)
+    results: tuple[ScenarioShipment, ...] = ()
+    if include_shipments:
+        rows = (
+            table.select(["shipment_id", "origin", "destination"])
+            .append_column("baseline_mode", kernels.modes)
+            .append_column("baseline_emissions_kg", kernels.emissions_kg)
+            .append_column("alternative_emissions_kg", alternative_kg)
+            .to_pylist()
+        )
+        results = tuple(
+            ScenarioShipment(alternative_mode=alternative.mode.value, **row) for row in rows
+        )
+    factors = [kernels.factors[mode] for mode in kernels.mode_order] + [alternative]
+    assumptions: dict[str, None] = {}
+    for factor in factors:
+        assumptions.update(dict.fromkeys(factor.assumptions))
+    return ScenarioComparison(
+        baseline_mode=kernels.mode_order[0] if len(kernels.mode_order) == 1 else "mixed",
+        alternative_mode=alternative.mode.value,
+        shipment_count=table.num_rows,
+        baseline_total_kg=round(_sum(kernels.emissions_kg), 6),
+        alternative_total_kg=round(_sum(alternative_kg), 6),
+        shipment_results=results,
+        factor_source=factors[0].source,
+        factor_version=factors[0].version,
+        assumptions=tuple(assumptions),
+    )
+
+
+def sweep_shipment_table(
+    table: pa.Table,
+    scenarios: Iterable[ScenarioSpec] | None = None,
+) -> ScenarioSweep:
+    """Columnar equivalent of :func:`sweep_shipment_scenarios`."""
+
+    columns = ArrowSweepColumns(
+        table.column("weight_kg"),
+        table.column("distance_km"),
+        table.column("transport_method"),
+    )
+    return sweep_columns(columns, tuple(scenarios or ()))
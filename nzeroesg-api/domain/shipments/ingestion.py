@@ -1,14 +1,23 @@
-"""Bounded, row-level CSV shipment validation."""
+"""Bounded, row-level CSV shipment validation.
+
+Cells are validated row by row; units and transport modes are then
+normalized as whole columns, so each distinct spelling is resolved once per
+upload while every invalid row is still reported.
+"""
 
 from __future__ import annotations
 
 import csv
 import io
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
-from domain.emissions.modes import normalize_mode
-from domain.emissions.units import normalize_distance_km, normalize_weight_kg
+from domain.emissions.bulk_distance import bulk_distances_km
+from domain.emissions.distance import DistanceMethod
+from domain.emissions.modes import normalize_modes
+from domain.emissions.units import normalize_distances_km, normalize_weights_kg
+from domain.places.gazetteer import Place, lookup_place
+from domain.routing.network import network_route_distances
 from domain.shipments.models import NormalizedShipment, ValidationIssue
 
 MAX_FILE_BYTES = 10 * 1024 * 1024
@@ -40,6 +49,23 @@ class ShipmentParseResult:
         }
 
 
+@dataclass(frozen=True)
+class _RowCells:
+    """Validated cells of one data row, before units and modes are normalized."""
+
+    row_number: int
+    shipment_id: str | None
+    origin: str | None
+    destination: str | None
+    weight_value: float | None
+    weight_unit: str
+    distance_value: float | None
+    distance_unit: str
+    transport_method: str
+    lane: tuple[Place | None, Place | None] | None
+    errors: tuple[ValidationIssue, ...]
+
+
 def _issue(
     errors: list[ValidationIssue],
     *,
@@ -120,6 +146,130 @@ def _parse_positive_number(
     return number
 
 
+def _normalize_rows(
+    cells: list[_RowCells],
+    rows: list[NormalizedShipment],
+    pending: list[tuple[int, tuple[Place, Place]]],
+    errors: list[ValidationIssue],
+) -> None:
+    """Normalize weight, distance, and mode columns and keep rows without issues."""
+
+    weights_kg = normalize_weights_kg(
+        [row.weight_value for row in cells], [row.weight_unit for row in cells]
+    )
+    distances_km = normalize_distances_km(
+        [row.distance_value for row in cells], [row.distance_unit for row in cells]
+    )
+    modes = normalize_modes([row.transport_method for row in cells])
+    for row, weight_kg, distance_km, mode in zip(
+        cells, weights_kg, distances_km, modes, strict=True
+    ):
+        row_errors = list(row.errors)
+        # Values were already checked, so NaN here means the unit is unsupported.
+        if row.weight_value is not None and math.isnan(weight_kg):
+            _issue(
+                row_errors,
+                row_number=row.row_number,
+                field="weight_unit",
+                message="Unsupported weight unit.",
+            )
+        if row.distance_value is not None and math.isnan(distance_km):
+            _issue(
+                row_errors,
+                row_number=row.row_number,
+                field="distance_unit",
+                message="Unsupported distance unit.",
+            )
+        if mode is None:
+            _issue(
+                row_errors,
+                row_number=row.row_number,
+                field="transport_method",
+                message="Unsupported transport mode.",
+            )
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+        if row.lane is not None:
+            pending.append((len(rows), row.lane))
+        rows.append(
+            NormalizedShipment(
+                shipment_id=row.shipment_id,
+                origin=row.origin,
+                destination=row.destination,
+                weight_kg=weight_kg,
+                distance_km=0.0 if row.distance_value is None else distance_km,
+                transport_method=mode.value,
+                source_row=row.row_number,
+            )
+        )
+
+
+def _fill_missing_distances(
+    rows: list[NormalizedShipment],
+    pending: list[tuple[int, tuple[Place, Place]]],
+) -> tuple[list[str], list[ValidationIssue]]:
+    """Fill blank distances from the route networks, then straight lines, in batches.
+
+    Rows whose filled distance is not positive are removed from ``rows`` and
+    reported as ``distance_value`` issues instead.
+    """
+
+    by_mode: dict[str, list[tuple[int, tuple[Place, Place]]]] = {}
+    for index, lane in pending:
+        by_mode.setdefault(rows[index].transport_method, []).append((index, lane))
+    straight: list[tuple[int, tuple[Place, Place]]] = []
+    routed: list[int] = []
+    for mode, lanes in by_mode.items():
+        distances = network_route_distances(
+            [(origin.name, destination.name) for _, (origin, destination) in lanes], mode
+        )
+        for (index, lane), distance in zip(lanes, distances, strict=True):
+            if distance is None:
+                straight.append((index, lane))
+            else:
+                rows[index] = replace(rows[index], distance_km=distance.km)
+                routed.append(index)
+    if straight:
+        distances = bulk_distances_km(
+            [origin.coordinates for _, (origin, _) in straight],
+            [destination.coordinates for _, (_, destination) in straight],
+        )
+        for (index, _), distance_km in zip(straight, distances, strict=True):
+            rows[index] = replace(
+                rows[index],
+                distance_km=distance_km,
+                distance_method=DistanceMethod.STRAIGHT_LINE.value,
+            )
+
+    unfilled = sorted(index for index, _ in pending if rows[index].distance_km <= 0)
+    errors = [
+        ValidationIssue(
+            row_number=rows[index].source_row,
+            field="distance_value",
+            message="Origin and destination are too close to estimate a distance; supply one.",
+        )
+        for index in unfilled
+    ]
+    routed_count = len(routed) - sum(index in unfilled for index in routed)
+    straight_count = len(straight) - sum(index in unfilled for index, _ in straight)
+    for index in reversed(unfilled):
+        del rows[index]
+
+    warnings = []
+    if routed_count:
+        warnings.append(
+            f"{routed_count} rows without a distance use route distances estimated from the "
+            "bundled simplified transport networks."
+        )
+    if straight_count:
+        warnings.append(
+            f"{straight_count} rows without a distance use straight-line distances between "
+            "known places; supply route distances for mode-specific accuracy."
+        )
+    return warnings, errors
+
+
 def parse_shipments_csv(
     content: bytes,
     *,
@@ -130,6 +280,8 @@ def parse_shipments_csv(
     errors: list[ValidationIssue] = []
     warnings: list[str] = []
     rows: list[NormalizedShipment] = []
+    cells: list[_RowCells] = []
+    pending: list[tuple[int, tuple[Place, Place]]] = []
 
     if len(content) > MAX_FILE_BYTES:
         _issue(
@@ -260,65 +412,45 @@ def parse_shipments_csv(
                 row_number=row_number,
                 errors=row_errors,
             )
-            distance_value = _parse_positive_number(
-                _cell(normalized_row, "distance_value"),
-                field="distance_value",
-                row_number=row_number,
-                errors=row_errors,
-            )
-            weight_unit = _cell(normalized_row, "weight_unit")
-            distance_unit = _cell(normalized_row, "distance_unit")
-            transport_method = _cell(normalized_row, "transport_method")
-            try:
-                weight_kg = (
-                    normalize_weight_kg(weight_value, weight_unit)
-                    if weight_value is not None
-                    else None
-                )
-            except ValueError:
-                weight_kg = None
-                _issue(
-                    row_errors,
+            distance_cell = _cell(normalized_row, "distance_value")
+            distance_value = None
+            lane = None
+            if distance_cell:
+                distance_value = _parse_positive_number(
+                    distance_cell,
+                    field="distance_value",
                     row_number=row_number,
-                    field="weight_unit",
-                    message="Unsupported weight unit.",
-                )
-            try:
-                distance_km = (
-                    normalize_distance_km(distance_value, distance_unit)
-                    if distance_value is not None
-                    else None
+                    errors=row_errors,
                 )
-            except ValueError:
-                distance_km = None
+            elif origin and destination:
+                lane = (lookup_place(origin), lookup_place(destination))
+            if not distance_cell and (lane is None or None in lane):
                 _issue(
                     row_errors,
                     row_number=row_number,
-                    field="distance_unit",
-                    message="Unsupported distance unit.",
+                    field="distance_value",
+                    message="Value is required unless origin and destination are known places.",
                 )
-            try:
-                normalized_mode = normalize_mode(transport_method).value
-            except ValueError:
-                normalized_mode = None
+            elif lane is not None and lane[0] == lane[1]:
                 _issue(
                     row_errors,
                     row_number=row_number,
-                    field="transport_method",
-                    message="Unsupported transport mode.",
+                    field="distance_value",
+                    message="Value is required when origin and destination are the same place.",
                 )
-            if row_errors:
-                errors.extend(row_errors)
-                continue
-            rows.append(
-                NormalizedShipment(
+            cells.append(
+                _RowCells(
+                    row_number=row_number,
                     shipment_id=shipment_id,
                     origin=origin,
                     destination=destination,
-                    weight_kg=weight_kg,
-                    distance_km=distance_km,
-                    transport_method=normalized_mode,
-                    source_row=row_number,
+                    weight_value=weight_value,
+                    weight_unit=_cell(normalized_row, "weight_unit"),
+                    distance_value=distance_value,
+                    distance_unit=_cell(normalized_row, "distance_unit"),
+                    transport_method=_cell(normalized_row, "transport_method"),
+                    lane=lane,
+                    errors=tuple(row_errors),
                 )
             )
     except csv.Error:
@@ -329,6 +461,12 @@ def parse_shipments_csv(
             message="CSV structure is invalid or malformed.",
         )
 
+    _normalize_rows(cells, rows, pending, errors)
+    errors.sort(key=lambda issue: (issue.row_number is None, issue.row_number or 0))
+    if pending:
+        fill_warnings, fill_errors = _fill_missing_distances(rows, pending)
+        warnings.extend(fill_warnings)
+        errors.extend(fill_errors)
     if errors and rows:
         warnings.append("Some input rows were rejected; totals include accepted rows only.")
     if not rows:
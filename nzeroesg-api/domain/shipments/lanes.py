@@ -0,0 +1,149 @@
+"""Lane-level totals grouped by origin, destination, and transport mode."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from domain.emissions.calculator import calculate_emissions
+from domain.emissions.factors import factor_for
+from domain.emissions.modes import normalize_mode
+from domain.shipments.models import NormalizedShipment
+
+TOP_LANE_LIMIT = 10
+
+
+def lane_place_key(value: str) -> str:
+    """Normalize a place name so spacing and case variants share one lane."""
+
+    return " ".join(value.split()).casefold()
+
+
+@dataclass(frozen=True)
+class LaneAggregate:
+    origin: str
+    destination: str
+    transport_method: str
+    shipment_count: int
+    weight_kg: float
+    tonne_km: float
+    emissions_kg: float
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return (
+            lane_place_key(self.origin),
+            lane_place_key(self.destination),
+            self.transport_method,
+        )
+
+    def to_dict(self) -> dict[str, str | int | float]:
+        return {
+            "origin": self.origin,
+            "destination": self.destination,
+            "transport_method": self.transport_method,
+            "shipment_count": self.shipment_count,
+            "weight_kg": round(self.weight_kg, 6),
+            "tonne_km": round(self.tonne_km, 6),
+            "emissions_kg": round(self.emissions_kg, 6),
+        }
+
+
+@dataclass(frozen=True)
+class LaneScenarioDelta:
+    lane: LaneAggregate
+    alternative_mode: str
+    alternative_emissions_kg: float
+
+    @property
+    def delta_kg(self) -> float:
+        return round(self.alternative_emissions_kg - self.lane.emissions_kg, 6)
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            **self.lane.to_dict(),
+            "alternative_mode": self.alternative_mode,
+            "alternative_emissions_kg": self.alternative_emissions_kg,
+            "delta_kg": self.delta_kg,
+        }
+
+
+def aggregate_lanes(shipments: Iterable[NormalizedShipment]) -> tuple[LaneAggregate, ...]:
+    """Keep running totals per lane, ordered from the highest emitting lane.
+
+    The first spelling seen for a place is kept for display; later rows that
+    differ only in case or spacing are counted on the same lane.
+    """
+
+    totals: dict[tuple[str, str, str], list] = {}
+    for shipment in shipments:
+        result = calculate_emissions(
+            weight_value=shipment.weight_kg,
+            weight_unit="kg",
+            distance_value=shipment.distance_km,
+            distance_unit="km",
+            mode=shipment.transport_method,
+            distance_method=shipment.distance_method,
+            origin=shipment.origin,
+            destination=shipment.destination,
+        )
+        key = (
+            lane_place_key(shipment.origin),
+            lane_place_key(shipment.destination),
+            result.mode.value,
+        )
+        values = totals.get(key)
+        if values is None:
+            values = totals[key] = [shipment.origin, shipment.destination, 0, 0.0, 0.0, 0.0]
+        values[2] += 1
+        values[3] += shipment.weight_kg
+        values[4] += (shipment.weight_kg / 1_000) * shipment.distance_km
+        values[5] += result.emissions_kg
+    return top_lanes(
+        (
+            LaneAggregate(
+                origin=origin,
+                destination=destination,
+                transport_method=key[2],
+                shipment_count=count,
+                weight_kg=round(weight, 6),
+                tonne_km=round(tonne_km, 6),
+                emissions_kg=round(emissions, 6),
+            )
+            for key, (origin, destination, count, weight, tonne_km, emissions) in totals.items()
+        ),
+        limit=None,
+    )
+
+
+def top_lanes(
+    lanes: Iterable[LaneAggregate],
+    *,
+    limit: int | None = TOP_LANE_LIMIT,
+) -> tuple[LaneAggregate, ...]:
+    ordered = sorted(lanes, key=lambda lane: (-lane.emissions_kg, lane.key))
+    return tuple(ordered if limit is None else ordered[:limit])
+
+
+def lane_scenario_deltas(
+    lanes: Iterable[LaneAggregate],
+    *,
+    alternative_mode: str,
+    limit: int | None = TOP_LANE_LIMIT,
+) -> tuple[LaneScenarioDelta, ...]:
+    """Price a full shift of each lane, ordered from the largest reduction."""
+
+    mode = normalize_mode(alternative_mode)
+    factor = factor_for(mode).value
+    deltas = sorted(
+        (
+            LaneScenarioDelta(
+                lane=lane,
+                alternative_mode=mode.value,
+                alternative_emissions_kg=round(lane.tonne_km * factor, 6),
+            )
+            for lane in lanes
+        ),
+        key=lambda delta: (delta.delta_kg, delta.lane.key),
+    )
+    return tuple(deltas if limit is None else deltas[:limit])
@@ -17,7 +17,7 @@ class ValidationIssue:
         }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NormalizedShipment:
     shipment_id: str
     origin: str
@@ -26,6 +26,7 @@ class NormalizedShipment:
     distance_km: float
     transport_method: str
     source_row: int
+    distance_method: str = "route"
 
     def to_dict(self) -> dict[str, int | float | str]:
         return {
@@ -36,4 +37,5 @@ class NormalizedShipment:
             "distance_km": self.distance_km,
             "transport_method": self.transport_method,
             "source_row": self.source_row,
+            "distance_method": self.distance_method,
         }
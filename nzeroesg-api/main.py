@@ -1,19 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.emissions import emissions_router
 from api.evidence import evidence_router
 from api.reports import reports_router
-from api.routes import chat_router
+from api.routes import chat_router, warm_assistant
 from api.scenarios import scenarios_router
 from api.shipments import shipments_router
 from api.workspaces import workspace_router
 from config import settings
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    warm_assistant()
+    yield
+
+
 app = FastAPI(
     title="CarbonSage API",
     description="Evidence-grounded Scope 3 intelligence and deterministic decision tools.",
     version="0.2.0-dev",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -0,0 +1,143 @@
+"""Shared PostgreSQL connections and prepared hot queries.
+
+Repositories borrow connections from one pool per database URL so that
+server-side prepared statements survive between requests. Queries that run on
+every authenticated request are registered by name and executed with
+``prepare=True``; PostgreSQL then parses and plans them once per pooled
+connection instead of once per call.
+"""
+
+from __future__ import annotations
+
+import atexit
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+
+try:
+    import psycopg
+except ImportError:  # pragma: no cover - exercised only before optional local setup
+    psycopg = None
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:  # pragma: no cover - exercised only before optional local setup
+    ConnectionPool = None
+
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 10
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """A named statement that is prepared on each pooled connection."""
+
+    name: str
+    sql: str
+
+
+HOT_QUERIES: dict[str, HotQuery] = {}
+
+
+def register_hot_query(name: str, sql: str) -> HotQuery:
+    existing = HOT_QUERIES.get(name)
+    if existing is not None and existing.sql != sql:
+        raise ValueError(f"Hot query {name!r} is already registered with different SQL.")
+    query = HotQuery(name=name, sql=sql)
+    HOT_QUERIES[name] = query
+    return query
+
+
+def execute_hot(cursor, query: HotQuery, parameters: Sequence[object]):
+    """Execute a registered query as a server-side prepared statement."""
+
+    return cursor.execute(query.sql, parameters, prepare=True)
+
+
+_DATA_VERSION_BUMP = register_hot_query(
+    "data_version_bump",
+    """
+    INSERT INTO workspace_data_versions (workspace_id, dataset, version)
+    VALUES (%s, %s, 1)
+    ON CONFLICT (workspace_id, dataset)
+    DO UPDATE SET version = workspace_data_versions.version + 1,
+                  updated_at = CURRENT_TIMESTAMP
+    RETURNING version
+    """,
+)
+_DATA_VERSION_GET = register_hot_query(
+    "data_version_get",
+    "SELECT version FROM workspace_data_versions WHERE workspace_id = %s AND dataset = %s",
+)
+
+
+def bump_data_version(cursor, workspace_id: str, dataset: str) -> int:
+    """Advance a workspace dataset version inside the caller's write transaction.
+
+    Returns the new version, which becomes visible when the caller commits.
+    """
+
+    execute_hot(cursor, _DATA_VERSION_BUMP, (workspace_id, dataset))
+    return int(cursor.fetchone()[0])
+
+
+def fetch_data_version(cursor, workspace_id: str, dataset: str) -> int:
+    """Read a workspace dataset version inside the caller's transaction."""
+
+    execute_hot(cursor, _DATA_VERSION_GET, (workspace_id, dataset))
+    row = cursor.fetchone()
+    return 0 if row is None else int(row[0])
+
+
+def read_data_version(database_url: str, workspace_id: str, dataset: str) -> int:
+    with connect(database_url) as connection:
+        with connection.cursor() as cursor:
+            return fetch_data_version(cursor, workspace_id, dataset)
+
+
+def _pool_for(database_url: str) -> ConnectionPool | None:
+    if ConnectionPool is None:
+        return None
+    with _pools_lock:
+        pool = _pools.get(database_url)
+        if pool is None:
+            pool = ConnectionPool(
+                database_url,
+                min_size=POOL_MIN_SIZE,
+                max_size=POOL_MAX_SIZE,
+                open=True,
+            )
+            _pools[database_url] = pool
+        return pool
+
+
+@contextmanager
+def connect(database_url: str) -> Iterator[psycopg.Connection]:
+    """Borrow a pooled connection, or open a short-lived one without a pool.
+
+    Pooled connections are returned after committing a clean transaction or
+    rolling back a failed one, so callers keep their explicit ``commit`` calls.
+    """
+
+    if psycopg is None:
+        raise RuntimeError("psycopg is required when DATABASE_URL is configured.")
+    pool = _pool_for(database_url)
+    if pool is None:
+        with closing(psycopg.connect(database_url)) as connection:
+            yield connection
+        return
+    with pool.connection() as connection:
+        yield connection
+
+
+@atexit.register
+def close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-from contextlib import closing
 from hashlib import sha256
 from math import sqrt
 from typing import Protocol
@@ -26,7 +25,23 @@ from domain.evidence.models import (
     SupplierCard,
     SupplierMetadata,
 )
+from domain.evidence.quantization import (
+    BINARY_RERANK_CANDIDATES,
+    EmbeddingStorage,
+    PackedVector,
+    binary_bits,
+    hamming_distance,
+    pack_vector,
+    parse_embedding_storage,
+)
 from domain.evidence.retrieval import RetrievalMode, rank_matches
+from persistence.database import (
+    bump_data_version,
+    connect,
+    execute_hot,
+    read_data_version,
+    register_hot_query,
+)
 
 
 class EvidenceRepository(Protocol):
@@ -39,6 +54,8 @@ class EvidenceRepository(Protocol):
 
     def list_suppliers(self, workspace_id: str) -> tuple[SupplierCard, ...]: ...
 
+    def data_version(self, workspace_id: str) -> int: ...
+
     def store_embeddings(
         self,
         workspace_id: str,
@@ -67,6 +84,18 @@ def _vector_literal(values: tuple[float, ...]) -> str:
     return "[" + ",".join(format(value, ".12g") for value in values) + "]"
 
 
+def _storage_columns(
+    values: tuple[float, ...],
+    storage: EmbeddingStorage,
+) -> tuple[str | None, str | None, str | None]:
+    literal = _vector_literal(values)
+    if storage is EmbeddingStorage.HALF:
+        return None, literal, None
+    if storage is EmbeddingStorage.BINARY:
+        return literal, None, binary_bits(values)
+    return literal, None, None
+
+
 def _cosine_similarity(left: tuple[float, ...], right: tuple[float, ...]) -> float:
     numerator = sum(a * b for a, b in zip(left, right, strict=True))
     left_norm = sqrt(sum(value * value for value in left))
@@ -113,13 +142,109 @@ def _card(
     )
 
 
+_SEMANTIC_SCOPE = """
+    e.workspace_id = %s
+    AND e.provider = %s
+    AND e.model = %s
+    AND e.dimensions = %s
+    AND e.storage = %s
+"""
+_SEMANTIC_JOINS = """
+    JOIN evidence_chunks AS c
+        ON c.chunk_id = e.chunk_id
+       AND c.workspace_id = e.workspace_id
+    JOIN evidence_documents AS d
+        ON d.document_id = c.document_id
+       AND d.workspace_id = c.workspace_id
+    JOIN suppliers AS s
+        ON s.supplier_id = c.supplier_id
+       AND s.workspace_id = c.workspace_id
+"""
+_LEXICAL_SEARCH = register_hot_query(
+    "evidence_lexical_search",
+    """
+    WITH lexical_query AS (
+        SELECT replace(
+            plainto_tsquery('english', %s)::text,
+            ' & ',
+            ' | '
+        )::tsquery AS value
+    )
+    SELECT s.name, d.filename, c.content, c.page_number,
+           c.chunk_index, d.sha256,
+           ts_rank(c.search_vector, lexical_query.value) AS rank
+    FROM evidence_chunks AS c
+    JOIN evidence_documents AS d
+        ON d.document_id = c.document_id
+       AND d.workspace_id = c.workspace_id
+    JOIN suppliers AS s
+        ON s.supplier_id = c.supplier_id
+       AND s.workspace_id = c.workspace_id
+    CROSS JOIN lexical_query
+    WHERE c.workspace_id = %s
+      AND c.search_vector @@ lexical_query.value
+    ORDER BY rank DESC, d.sha256, c.chunk_index
+    LIMIT 20
+    """,
+)
+_FULL_SEMANTIC_SQL = f"""
+    SELECT s.name, d.filename, c.content, c.page_number,
+           c.chunk_index, d.sha256,
+           1 - (e.embedding <=> %s::vector) AS similarity
+    FROM evidence_chunk_embeddings AS e
+    {_SEMANTIC_JOINS}
+    WHERE {_SEMANTIC_SCOPE}
+    ORDER BY e.embedding <=> %s::vector, d.sha256, c.chunk_index
+    LIMIT 20
+"""
+_HALF_SEMANTIC_SQL = f"""
+    SELECT s.name, d.filename, c.content, c.page_number,
+           c.chunk_index, d.sha256,
+           1 - (e.embedding_half <=> %s::halfvec) AS similarity
+    FROM evidence_chunk_embeddings AS e
+    {_SEMANTIC_JOINS}
+    WHERE {_SEMANTIC_SCOPE}
+    ORDER BY e.embedding_half <=> %s::halfvec, d.sha256, c.chunk_index
+    LIMIT 20
+"""
+# Binary storage shortlists by Hamming distance over sign bits, then re-ranks
+# the shortlist with the full-precision vectors stored beside them.
+_BINARY_SEMANTIC_SQL = f"""
+    WITH candidates AS (
+        SELECT e.chunk_id, e.workspace_id, e.embedding
+        FROM evidence_chunk_embeddings AS e
+        WHERE {_SEMANTIC_SCOPE}
+        ORDER BY e.embedding_binary <~> %s::bit(1536)
+        LIMIT %s
+    )
+    SELECT s.name, d.filename, c.content, c.page_number,
+           c.chunk_index, d.sha256,
+           1 - (e.embedding <=> %s::vector) AS similarity
+    FROM candidates AS e
+    {_SEMANTIC_JOINS}
+    ORDER BY e.embedding <=> %s::vector, d.sha256, c.chunk_index
+    LIMIT 20
+"""
+_SEMANTIC_SEARCH = {
+    EmbeddingStorage.FULL: register_hot_query("evidence_semantic_full", _FULL_SEMANTIC_SQL),
+    EmbeddingStorage.HALF: register_hot_query("evidence_semantic_half", _HALF_SEMANTIC_SQL),
+    EmbeddingStorage.BINARY: register_hot_query("evidence_semantic_binary", _BINARY_SEMANTIC_SQL),
+}
+
+
 class InMemoryEvidenceRepository:
-    """Development-only workspace-keyed evidence adapter."""
+    """Development-only workspace-keyed evidence adapter.
+
+    Embeddings are kept as packed float32 or float16 bytes rather than tuples
+    of Python floats, which are roughly eight times larger per dimension.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, *, storage: str | EmbeddingStorage = EmbeddingStorage.FULL) -> None:
+        self.storage = parse_embedding_storage(storage)
         self._suppliers: dict[tuple[str, str], tuple[str, SupplierMetadata, int]] = {}
         self._documents: dict[tuple[str, str], tuple[str, SupplierMetadata, EvidenceDocument]] = {}
-        self._embeddings: dict[tuple[str, str, int, str, str], ChunkEmbedding] = {}
+        self._embeddings: dict[tuple[str, str, int, str, str], PackedVector] = {}
+        self._versions: dict[str, int] = {}
 
     def store(
         self,
@@ -137,8 +262,12 @@ class InMemoryEvidenceRepository:
             self._documents[document_key] = (supplier_id, supplier, document)
             document_count += 1
         self._suppliers[supplier_key] = (supplier_id, supplier, document_count)
+        self._versions[workspace_id] = self._versions.get(workspace_id, 0) + 1
         return _card(supplier_id=supplier_id, supplier=supplier, document_count=document_count)
 
+    def data_version(self, workspace_id: str) -> int:
+        return self._versions.get(workspace_id, 0)
+
     def list_suppliers(self, workspace_id: str) -> tuple[SupplierCard, ...]:
         cards = [
             _card(supplier_id=supplier_id, supplier=supplier, document_count=document_count)
@@ -170,7 +299,7 @@ class InMemoryEvidenceRepository:
             content_hash = sha256(chunk.content.encode("utf-8")).hexdigest()
             if content_hash != embedding.content_sha256:
                 raise ValueError("Embedding content hash does not match the evidence chunk.")
-            validate_vector(embedding.values, spec.dimensions)
+            vector = validate_vector(embedding.values, spec.dimensions)
             self._embeddings[
                 (
                     workspace_id,
@@ -179,7 +308,7 @@ class InMemoryEvidenceRepository:
                     spec.provider,
                     spec.model,
                 )
-            ] = embedding
+            ] = pack_vector(vector, self.storage)
         return len(embeddings)
 
     def list_unembedded_documents(
@@ -198,14 +327,13 @@ class InMemoryEvidenceRepository:
             missing_chunks = tuple(
                 chunk
                 for chunk in document.chunks
-                if (
+                if self._stored_vector(
                     workspace_id,
                     document_sha,
                     chunk.chunk_index,
-                    spec.provider,
-                    spec.model,
+                    spec,
                 )
-                not in self._embeddings
+                is None
             )
             if missing_chunks:
                 pending.append(
@@ -256,7 +384,9 @@ class InMemoryEvidenceRepository:
         spec: EmbeddingSpec,
     ) -> tuple[EvidenceMatch, ...]:
         validated_query = validate_vector(query_embedding, spec.dimensions)
-        matches: list[EvidenceMatch] = []
+        candidates: list[
+            tuple[PackedVector, SupplierMetadata, EvidenceDocument, EvidenceChunk]
+        ] = []
         for (record_workspace, document_sha), (
             _supplier_id,
             supplier,
@@ -265,29 +395,32 @@ class InMemoryEvidenceRepository:
             if record_workspace != workspace_id:
                 continue
             for chunk in document.chunks:
-                embedding = self._embeddings.get(
-                    (
-                        workspace_id,
-                        document_sha,
-                        chunk.chunk_index,
-                        spec.provider,
-                        spec.model,
-                    )
-                )
-                if embedding is None:
-                    continue
-                matches.append(
-                    EvidenceMatch(
-                        supplier_name=supplier.name,
-                        filename=document.filename,
-                        excerpt=chunk.content,
-                        page_number=chunk.page_number,
-                        chunk_index=chunk.chunk_index,
-                        document_sha256=document.sha256,
-                        retrieval_mode=RetrievalMode.SEMANTIC.value,
-                        score=_cosine_similarity(embedding.values, validated_query),
-                    )
-                )
+                vector = self._stored_vector(workspace_id, document_sha, chunk.chunk_index, spec)
+                if vector is not None:
+                    candidates.append((vector, supplier, document, chunk))
+        if self.storage is EmbeddingStorage.BINARY:
+            query_code = pack_vector(validated_query, EmbeddingStorage.BINARY).code
+            candidates = sorted(
+                candidates,
+                key=lambda item: (
+                    hamming_distance(item[0].code, query_code),
+                    item[2].sha256,
+                    item[3].chunk_index,
+                ),
+            )[:BINARY_RERANK_CANDIDATES]
+        matches = [
+            EvidenceMatch(
+                supplier_name=supplier.name,
+                filename=document.filename,
+                excerpt=chunk.content,
+                page_number=chunk.page_number,
+                chunk_index=chunk.chunk_index,
+                document_sha256=document.sha256,
+                retrieval_mode=RetrievalMode.SEMANTIC.value,
+                score=_cosine_similarity(vector.values(), validated_query),
+            )
+            for vector, supplier, document, chunk in candidates
+        ]
         ordered = tuple(
             sorted(
                 matches,
@@ -305,17 +438,37 @@ class InMemoryEvidenceRepository:
 
         return self.search_lexical(workspace_id, query)
 
+    def _stored_vector(
+        self,
+        workspace_id: str,
+        document_sha256: str,
+        chunk_index: int,
+        spec: EmbeddingSpec,
+    ) -> PackedVector | None:
+        vector = self._embeddings.get(
+            (workspace_id, document_sha256, chunk_index, spec.provider, spec.model)
+        )
+        if vector is None or vector.storage is not self.storage:
+            return None
+        return vector
+
 
 class PostgresEvidenceRepository:
     """PostgreSQL lexical and pgvector evidence repository."""
 
-    def __init__(self, database_url: str) -> None:
+    def __init__(
+        self,
+        database_url: str,
+        *,
+        storage: str | EmbeddingStorage = EmbeddingStorage.FULL,
+    ) -> None:
         if psycopg is None:
             raise RuntimeError("psycopg is required when DATABASE_URL is configured.")
         self.database_url = database_url
+        self.storage = parse_embedding_storage(storage)
 
     def _connect(self):
-        return psycopg.connect(self.database_url)
+        return connect(self.database_url)
 
     def store(
         self,
@@ -323,7 +476,7 @@ class PostgresEvidenceRepository:
         supplier: SupplierMetadata,
         document: EvidenceDocument,
     ) -> SupplierCard:
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(
                     """
@@ -404,11 +557,15 @@ class PostgresEvidenceRepository:
                     (workspace_id, supplier_id),
                 )
                 document_count = cursor.fetchone()[0]
+                bump_data_version(cursor, workspace_id, "evidence")
             connection.commit()
         return _card(supplier_id=supplier_id, supplier=supplier, document_count=document_count)
 
+    def data_version(self, workspace_id: str) -> int:
+        return read_data_version(self.database_url, workspace_id, "evidence")
+
     def list_suppliers(self, workspace_id: str) -> tuple[SupplierCard, ...]:
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(
                     """
@@ -448,7 +605,7 @@ class PostgresEvidenceRepository:
     ) -> int:
         if not embeddings:
             return 0
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(
                     """
@@ -487,19 +644,25 @@ class PostgresEvidenceRepository:
                             spec.model,
                             spec.dimensions,
                             embedding.content_sha256,
-                            _vector_literal(vector),
+                            self.storage.value,
+                            *_storage_columns(vector, self.storage),
                         )
                     )
                 cursor.executemany(
                     """
                     INSERT INTO evidence_chunk_embeddings
                         (embedding_id, workspace_id, chunk_id, provider, model,
-                         dimensions, content_sha256, embedding)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s::vector)
+                         dimensions, content_sha256, storage, embedding,
+                         embedding_half, embedding_binary)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s::vector, %s::halfvec,
+                            %s::bit(1536))
                     ON CONFLICT (chunk_id, provider, model)
                     DO UPDATE SET dimensions = EXCLUDED.dimensions,
                                   content_sha256 = EXCLUDED.content_sha256,
+                                  storage = EXCLUDED.storage,
                                   embedding = EXCLUDED.embedding,
+                                  embedding_half = EXCLUDED.embedding_half,
+                                  embedding_binary = EXCLUDED.embedding_binary,
                                   updated_at = CURRENT_TIMESTAMP
                     """,
                     records,
@@ -512,7 +675,7 @@ class PostgresEvidenceRepository:
         workspace_id: str,
         spec: EmbeddingSpec,
     ) -> tuple[PendingEmbeddingDocument, ...]:
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(
                     """
@@ -526,11 +689,12 @@ class PostgresEvidenceRepository:
                        AND e.workspace_id = c.workspace_id
                        AND e.provider = %s
                        AND e.model = %s
+                       AND e.storage = %s
                     WHERE d.workspace_id = %s
                       AND e.chunk_id IS NULL
                     ORDER BY d.sha256, c.chunk_index
                     """,
-                    (spec.provider, spec.model, workspace_id),
+                    (spec.provider, spec.model, self.storage.value, workspace_id),
                 )
                 rows = cursor.fetchall()
 
@@ -553,35 +717,9 @@ class PostgresEvidenceRepository:
         )
 
     def search_lexical(self, workspace_id: str, query: str) -> tuple[EvidenceMatch, ...]:
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
-                cursor.execute(
-                    """
-                    WITH lexical_query AS (
-                        SELECT replace(
-                            plainto_tsquery('english', %s)::text,
-                            ' & ',
-                            ' | '
-                        )::tsquery AS value
-                    )
-                    SELECT s.name, d.filename, c.content, c.page_number,
-                           c.chunk_index, d.sha256,
-                           ts_rank(c.search_vector, lexical_query.value) AS rank
-                    FROM evidence_chunks AS c
-                    JOIN evidence_documents AS d
-                        ON d.document_id = c.document_id
-                       AND d.workspace_id = c.workspace_id
-                    JOIN suppliers AS s
-                        ON s.supplier_id = c.supplier_id
-                       AND s.workspace_id = c.workspace_id
-                    CROSS JOIN lexical_query
-                    WHERE c.workspace_id = %s
-                      AND c.search_vector @@ lexical_query.value
-                    ORDER BY rank DESC, d.sha256, c.chunk_index
-                    LIMIT 20
-                    """,
-                    (query, workspace_id),
-                )
+                execute_hot(cursor, _LEXICAL_SEARCH, (query, workspace_id))
                 rows = cursor.fetchall()
         matches = tuple(
             EvidenceMatch(
@@ -603,40 +741,22 @@ class PostgresEvidenceRepository:
         query_embedding: tuple[float, ...],
         spec: EmbeddingSpec,
     ) -> tuple[EvidenceMatch, ...]:
-        vector = _vector_literal(validate_vector(query_embedding, spec.dimensions))
-        with closing(self._connect()) as connection:
+        validated_query = validate_vector(query_embedding, spec.dimensions)
+        vector = _vector_literal(validated_query)
+        scope = (workspace_id, spec.provider, spec.model, spec.dimensions, self.storage.value)
+        if self.storage is EmbeddingStorage.BINARY:
+            parameters = (
+                *scope,
+                binary_bits(validated_query),
+                BINARY_RERANK_CANDIDATES,
+                vector,
+                vector,
+            )
+        else:
+            parameters = (vector, *scope, vector)
+        with self._connect() as connection:
             with connection.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT s.name, d.filename, c.content, c.page_number,
-                           c.chunk_index, d.sha256,
-                           1 - (e.embedding <=> %s::vector) AS similarity
-                    FROM evidence_chunk_embeddings AS e
-                    JOIN evidence_chunks AS c
-                        ON c.chunk_id = e.chunk_id
-                       AND c.workspace_id = e.workspace_id
-                    JOIN evidence_documents AS d
-                        ON d.document_id = c.document_id
-                       AND d.workspace_id = c.workspace_id
-                    JOIN suppliers AS s
-                        ON s.supplier_id = c.supplier_id
-                       AND s.workspace_id = c.workspace_id
-                    WHERE e.workspace_id = %s
-                      AND e.provider = %s
-                      AND e.model = %s
-                      AND e.dimensions = %s
-                    ORDER BY e.embedding <=> %s::vector, d.sha256, c.chunk_index
-                    LIMIT 20
-                    """,
-                    (
-                        vector,
-                        workspace_id,
-                        spec.provider,
-                        spec.model,
-                        spec.dimensions,
-                        vector,
-                    ),
-                )
+                execute_hot(cursor, _SEMANTIC_SEARCH[self.storage], parameters)
                 rows = cursor.fetchall()
         matches = tuple(
             EvidenceMatch(
@@ -659,7 +779,11 @@ class PostgresEvidenceRepository:
         return self.search_lexical(workspace_id, query)
 
 
-def build_evidence_repository(database_url: str | None) -> EvidenceRepository:
+def build_evidence_repository(
+    database_url: str | None,
+    *,
+    storage: str | EmbeddingStorage = EmbeddingStorage.FULL,
+) -> EvidenceRepository:
     if database_url:
-        return PostgresEvidenceRepository(database_url)
-    return InMemoryEvidenceRepository()
+        return PostgresEvidenceRepository(database_url, storage=storage)
+    return InMemoryEvidenceRepository(storage=storage)
@@ -0,0 +1,181 @@
+"""Persistent geocode results keyed by normalized place name.
+
+Geocoded coordinates are shared reference data rather than workspace records,
+so one cache serves every workspace. Places do not move; each adapter keeps
+resolved entries in process memory as well, and a repeated lane never leaves
+the process after its first lookup. Names the geocoder could not resolve are
+remembered in memory for a while, so a repeated typo is not re-sent upstream.
+The database is an optimization only: when it fails, reads degrade to a miss
+and writes keep the in-memory entry.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+try:
+    import psycopg
+except ImportError:  # pragma: no cover - exercised only before optional local setup
+    psycopg = None
+
+from domain.places.gazetteer import Place, place_key
+from persistence.database import connect, execute_hot, register_hot_query
+
+GEOCODE_MEMORY_LIMIT = 4_096
+GEOCODE_MISS_TTL_SECONDS = 3_600.0
+
+logger = logging.getLogger(__name__)
+
+_GEOCODE_GET = register_hot_query(
+    "geocode_get",
+    "SELECT name, latitude, longitude, kind, source FROM geocode_cache WHERE place_key = %s",
+)
+_GEOCODE_PUT = register_hot_query(
+    "geocode_put",
+    """
+    INSERT INTO geocode_cache (place_key, name, latitude, longitude, kind, source)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (place_key)
+    DO UPDATE SET name = EXCLUDED.name,
+                  latitude = EXCLUDED.latitude,
+                  longitude = EXCLUDED.longitude,
+                  kind = EXCLUDED.kind,
+                  source = EXCLUDED.source,
+                  resolved_at = CURRENT_TIMESTAMP
+    """,
+)
+
+
+class GeocodeCache(Protocol):
+    def get(self, name: str) -> Place | None: ...
+
+    def put(self, name: str, place: Place) -> None: ...
+
+    def is_missing(self, name: str) -> bool: ...
+
+    def put_missing(self, name: str) -> None: ...
+
+
+class InMemoryGeocodeCache:
+    """Bounded least-recently-used geocodes, and recent misses, for one process."""
+
+    def __init__(
+        self,
+        *,
+        limit: int = GEOCODE_MEMORY_LIMIT,
+        miss_ttl_seconds: float = GEOCODE_MISS_TTL_SECONDS,
+        clock=time.monotonic,
+    ) -> None:
+        self._limit = limit
+        self._miss_ttl_seconds = miss_ttl_seconds
+        self._clock = clock
+        self._places: OrderedDict[str, Place] = OrderedDict()
+        self._missing: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Place | None:
+        key = place_key(name)
+        with self._lock:
+            place = self._places.get(key)
+            if place is not None:
+                self._places.move_to_end(key)
+            return place
+
+    def put(self, name: str, place: Place) -> None:
+        key = place_key(name)
+        with self._lock:
+            self._places[key] = place
+            self._places.move_to_end(key)
+            while len(self._places) > self._limit:
+                self._places.popitem(last=False)
+            self._missing.pop(key, None)
+
+    def is_missing(self, name: str) -> bool:
+        key = place_key(name)
+        with self._lock:
+            expires_at = self._missing.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= self._clock():
+                del self._missing[key]
+                return False
+            return True
+
+    def put_missing(self, name: str) -> None:
+        key = place_key(name)
+        with self._lock:
+            self._missing[key] = self._clock() + self._miss_ttl_seconds
+            self._missing.move_to_end(key)
+            while len(self._missing) > self._limit:
+                self._missing.popitem(last=False)
+
+
+class PostgresGeocodeCache:
+    """PostgreSQL geocode table fronted by the in-process cache."""
+
+    def __init__(self, database_url: str) -> None:
+        if psycopg is None:
+            raise RuntimeError("psycopg is required when DATABASE_URL is configured.")
+        self.database_url = database_url
+        self._memory = InMemoryGeocodeCache()
+
+    def get(self, name: str) -> Place | None:
+        place = self._memory.get(name)
+        if place is not None:
+            return place
+        try:
+            with connect(self.database_url) as connection:
+                with connection.cursor() as cursor:
+                    execute_hot(cursor, _GEOCODE_GET, (place_key(name),))
+                    row = cursor.fetchone()
+        except psycopg.Error:
+            logger.warning("Geocode cache read failed; treating it as a miss.", exc_info=True)
+            return None
+        if row is None:
+            return None
+        place = Place(
+            name=row[0],
+            latitude=float(row[1]),
+            longitude=float(row[2]),
+            kind=row[3],
+            source=row[4],
+        )
+        self._memory.put(name, place)
+        return place
+
+    def put(self, name: str, place: Place) -> None:
+        self._memory.put(name, place)
+        try:
+            with connect(self.database_url) as connection:
+                with connection.cursor() as cursor:
+                    execute_hot(
+                        cursor,
+                        _GEOCODE_PUT,
+                        (
+                            place_key(name),
+                            place.name,
+                            place.latitude,
+                            place.longitude,
+                            place.kind,
+                            place.source,
+                        ),
+                    )
+                connection.commit()
+        except psycopg.Error:
+            logger.warning("Geocode cache write failed; keeping it in memory.", exc_info=True)
+
+    def is_missing(self, name: str) -> bool:
+        return self._memory.is_missing(name)
+
+    def put_missing(self, name: str) -> None:
+        self._memory.put_missing(name)
+
+
+def build_geocode_cache(database_url: str | None) -> GeocodeCache:
+    if database_url:
+        return PostgresGeocodeCache(database_url)
+    return InMemoryGeocodeCache()
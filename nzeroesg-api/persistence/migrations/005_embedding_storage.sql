@@ -0,0 +1,23 @@
+ALTER TABLE evidence_chunk_embeddings
+    ADD COLUMN storage VARCHAR(20) NOT NULL DEFAULT 'full';
+
+ALTER TABLE evidence_chunk_embeddings
+    ALTER COLUMN embedding DROP NOT NULL;
+
+ALTER TABLE evidence_chunk_embeddings
+    ADD COLUMN embedding_half HALFVEC(1536);
+
+ALTER TABLE evidence_chunk_embeddings
+    ADD COLUMN embedding_binary BIT(1536);
+
+ALTER TABLE evidence_chunk_embeddings
+    ADD CONSTRAINT evidence_chunk_embeddings_storage CHECK (
+        (storage = 'full' AND embedding IS NOT NULL)
+        OR (storage = 'half' AND embedding_half IS NOT NULL AND embedding IS NULL)
+        OR (storage = 'binary' AND embedding IS NOT NULL AND embedding_binary IS NOT NULL)
+    );
+
+DROP INDEX IF EXISTS evidence_chunk_embeddings_lookup_idx;
+
+CREATE INDEX evidence_chunk_embeddings_lookup_idx
+    ON evidence_chunk_embeddings (workspace_id, provider, model, storage);
@@ -0,0 +1,4 @@
+CREATE INDEX IF NOT EXISTS shipments_workspace_keyset_idx
+    ON shipments (workspace_id, source_row, record_id);
+
+DROP INDEX IF EXISTS shipments_workspace_idx;
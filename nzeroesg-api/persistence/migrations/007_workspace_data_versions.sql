@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS workspace_data_versions (
+    workspace_id VARCHAR(80) NOT NULL REFERENCES workspaces(workspace_id) ON DELETE CASCADE,
+    dataset VARCHAR(40) NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (workspace_id, dataset)
+);
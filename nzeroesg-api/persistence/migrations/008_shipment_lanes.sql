@@ -0,0 +1,16 @@
+CREATE TABLE IF NOT EXISTS shipment_lanes (
+    workspace_id VARCHAR(80) NOT NULL REFERENCES workspaces(workspace_id) ON DELETE CASCADE,
+    origin_key VARCHAR(200) NOT NULL,
+    destination_key VARCHAR(200) NOT NULL,
+    transport_method VARCHAR(20) NOT NULL,
+    origin VARCHAR(200) NOT NULL,
+    destination VARCHAR(200) NOT NULL,
+    shipment_count INTEGER NOT NULL,
+    weight_kg DOUBLE PRECISION NOT NULL,
+    tonne_km DOUBLE PRECISION NOT NULL,
+    emissions_kg DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (workspace_id, origin_key, destination_key, transport_method)
+);
+
+CREATE INDEX IF NOT EXISTS shipment_lanes_emissions_idx
+    ON shipment_lanes (workspace_id, emissions_kg DESC);
@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    place_key VARCHAR(200) PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    latitude DOUBLE PRECISION NOT NULL,
+    longitude DOUBLE PRECISION NOT NULL,
+    kind VARCHAR(20) NOT NULL,
+    source VARCHAR(40) NOT NULL,
+    resolved_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,2 @@
+ALTER TABLE shipments
+    ADD COLUMN IF NOT EXISTS distance_method VARCHAR(20) NOT NULL DEFAULT 'route';
@@ -2,16 +2,74 @@
 
 from __future__ import annotations
 
-from contextlib import closing
+import os
+import shutil
+import tempfile
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Protocol
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 try:
     import psycopg
 except ImportError:  # pragma: no cover - exercised only before optional local setup
     psycopg = None
 
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - exercised only before optional local setup
+    pq = None
+
+from domain.shipments.columnar import SHIPMENT_COLUMNS, require_pyarrow, shipment_table
+from domain.shipments.lanes import LaneAggregate, aggregate_lanes
 from domain.shipments.models import NormalizedShipment
+from persistence.database import (
+    bump_data_version,
+    connect,
+    fetch_data_version,
+    read_data_version,
+)
+
+STREAM_BATCH_ROWS = 2_000
+COLUMNAR_CACHE_WORKSPACES = 64
+SHIPMENT_STORES = ("rows", "columnar")
+_FIRST_RECORD_ID = str(UUID(int=0))
+
+
+@dataclass(frozen=True, order=True)
+class ShipmentCursor:
+    """Keyset position of a stored shipment, ordered like ``ORDER BY source_row, record_id``."""
+
+    source_row: int
+    record_id: str
+
+    def encode(self) -> str:
+        return f"{self.source_row}:{self.record_id}"
+
+    @classmethod
+    def decode(cls, value: str) -> ShipmentCursor:
+        source_row, _, record_id = value.partition(":")
+        try:
+            return cls(source_row=int(source_row), record_id=str(UUID(record_id)))
+        except ValueError as exc:
+            raise ValueError("Shipment cursor is not valid.") from exc
+
+
+@dataclass(frozen=True)
+class ShipmentSnapshot:
+    """An immutable view of a workspace's shipments at one data version.
+
+    ``cursors`` lists each shipment's keyset position when the store keeps
+    them alongside the rows; it is empty for snapshots read from a database.
+    """
+
+    version: int
+    shipments: tuple[NormalizedShipment, ...]
+    cursors: tuple[ShipmentCursor, ...] = ()
 
 
 class ShipmentRepository(Protocol):
@@ -19,38 +77,104 @@ class ShipmentRepository(Protocol):
         self,
         workspace_id: str,
         shipments: tuple[NormalizedShipment, ...],
-    ) -> None: ...
+    ) -> int: ...
 
     def list_for_workspace(self, workspace_id: str) -> tuple[NormalizedShipment, ...]: ...
 
+    def iter_for_workspace(
+        self,
+        workspace_id: str,
+        *,
+        after: ShipmentCursor | None = None,
+        limit: int | None = None,
+    ) -> Iterator[tuple[ShipmentCursor, NormalizedShipment]]: ...
+
+    def list_lanes(
+        self,
+        workspace_id: str,
+        *,
+        limit: int | None = None,
+    ) -> tuple[LaneAggregate, ...]: ...
+
+    def data_version(self, workspace_id: str) -> int: ...
+
+    def snapshot(self, workspace_id: str) -> ShipmentSnapshot: ...
+
+    def purge_workspaces(self, workspace_ids: Iterable[str]) -> None: ...
 
-def _clone(shipment: NormalizedShipment) -> NormalizedShipment:
-    return NormalizedShipment(
-        shipment_id=shipment.shipment_id,
-        origin=shipment.origin,
-        destination=shipment.destination,
-        weight_kg=shipment.weight_kg,
-        distance_km=shipment.distance_km,
-        transport_method=shipment.transport_method,
-        source_row=shipment.source_row,
-    )
+
+_EMPTY_SNAPSHOT = ShipmentSnapshot(version=0, shipments=())
 
 
 class InMemoryShipmentRepository:
-    """Non-persistent local fallback keyed by workspace id."""
+    """Non-persistent local fallback keyed by workspace id.
+
+    Shipments are frozen, so reads hand out the stored tuples instead of
+    copying them; each upload replaces the workspace snapshot as a whole.
+    """
 
     def __init__(self) -> None:
-        self._shipments: dict[str, tuple[NormalizedShipment, ...]] = {}
+        self._snapshots: dict[str, ShipmentSnapshot] = {}
+        self._lanes: dict[str, tuple[LaneAggregate, ...]] = {}
 
     def replace_for_workspace(
         self,
         workspace_id: str,
         shipments: tuple[NormalizedShipment, ...],
-    ) -> None:
-        self._shipments[workspace_id] = tuple(_clone(shipment) for shipment in shipments)
+    ) -> int:
+        records = sorted(
+            (
+                (ShipmentCursor(shipment.source_row, str(uuid4())), shipment)
+                for shipment in shipments
+            ),
+            key=lambda record: record[0],
+        )
+        self._lanes[workspace_id] = aggregate_lanes(shipments)
+        snapshot = ShipmentSnapshot(
+            version=self.data_version(workspace_id) + 1,
+            shipments=tuple(shipment for _, shipment in records),
+            cursors=tuple(cursor for cursor, _ in records),
+        )
+        # One assignment publishes the rows and their cursors together.
+        self._snapshots[workspace_id] = snapshot
+        return snapshot.version
+
+    def snapshot(self, workspace_id: str) -> ShipmentSnapshot:
+        return self._snapshots.get(workspace_id, _EMPTY_SNAPSHOT)
+
+    def purge_workspaces(self, workspace_ids: Iterable[str]) -> None:
+        for workspace_id in workspace_ids:
+            self._snapshots.pop(workspace_id, None)
+            self._lanes.pop(workspace_id, None)
+
+    def list_lanes(
+        self,
+        workspace_id: str,
+        *,
+        limit: int | None = None,
+    ) -> tuple[LaneAggregate, ...]:
+        lanes = self._lanes.get(workspace_id, ())
+        return lanes if limit is None else lanes[:limit]
+
+    def data_version(self, workspace_id: str) -> int:
+        return self._snapshots.get(workspace_id, _EMPTY_SNAPSHOT).version
 
     def list_for_workspace(self, workspace_id: str) -> tuple[NormalizedShipment, ...]:
-        return tuple(_clone(shipment) for shipment in self._shipments.get(workspace_id, ()))
+        return self.snapshot(workspace_id).shipments
+
+    def iter_for_workspace(
+        self,
+        workspace_id: str,
+        *,
+        after: ShipmentCursor | None = None,
+        limit: int | None = None,
+    ) -> Iterator[tuple[ShipmentCursor, NormalizedShipment]]:
+        snapshot = self._snapshots.get(workspace_id, _EMPTY_SNAPSHOT)
+        cursors, shipments = snapshot.cursors, snapshot.shipments
+        start = 0 if after is None else bisect_right(cursors, after)
+        stop = len(cursors) if limit is None else min(len(cursors), start + limit)
+        for index in range(start, stop):
+            yield cursors[index], shipments[index]
 
 
 class PostgresShipmentRepository:
@@ -62,22 +186,22 @@ class PostgresShipmentRepository:
         self.database_url = database_url
 
     def _connect(self):
-        return psycopg.connect(self.database_url)
+        return connect(self.database_url)
 
     def replace_for_workspace(
         self,
         workspace_id: str,
         shipments: tuple[NormalizedShipment, ...],
-    ) -> None:
-        with closing(self._connect()) as connection:
+    ) -> int:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
                 cursor.execute("DELETE FROM shipments WHERE workspace_id = %s", (workspace_id,))
                 cursor.executemany(
                     """
                     INSERT INTO shipments
                         (record_id, workspace_id, shipment_id, origin, destination,
-                         weight_kg, distance_km, transport_method, source_row)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                         weight_kg, distance_km, transport_method, source_row, distance_method)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     """,
                     [
                         (
@@ -90,19 +214,91 @@ class PostgresShipmentRepository:
                             shipment.distance_km,
                             shipment.transport_method,
                             shipment.source_row,
+                            shipment.distance_method,
                         )
                         for shipment in shipments
                     ],
                 )
+                cursor.execute(
+                    "DELETE FROM shipment_lanes WHERE workspace_id = %s", (workspace_id,)
+                )
+                cursor.executemany(
+                    """
+                    INSERT INTO shipment_lanes
+                        (workspace_id, origin_key, destination_key, transport_method, origin,
+                         destination, shipment_count, weight_kg, tonne_km, emissions_kg)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    [
+                        (
+                            workspace_id,
+                            *lane.key,
+                            lane.origin,
+                            lane.destination,
+                            lane.shipment_count,
+                            lane.weight_kg,
+                            lane.tonne_km,
+                            lane.emissions_kg,
+                        )
+                        for lane in aggregate_lanes(shipments)
+                    ],
+                )
+                version = bump_data_version(cursor, workspace_id, "shipments")
             connection.commit()
+        return version
 
-    def list_for_workspace(self, workspace_id: str) -> tuple[NormalizedShipment, ...]:
-        with closing(self._connect()) as connection:
+    def list_lanes(
+        self,
+        workspace_id: str,
+        *,
+        limit: int | None = None,
+    ) -> tuple[LaneAggregate, ...]:
+        """Read the lane table refreshed on upload, highest emitting lanes first."""
+
+        with self._connect() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT origin, destination, transport_method, shipment_count,
+                           weight_kg, tonne_km, emissions_kg
+                    FROM shipment_lanes
+                    WHERE workspace_id = %s
+                    ORDER BY emissions_kg DESC, origin_key, destination_key, transport_method
+                    LIMIT %s
+                    """,
+                    (workspace_id, limit),
+                )
+                rows = cursor.fetchall()
+        return tuple(
+            LaneAggregate(
+                origin=row[0],
+                destination=row[1],
+                transport_method=row[2],
+                shipment_count=row[3],
+                weight_kg=row[4],
+                tonne_km=row[5],
+                emissions_kg=row[6],
+            )
+            for row in rows
+        )
+
+    def data_version(self, workspace_id: str) -> int:
+        return read_data_version(self.database_url, workspace_id, "shipments")
+
+    def purge_workspaces(self, workspace_ids: Iterable[str]) -> None:
+        """Rows of purged workspaces are removed by ``ON DELETE CASCADE``."""
+
+    def snapshot(self, workspace_id: str) -> ShipmentSnapshot:
+        """Read the version and rows from one repeatable-read transaction."""
+
+        with self._connect() as connection:
             with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                version = fetch_data_version(cursor, workspace_id, "shipments")
                 cursor.execute(
                     """
                     SELECT shipment_id, origin, destination, weight_kg, distance_km,
-                           transport_method, source_row
+                           transport_method, source_row, distance_method
                     FROM shipments
                     WHERE workspace_id = %s
                     ORDER BY source_row, record_id
@@ -110,21 +306,235 @@ class PostgresShipmentRepository:
                     (workspace_id,),
                 )
                 rows = cursor.fetchall()
-        return tuple(
-            NormalizedShipment(
-                shipment_id=row[0],
-                origin=row[1],
-                destination=row[2],
-                weight_kg=row[3],
-                distance_km=row[4],
-                transport_method=row[5],
-                source_row=row[6],
-            )
-            for row in rows
+            connection.commit()
+        return ShipmentSnapshot(
+            version=version,
+            shipments=tuple(
+                NormalizedShipment(
+                    shipment_id=row[0],
+                    origin=row[1],
+                    destination=row[2],
+                    weight_kg=row[3],
+                    distance_km=row[4],
+                    transport_method=row[5],
+                    source_row=row[6],
+                    distance_method=row[7],
+                )
+                for row in rows
+            ),
+        )
+
+    def list_for_workspace(self, workspace_id: str) -> tuple[NormalizedShipment, ...]:
+        return tuple(shipment for _, shipment in self.iter_for_workspace(workspace_id))
+
+    def iter_for_workspace(
+        self,
+        workspace_id: str,
+        *,
+        after: ShipmentCursor | None = None,
+        limit: int | None = None,
+    ) -> Iterator[tuple[ShipmentCursor, NormalizedShipment]]:
+        """Yield rows after ``after`` in keyset pages of ``STREAM_BATCH_ROWS``.
+
+        Each page borrows a pooled connection only while it is read, so a slow
+        client draining a long export does not pin a connection between pages.
+        """
+
+        position = after or ShipmentCursor(source_row=0, record_id=_FIRST_RECORD_ID)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = min(remaining or STREAM_BATCH_ROWS, STREAM_BATCH_ROWS)
+            with self._connect() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT record_id, shipment_id, origin, destination, weight_kg,
+                               distance_km, transport_method, source_row, distance_method
+                        FROM shipments
+                        WHERE workspace_id = %s
+                          AND (source_row, record_id) > (%s, %s::uuid)
+                        ORDER BY source_row, record_id
+                        LIMIT %s
+                        """,
+                        (workspace_id, position.source_row, position.record_id, page_size),
+                    )
+                    rows = cursor.fetchall()
+            for row in rows:
+                position = ShipmentCursor(source_row=row[7], record_id=str(row[0]))
+                yield (
+                    position,
+                    NormalizedShipment(
+                        shipment_id=row[1],
+                        origin=row[2],
+                        destination=row[3],
+                        weight_kg=row[4],
+                        distance_km=row[5],
+                        transport_method=row[6],
+                        source_row=row[7],
+                        distance_method=row[8],
+                    ),
+                )
+            if len(rows) < page_size:
+                return
+            if remaining is not None:
+                remaining -= len(rows)
+
+
+class ColumnarShipmentRepository:
+    """Keep an Arrow table per workspace in front of a row repository.
+
+    Tables are rebuilt from an upload directly, or from the wrapped repository
+    when its data version moves on. With ``snapshot_dir`` each version is also
+    written as a Parquet file, so a restarted process reloads the columns
+    without reading the shipment rows again. At most ``cache_size`` tables are
+    held, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        repository: ShipmentRepository,
+        *,
+        snapshot_dir: str | os.PathLike[str] | None = None,
+        cache_size: int = COLUMNAR_CACHE_WORKSPACES,
+    ) -> None:
+        require_pyarrow()
+        self.repository = repository
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self._cache_size = cache_size
+        self._tables: OrderedDict[str, tuple[int, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def replace_for_workspace(
+        self,
+        workspace_id: str,
+        shipments: tuple[NormalizedShipment, ...],
+    ) -> int:
+        # The version comes from the write itself: reading it afterwards could
+        # label this table with the version of a concurrent upload.
+        version = self.repository.replace_for_workspace(workspace_id, shipments)
+        self._store(workspace_id, version, shipment_table(shipments))
+        return version
+
+    def list_for_workspace(self, workspace_id: str) -> tuple[NormalizedShipment, ...]:
+        return self.repository.list_for_workspace(workspace_id)
+
+    def iter_for_workspace(
+        self,
+        workspace_id: str,
+        *,
+        after: ShipmentCursor | None = None,
+        limit: int | None = None,
+    ) -> Iterator[tuple[ShipmentCursor, NormalizedShipment]]:
+        return self.repository.iter_for_workspace(workspace_id, after=after, limit=limit)
+
+    def list_lanes(
+        self,
+        workspace_id: str,
+        *,
+        limit: int | None = None,
+    ) -> tuple[LaneAggregate, ...]:
+        return self.repository.list_lanes(workspace_id, limit=limit)
+
+    def data_version(self, workspace_id: str) -> int:
+        return self.repository.data_version(workspace_id)
+
+    def snapshot(self, workspace_id: str) -> ShipmentSnapshot:
+        return self.repository.snapshot(workspace_id)
+
+    def purge_workspaces(self, workspace_ids: Iterable[str]) -> None:
+        """Drop cached tables and Parquet snapshots along with the rows."""
+
+        workspace_ids = tuple(workspace_ids)
+        self.repository.purge_workspaces(workspace_ids)
+        with self._lock:
+            for workspace_id in workspace_ids:
+                self._tables.pop(workspace_id, None)
+        if self.snapshot_dir is not None:
+            for workspace_id in workspace_ids:
+                shutil.rmtree(self.snapshot_dir / workspace_id, ignore_errors=True)
+
+    def shipment_table(self, workspace_id: str):
+        """Return the workspace shipments as an Arrow table for the current version."""
+
+        return self.versioned_table(workspace_id)[1]
+
+    def versioned_table(self, workspace_id: str) -> tuple[int, object]:
+        """Return the current data version together with the table built from it."""
+
+        version = self.repository.data_version(workspace_id)
+        with self._lock:
+            cached = self._tables.get(workspace_id)
+            if cached is not None and cached[0] == version:
+                self._tables.move_to_end(workspace_id)
+                return cached
+        path = self._snapshot_path(workspace_id, version)
+        if path is not None and path.exists():
+            table = pq.read_table(path)
+            # Snapshots written before a column was added are rebuilt from the rows.
+            if tuple(table.column_names) == SHIPMENT_COLUMNS:
+                self._store(workspace_id, version, table, write_snapshot=False)
+                return version, table
+        snapshot = self.repository.snapshot(workspace_id)
+        table = shipment_table(snapshot.shipments)
+        self._store(workspace_id, snapshot.version, table)
+        return snapshot.version, table
+
+    def _snapshot_path(self, workspace_id: str, version: int) -> Path | None:
+        if self.snapshot_dir is None:
+            return None
+        return self.snapshot_dir / workspace_id / f"shipments-{version}.parquet"
+
+    def _store(
+        self, workspace_id: str, version: int, table, *, write_snapshot: bool = True
+    ) -> None:
+        with self._lock:
+            cached = self._tables.get(workspace_id)
+            if cached is None or cached[0] <= version:
+                self._tables[workspace_id] = (version, table)
+                self._tables.move_to_end(workspace_id)
+            while len(self._tables) > self._cache_size:
+                self._tables.popitem(last=False)
+        path = self._snapshot_path(workspace_id, version)
+        if not write_snapshot or path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # A private temporary name, so processes sharing the directory never
+        # write into each other's partial file.
+        descriptor, partial_name = tempfile.mkstemp(
+            dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
         )
+        os.close(descriptor)
+        partial = Path(partial_name)
+        try:
+            pq.write_table(table, partial)
+            partial.replace(path)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        for stale in path.parent.glob("shipments-*.parquet"):
+            stale_version = stale.stem.removeprefix("shipments-")
+            if stale_version.isdigit() and int(stale_version) < version:
+                stale.unlink(missing_ok=True)
+
+
+def parse_shipment_store(value: str) -> str:
+    store = value.strip().lower() or "rows"
+    if store not in SHIPMENT_STORES:
+        raise ValueError("SHIPMENT_STORE must be 'rows' or 'columnar'.")
+    return store
 
 
-def build_shipment_repository(database_url: str | None) -> ShipmentRepository:
+def build_shipment_repository(
+    database_url: str | None,
+    *,
+    store: str = "rows",
+    snapshot_dir: str | None = None,
+) -> ShipmentRepository:
+    repository: ShipmentRepository
     if database_url:
-        return PostgresShipmentRepository(database_url)
-    return InMemoryShipmentRepository()
+        repository = PostgresShipmentRepository(database_url)
+    else:
+        repository = InMemoryShipmentRepository()
+    if parse_shipment_store(store) == "rows":
+        return repository
+    return ColumnarShipmentRepository(repository, snapshot_dir=snapshot_dir)
@@ -7,9 +7,13 @@ database; it is never selected when ``DATABASE_URL`` is present.
 
 from __future__ import annotations
 
+import atexit
+import logging
 import threading
-from contextlib import closing
+from collections.abc import Mapping
+from dataclasses import dataclass
 from datetime import UTC, date, datetime
+from enum import StrEnum
 from pathlib import Path
 from typing import Protocol
 
@@ -19,6 +23,7 @@ except ImportError:  # pragma: no cover - exercised only before optional local s
     psycopg = None
 
 from domain.workspaces.sessions import QuotaRecord, WorkspaceSession
+from persistence.database import connect, execute_hot, register_hot_query
 
 QUOTA_DEFAULTS = {
     "evidence_documents": 3,
@@ -26,8 +31,110 @@ QUOTA_DEFAULTS = {
     "assistant_requests_per_day": 3,
 }
 DAILY_QUOTAS = {"analysis_runs_per_day", "assistant_requests_per_day"}
+QUOTA_ACCOUNTING_MODES = ("direct", "write-behind")
+DEFAULT_QUOTA_FLUSH_INTERVAL_SECONDS = 2.0
+DEFAULT_QUOTA_MAX_UNFLUSHED = 5
 MIGRATIONS_DIR = Path(__file__).parent / "migrations"
 
+logger = logging.getLogger(__name__)
+
+_WORKSPACE_GET = register_hot_query(
+    "workspace_get",
+    """
+    SELECT w.issued_at, w.expires_at, r.expires_at, r.policy,
+           q.quota_key, q.used, q.quota_limit
+    FROM workspaces AS w
+    JOIN workspace_retention AS r USING (workspace_id)
+    JOIN workspace_quotas AS q USING (workspace_id)
+    WHERE w.workspace_id = %s
+      AND w.revoked_at IS NULL
+      AND w.expires_at > %s
+      AND r.expires_at > %s
+    ORDER BY q.quota_key
+    """,
+)
+# Resets stale daily periods, checks every requested quota, and increments them
+# all-or-nothing in one statement. Each requested key comes back with a reason
+# code so a refusal never needs a second lookup to explain itself.
+_QUOTA_CONSUME = register_hot_query(
+    "quota_consume",
+    """
+    WITH requested AS (
+        SELECT quota_key, amount
+        FROM unnest(%s::text[], %s::int[]) AS r(quota_key, amount)
+    ),
+    active AS (
+        SELECT w.workspace_id
+        FROM workspaces AS w
+        WHERE w.workspace_id = %s
+          AND w.revoked_at IS NULL
+          AND w.expires_at > CURRENT_TIMESTAMP
+    ),
+    locked AS (
+        SELECT q.quota_key, r.amount, q.quota_limit,
+               q.quota_key = ANY(%s::text[]) AND q.period_start < %s AS stale,
+               CASE
+                   WHEN q.quota_key = ANY(%s::text[]) AND q.period_start < %s THEN 0
+                   ELSE q.used
+               END AS used
+        FROM workspace_quotas AS q
+        JOIN active USING (workspace_id)
+        JOIN requested AS r USING (quota_key)
+        FOR UPDATE OF q
+    ),
+    decision AS (
+        SELECT COUNT(*) = (SELECT COUNT(*) FROM requested)
+               AND COALESCE(bool_and(used + amount <= quota_limit), FALSE) AS allowed
+        FROM locked
+    ),
+    updated AS (
+        UPDATE workspace_quotas AS q
+        SET used = c.used + c.amount,
+            period_start = CASE WHEN c.stale THEN %s ELSE q.period_start END
+        FROM locked AS c, decision
+        WHERE decision.allowed
+          AND q.workspace_id = %s
+          AND q.quota_key = c.quota_key
+        RETURNING q.quota_key, q.used, q.quota_limit
+    )
+    SELECT r.quota_key,
+           CASE
+               WHEN c.quota_key IS NULL THEN 'not_found'
+               WHEN u.quota_key IS NOT NULL THEN 'consumed'
+               WHEN c.used + c.amount > c.quota_limit THEN 'exhausted'
+               ELSE 'not_consumed'
+           END AS outcome,
+           COALESCE(u.used, c.used),
+           c.quota_limit
+    FROM requested AS r
+    LEFT JOIN locked AS c USING (quota_key)
+    LEFT JOIN updated AS u USING (quota_key)
+    """,
+)
+
+# Adds usage that was already served during ``period``. Daily counters that have
+# since moved to a later period are left alone, and no counter passes its limit.
+_QUOTA_ADD_USAGE = register_hot_query(
+    "quota_add_usage",
+    """
+    UPDATE workspace_quotas AS q
+    SET used = LEAST(q.used + r.amount, q.quota_limit)
+    FROM unnest(%s::text[], %s::int[]) AS r(quota_key, amount)
+    WHERE q.workspace_id = %s
+      AND q.quota_key = r.quota_key
+      AND (NOT q.quota_key = ANY(%s::text[]) OR q.period_start = %s)
+    """,
+)
+
+
+class QuotaOutcome(StrEnum):
+    """Per-quota reason code reported by a consumption attempt."""
+
+    CONSUMED = "consumed"
+    EXHAUSTED = "exhausted"
+    NOT_FOUND = "not_found"
+    NOT_CONSUMED = "not_consumed"
+
 
 class WorkspaceNotFoundError(LookupError):
     """Raised when a workspace record is missing, expired, or revoked."""
@@ -44,10 +151,24 @@ class WorkspaceRepository(Protocol):
 
     def revoke(self, workspace_id: str) -> None: ...
 
-    def purge_expired(self, *, now: int | None = None) -> int: ...
+    def purge_expired(self, *, now: int | None = None) -> tuple[str, ...]: ...
 
     def consume_quota(self, workspace_id: str, quota_key: str) -> QuotaRecord: ...
 
+    def consume_quotas(
+        self,
+        workspace_id: str,
+        amounts: Mapping[str, int],
+    ) -> dict[str, QuotaRecord]: ...
+
+    def add_quota_usage(
+        self,
+        workspace_id: str,
+        amounts: Mapping[str, int],
+        *,
+        period: date,
+    ) -> None: ...
+
 
 def _now_timestamp(now: int | None = None) -> int:
     return int(datetime.now(UTC).timestamp()) if now is None else now
@@ -61,6 +182,25 @@ def _date_for_timestamp(timestamp: int) -> date:
     return _utc_datetime(timestamp).date()
 
 
+def _validate_amounts(amounts: Mapping[str, int]) -> dict[str, int]:
+    if not amounts:
+        raise ValueError("At least one workspace quota must be consumed.")
+    for quota_key, amount in amounts.items():
+        if quota_key not in QUOTA_DEFAULTS:
+            raise ValueError(f"Unknown workspace quota: {quota_key}")
+        if amount < 1:
+            raise ValueError("Quota amounts must be positive.")
+    return dict(amounts)
+
+
+def _raise_for_outcomes(workspace_id: str, outcomes: Mapping[str, QuotaOutcome]) -> None:
+    if QuotaOutcome.NOT_FOUND in outcomes.values():
+        raise WorkspaceNotFoundError(workspace_id)
+    for quota_key, outcome in outcomes.items():
+        if outcome is QuotaOutcome.EXHAUSTED:
+            raise QuotaExceededError(quota_key)
+
+
 def _clone(session: WorkspaceSession) -> WorkspaceSession:
     return WorkspaceSession.from_payload(session.to_payload())
 
@@ -117,46 +257,98 @@ class InMemoryWorkspaceRepository:
         with self._lock:
             self._sessions.pop(workspace_id, None)
 
-    def purge_expired(self, *, now: int | None = None) -> int:
+    def purge_expired(self, *, now: int | None = None) -> tuple[str, ...]:
         timestamp = _now_timestamp(now)
         with self._lock:
-            expired = [
+            expired = tuple(
                 workspace_id
                 for workspace_id, session in self._sessions.items()
                 if session.is_expired(now=timestamp)
-            ]
+            )
             for workspace_id in expired:
                 self._sessions.pop(workspace_id, None)
-            return len(expired)
+            return expired
 
     def consume_quota(self, workspace_id: str, quota_key: str) -> QuotaRecord:
-        if quota_key not in QUOTA_DEFAULTS:
-            raise ValueError(f"Unknown workspace quota: {quota_key}")
+        return self.consume_quotas(workspace_id, {quota_key: 1})[quota_key]
+
+    def consume_quotas(
+        self,
+        workspace_id: str,
+        amounts: Mapping[str, int],
+    ) -> dict[str, QuotaRecord]:
+        amounts = _validate_amounts(amounts)
         timestamp = _now_timestamp()
         today = _date_for_timestamp(timestamp)
         with self._lock:
             session = self._sessions.get(workspace_id)
             if session is None or session.is_expired(now=timestamp):
                 raise WorkspaceNotFoundError(workspace_id)
-            quota = session.quotas[quota_key]
-            period_key = (workspace_id, quota_key)
-            if quota_key in DAILY_QUOTAS and self._period_starts[period_key] < today:
-                quota = QuotaRecord(used=0, limit=quota.limit)
-                self._period_starts[period_key] = today
-            if quota.used >= quota.limit:
-                raise QuotaExceededError(quota_key)
-            updated = QuotaRecord(used=quota.used + 1, limit=quota.limit)
-            quotas = dict(session.quotas)
-            quotas[quota_key] = updated
+            current: dict[str, QuotaRecord] = {}
+            for quota_key in amounts:
+                quota = session.quotas[quota_key]
+                if (
+                    quota_key in DAILY_QUOTAS
+                    and self._period_starts[(workspace_id, quota_key)] < today
+                ):
+                    quota = QuotaRecord(used=0, limit=quota.limit)
+                current[quota_key] = quota
+            _raise_for_outcomes(
+                workspace_id,
+                {
+                    quota_key: QuotaOutcome.EXHAUSTED
+                    if quota.used + amounts[quota_key] > quota.limit
+                    else QuotaOutcome.CONSUMED
+                    for quota_key, quota in current.items()
+                },
+            )
+            updated = {
+                quota_key: QuotaRecord(used=quota.used + amounts[quota_key], limit=quota.limit)
+                for quota_key, quota in current.items()
+            }
+            for quota_key in updated:
+                if quota_key in DAILY_QUOTAS:
+                    self._period_starts[(workspace_id, quota_key)] = today
             self._sessions[workspace_id] = WorkspaceSession(
                 workspace_id=session.workspace_id,
                 issued_at=session.issued_at,
                 expires_at=session.expires_at,
-                quotas=quotas,
+                quotas={**session.quotas, **updated},
                 retention=session.retention,
             )
             return updated
 
+    def add_quota_usage(
+        self,
+        workspace_id: str,
+        amounts: Mapping[str, int],
+        *,
+        period: date,
+    ) -> None:
+        amounts = _validate_amounts(amounts)
+        with self._lock:
+            session = self._sessions.get(workspace_id)
+            if session is None:
+                return
+            updated: dict[str, QuotaRecord] = {}
+            for quota_key, amount in amounts.items():
+                if (
+                    quota_key in DAILY_QUOTAS
+                    and self._period_starts[(workspace_id, quota_key)] != period
+                ):
+                    continue
+                quota = session.quotas[quota_key]
+                updated[quota_key] = QuotaRecord(
+                    used=min(quota.used + amount, quota.limit), limit=quota.limit
+                )
+            self._sessions[workspace_id] = WorkspaceSession(
+                workspace_id=session.workspace_id,
+                issued_at=session.issued_at,
+                expires_at=session.expires_at,
+                quotas={**session.quotas, **updated},
+                retention=session.retention,
+            )
+
 
 class PostgresWorkspaceRepository:
     """PostgreSQL implementation with transactional quota increments."""
@@ -168,11 +360,11 @@ class PostgresWorkspaceRepository:
         self.migrate()
 
     def _connect(self):
-        return psycopg.connect(self.database_url)
+        return connect(self.database_url)
 
     def migrate(self) -> None:
         migration_files = sorted(MIGRATIONS_DIR.glob("*.sql"))
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(
                     """
@@ -201,7 +393,7 @@ class PostgresWorkspaceRepository:
             connection.commit()
 
     def create(self, session: WorkspaceSession) -> None:
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(
                     """
@@ -247,21 +439,11 @@ class PostgresWorkspaceRepository:
 
     def get(self, workspace_id: str, *, now: int | None = None) -> WorkspaceSession | None:
         timestamp = _now_timestamp(now)
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT w.issued_at, w.expires_at, r.expires_at, r.policy,
-                           q.quota_key, q.used, q.quota_limit
-                    FROM workspaces AS w
-                    JOIN workspace_retention AS r USING (workspace_id)
-                    JOIN workspace_quotas AS q USING (workspace_id)
-                    WHERE w.workspace_id = %s
-                      AND w.revoked_at IS NULL
-                      AND w.expires_at > %s
-                      AND r.expires_at > %s
-                    ORDER BY q.quota_key
-                    """,
+                execute_hot(
+                    cursor,
+                    _WORKSPACE_GET,
                     (workspace_id, _utc_datetime(timestamp), _utc_datetime(timestamp)),
                 )
                 rows = cursor.fetchall()
@@ -281,7 +463,7 @@ class PostgresWorkspaceRepository:
         )
 
     def revoke(self, workspace_id: str) -> None:
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(
                     "UPDATE workspaces SET revoked_at = CURRENT_TIMESTAMP WHERE workspace_id = %s",
@@ -289,61 +471,347 @@ class PostgresWorkspaceRepository:
                 )
             connection.commit()
 
-    def purge_expired(self, *, now: int | None = None) -> int:
+    def purge_expired(self, *, now: int | None = None) -> tuple[str, ...]:
         timestamp = _now_timestamp(now)
-        with closing(self._connect()) as connection:
+        with self._connect() as connection:
             with connection.cursor() as cursor:
                 cursor.execute(
                     "DELETE FROM workspaces WHERE expires_at <= %s RETURNING workspace_id",
                     (_utc_datetime(timestamp),),
                 )
-                deleted = cursor.rowcount
+                deleted = tuple(row[0] for row in cursor.fetchall())
             connection.commit()
         return deleted
 
     def consume_quota(self, workspace_id: str, quota_key: str) -> QuotaRecord:
-        if quota_key not in QUOTA_DEFAULTS:
-            raise ValueError(f"Unknown workspace quota: {quota_key}")
+        return self.consume_quotas(workspace_id, {quota_key: 1})[quota_key]
+
+    def consume_quotas(
+        self,
+        workspace_id: str,
+        amounts: Mapping[str, int],
+    ) -> dict[str, QuotaRecord]:
+        amounts = _validate_amounts(amounts)
         today = _date_for_timestamp(_now_timestamp())
-        with closing(self._connect()) as connection:
+        daily = sorted(DAILY_QUOTAS)
+        with self._connect() as connection:
             with connection.cursor() as cursor:
-                if quota_key in DAILY_QUOTAS:
-                    cursor.execute(
-                        """
-                        UPDATE workspace_quotas
-                        SET used = 0, period_start = %s
-                        WHERE workspace_id = %s
-                          AND quota_key = %s
-                          AND period_start < %s
-                        """,
-                        (today, workspace_id, quota_key, today),
-                    )
-                cursor.execute(
-                    """
-                    UPDATE workspace_quotas AS q
-                    SET used = q.used + 1
-                    FROM workspaces AS w
-                    WHERE q.workspace_id = %s
-                      AND q.quota_key = %s
-                      AND q.used < q.quota_limit
-                      AND w.workspace_id = q.workspace_id
-                      AND w.revoked_at IS NULL
-                      AND w.expires_at > CURRENT_TIMESTAMP
-                    RETURNING q.used, q.quota_limit
-                    """,
-                    (workspace_id, quota_key),
+                execute_hot(
+                    cursor,
+                    _QUOTA_CONSUME,
+                    (
+                        list(amounts),
+                        list(amounts.values()),
+                        workspace_id,
+                        daily,
+                        today,
+                        daily,
+                        today,
+                        today,
+                        workspace_id,
+                    ),
+                )
+                rows = cursor.fetchall()
+            connection.commit()
+        _raise_for_outcomes(workspace_id, {row[0]: QuotaOutcome(row[1]) for row in rows})
+        return {row[0]: QuotaRecord(used=row[2], limit=row[3]) for row in rows}
+
+    def add_quota_usage(
+        self,
+        workspace_id: str,
+        amounts: Mapping[str, int],
+        *,
+        period: date,
+    ) -> None:
+        amounts = _validate_amounts(amounts)
+        with self._connect() as connection:
+            with connection.cursor() as cursor:
+                execute_hot(
+                    cursor,
+                    _QUOTA_ADD_USAGE,
+                    (
+                        list(amounts),
+                        list(amounts.values()),
+                        workspace_id,
+                        sorted(DAILY_QUOTAS),
+                        period,
+                    ),
                 )
-                row = cursor.fetchone()
-                if row is None:
-                    connection.rollback()
-                    if self.get(workspace_id) is None:
-                        raise WorkspaceNotFoundError(workspace_id)
-                    raise QuotaExceededError(quota_key)
             connection.commit()
-        return QuotaRecord(used=row[0], limit=row[1])
 
 
-def build_workspace_repository(database_url: str | None) -> WorkspaceRepository:
+@dataclass
+class _QuotaBucket:
+    confirmed: QuotaRecord
+    period: date
+    pending: int = 0
+    in_flight: int = 0
+    touched: bool = True
+
+    def record(self) -> QuotaRecord:
+        return QuotaRecord(
+            used=self.confirmed.used + self.in_flight + self.pending,
+            limit=self.confirmed.limit,
+        )
+
+
+class WriteBehindWorkspaceRepository:
+    """Enforces quotas from in-process counters and flushes them in batches.
+
+    The first consumption of a quota each day goes through the wrapped
+    repository, which resets the period and returns the confirmed usage.
+    Later consumptions are checked and counted locally, and a daemon thread
+    adds the pending counts to the wrapped repository every
+    ``flush_interval_seconds``.
+
+    A flush moves pending units to an in-flight count before writing them, so
+    concurrent flushes never send the same units twice, and restores them if
+    the write fails. Units left from an earlier day are written against that
+    day rather than charged to the current period.
+
+    A process never holds more than ``max_unflushed`` unconfirmed units per
+    workspace quota; reaching that bound flushes synchronously. A single process
+    enforces limits exactly. With ``n`` API processes a quota can be overshot by
+    at most ``n * max_unflushed`` units per period, and a crash forgets at most
+    ``max_unflushed`` units per quota.
+    """
+
+    def __init__(
+        self,
+        repository: WorkspaceRepository,
+        *,
+        flush_interval_seconds: float = DEFAULT_QUOTA_FLUSH_INTERVAL_SECONDS,
+        max_unflushed: int = DEFAULT_QUOTA_MAX_UNFLUSHED,
+    ) -> None:
+        if flush_interval_seconds <= 0 or max_unflushed < 1:
+            raise ValueError("Quota flush interval and unflushed bound must be positive.")
+        self.repository = repository
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_unflushed = max_unflushed
+        self._buckets: dict[tuple[str, str], _QuotaBucket] = {}
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._flusher: threading.Thread | None = None
+
+    def create(self, session: WorkspaceSession) -> None:
+        self.repository.create(session)
+
+    def get(self, workspace_id: str, *, now: int | None = None) -> WorkspaceSession | None:
+        session = self.repository.get(workspace_id, now=now)
+        if session is None:
+            return None
+        today = _date_for_timestamp(_now_timestamp(now))
+        with self._lock:
+            local = {
+                quota_key: (bucket.pending, bucket.record().used)
+                for (bucket_workspace, quota_key), bucket in self._buckets.items()
+                if bucket_workspace == workspace_id
+                and bucket.period == today
+                and (bucket.pending or bucket.in_flight)
+            }
+        if not local:
+            return session
+        quotas = dict(session.quotas)
+        # In-flight units may or may not be in the stored count yet; the local
+        # record covers them without counting them twice.
+        for quota_key, (pending, local_used) in local.items():
+            quota = quotas[quota_key]
+            quotas[quota_key] = QuotaRecord(
+                used=max(quota.used + pending, local_used),
+                limit=quota.limit,
+            )
+        return WorkspaceSession(
+            workspace_id=session.workspace_id,
+            issued_at=session.issued_at,
+            expires_at=session.expires_at,
+            quotas=quotas,
+            retention=session.retention,
+        )
+
+    def revoke(self, workspace_id: str) -> None:
+        self._drop_workspace(workspace_id)
+        self.repository.revoke(workspace_id)
+
+    def purge_expired(self, *, now: int | None = None) -> tuple[str, ...]:
+        return self.repository.purge_expired(now=now)
+
+    def consume_quota(self, workspace_id: str, quota_key: str) -> QuotaRecord:
+        return self.consume_quotas(workspace_id, {quota_key: 1})[quota_key]
+
+    def consume_quotas(
+        self,
+        workspace_id: str,
+        amounts: Mapping[str, int],
+    ) -> dict[str, QuotaRecord]:
+        amounts = _validate_amounts(amounts)
+        today = _date_for_timestamp(_now_timestamp())
+        self._start_flusher()
+        with self._lock:
+            buckets = {
+                quota_key: self._buckets.get((workspace_id, quota_key)) for quota_key in amounts
+            }
+            current = {
+                quota_key: bucket
+                for quota_key, bucket in buckets.items()
+                if bucket is not None and bucket.period == today
+            }
+            # Local usage never exceeds the true usage, so refusals need no round trip.
+            for quota_key, bucket in current.items():
+                if bucket.record().used + amounts[quota_key] > bucket.confirmed.limit:
+                    raise QuotaExceededError(quota_key)
+            if len(current) == len(amounts) and all(
+                bucket.pending + bucket.in_flight + amounts[quota_key] <= self.max_unflushed
+                for quota_key, bucket in current.items()
+            ):
+                for quota_key, bucket in current.items():
+                    bucket.pending += amounts[quota_key]
+                    bucket.touched = True
+                return {quota_key: bucket.record() for quota_key, bucket in current.items()}
+
+        self.flush(workspace_id)
+        try:
+            records = self.repository.consume_quotas(workspace_id, amounts)
+        except WorkspaceNotFoundError:
+            self._drop_workspace(workspace_id)
+            raise
+        with self._lock:
+            for quota_key, record in records.items():
+                self._confirm(workspace_id, quota_key, record, today)
+                self._buckets[(workspace_id, quota_key)].touched = True
+            return {
+                quota_key: self._buckets[(workspace_id, quota_key)].record()
+                for quota_key in records
+            }
+
+    def flush(self, workspace_id: str | None = None) -> None:
+        """Write pending counts to the wrapped repository and evict idle buckets."""
+
+        batches: dict[tuple[str, date], dict[str, tuple[_QuotaBucket, int]]] = {}
+        with self._lock:
+            for (bucket_workspace, quota_key), bucket in list(self._buckets.items()):
+                if workspace_id is not None and bucket_workspace != workspace_id:
+                    continue
+                if bucket.pending:
+                    batch = batches.setdefault((bucket_workspace, bucket.period), {})
+                    batch[quota_key] = (bucket, bucket.pending)
+                    bucket.in_flight += bucket.pending
+                    bucket.pending = 0
+                elif not bucket.touched and not bucket.in_flight:
+                    del self._buckets[(bucket_workspace, quota_key)]
+                bucket.touched = False
+        today = _date_for_timestamp(_now_timestamp())
+        for (batch_workspace, period), batch in batches.items():
+            self._flush_batch(batch_workspace, batch, current=period == today, period=period)
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval_seconds)
+        self.flush()
+
+    def _flush_batch(
+        self,
+        workspace_id: str,
+        batch: dict[str, tuple[_QuotaBucket, int]],
+        *,
+        current: bool,
+        period: date,
+    ) -> None:
+        amounts = {quota_key: amount for quota_key, (_, amount) in batch.items()}
+        records: dict[str, QuotaRecord] = {}
+        try:
+            if current:
+                records = self.repository.consume_quotas(workspace_id, amounts)
+            else:
+                self.repository.add_quota_usage(workspace_id, amounts, period=period)
+        except WorkspaceNotFoundError:
+            self._drop_workspace(workspace_id)
+            return
+        except QuotaExceededError:
+            if len(batch) > 1:
+                for quota_key, entry in batch.items():
+                    self._flush_batch(
+                        workspace_id, {quota_key: entry}, current=current, period=period
+                    )
+                return
+            # Another process used the remaining allowance first. The pending
+            # units were already served, so they are the bounded overshoot.
+            ((bucket, amount),) = batch.values()
+            with self._lock:
+                bucket.in_flight -= amount
+                limit = bucket.confirmed.limit
+                bucket.confirmed = QuotaRecord(used=limit, limit=limit)
+            return
+        except Exception:
+            with self._lock:
+                for bucket, amount in batch.values():
+                    bucket.in_flight -= amount
+                    bucket.pending += amount
+            raise
+        with self._lock:
+            for quota_key, (bucket, amount) in batch.items():
+                bucket.in_flight -= amount
+                record = records.get(quota_key)
+                if record is not None and record.used > bucket.confirmed.used:
+                    bucket.confirmed = record
+
+    def _confirm(self, workspace_id: str, quota_key: str, record: QuotaRecord, today: date) -> None:
+        bucket = self._buckets.get((workspace_id, quota_key))
+        if bucket is None or bucket.period != today:
+            self._buckets[(workspace_id, quota_key)] = _QuotaBucket(confirmed=record, period=today)
+        elif record.used > bucket.confirmed.used:
+            bucket.confirmed = record
+
+    def _drop_workspace(self, workspace_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._buckets if key[0] == workspace_id]:
+                del self._buckets[key]
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically,
+                    name="quota-write-behind",
+                    daemon=True,
+                )
+                self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Quota flush failed; pending usage will be retried.")
+
+
+def parse_quota_accounting(value: str) -> str:
+    mode = value.strip().lower() or "direct"
+    if mode not in QUOTA_ACCOUNTING_MODES:
+        raise ValueError("QUOTA_ACCOUNTING must be 'direct' or 'write-behind'.")
+    return mode
+
+
+def build_workspace_repository(
+    database_url: str | None,
+    *,
+    quota_accounting: str = "direct",
+    flush_interval_seconds: float = DEFAULT_QUOTA_FLUSH_INTERVAL_SECONDS,
+    max_unflushed: int = DEFAULT_QUOTA_MAX_UNFLUSHED,
+) -> WorkspaceRepository:
+    repository: WorkspaceRepository
     if database_url:
-        return PostgresWorkspaceRepository(database_url)
-    return InMemoryWorkspaceRepository()
+        repository = PostgresWorkspaceRepository(database_url)
+    else:
+        repository = InMemoryWorkspaceRepository()
+    if parse_quota_accounting(quota_accounting) == "direct":
+        return repository
+    buffered = WriteBehindWorkspaceRepository(
+        repository,
+        flush_interval_seconds=flush_interval_seconds,
+        max_unflushed=max_unflushed,
+    )
+    atexit.register(buffered.close)
+    return buffered
@@ -0,0 +1,134 @@
+"""Measure throughput and allocations of the agent input parser.
+
+Compares ``parse_agent_input`` with the previous implementation, which tried
+``json.loads`` on every message, compiled its patterns inline, split the
+message into words with ``re.findall``, and rebuilt its synonym map on each
+call. Run from ``nzeroesg-api``::
+
+    python -m scripts.benchmark_parser --calls 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import re
+import time
+import tracemalloc
+
+from agent.utils.parser_service import parse_agent_input
+
+MESSAGES = (
+    "Compare 2 tonnes from Edmonton to Calgary by rail and truck.",
+    "What are the emissions of 500 kg from Vancouver to Toronto by train?",
+    "Estimate 1,500 lbs from Montreal to Halifax by road, about 1,250 km.",
+    "How much CO2 does 20 mt from Shanghai to Rotterdam by ocean produce?",
+    "Calculate 800 kg from Chicago to Denver by truck and 3 t from Denver to Dallas by rail.",
+    '{"weight_value": 100, "distance_value": 250, "transport_method": ["train"]}',
+    "What does scope 3 category 4 cover for freight?",
+)
+
+
+def legacy_parse_agent_input(text: str) -> dict[str, object]:
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        parsed = None
+    if isinstance(parsed, dict):
+        return parsed
+
+    normalized = text.lower()
+    result: dict[str, object] = {}
+    weight_match = re.search(
+        r"(\d+(?:\.\d+)?)\s*(kg|kilograms|tons|tonnes|g|grams|gr)",
+        normalized,
+    )
+    if weight_match:
+        weight, unit = weight_match.groups()
+        weight = float(weight)
+        if "ton" in unit:
+            result["weight_value"] = weight * 1000
+        elif unit.startswith("g") and "kg" not in unit:
+            result["weight_value"] = weight / 1000
+        else:
+            result["weight_value"] = weight
+    route_match = re.search(
+        r"from\s+([a-z\s]+?)\s+to\s+([a-z\s]+?)(?:\s+by|\s+in|,|\.|\?|$)",
+        normalized,
+    )
+    if route_match:
+        result["origin"] = route_match.group(1).strip()
+        result["destination"] = route_match.group(2).strip()
+    synonym_map = {
+        "air": "plane",
+        "aerial": "plane",
+        "plane": "plane",
+        "rail": "train",
+        "train": "train",
+        "truck": "truck",
+        "road": "truck",
+        "lorry": "truck",
+        "van": "truck",
+        "ship": "ship",
+        "ocean": "ship",
+        "boat": "ship",
+    }
+    modes = []
+    for token in re.findall(r"\w+", normalized):
+        mode = synonym_map.get(token)
+        if mode and mode not in modes:
+            modes.append(mode)
+    if modes:
+        result["transport_method"] = modes
+    return result
+
+
+def measure(parse, calls: int) -> dict[str, float]:
+    for message in MESSAGES:
+        parse(message)
+    gc.collect()
+    started = time.perf_counter()
+    for call in range(calls):
+        parse(MESSAGES[call % len(MESSAGES)])
+    seconds = time.perf_counter() - started
+
+    # Largest transient allocation of a single call, including its result.
+    peak_bytes = 0
+    tracemalloc.start()
+    for message in MESSAGES:
+        parse(message)
+    for message in MESSAGES:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        parse(message)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_bytes = max(peak_bytes, peak - before)
+    tracemalloc.stop()
+    return {
+        "calls_per_second": round(calls / seconds),
+        "microseconds_per_call": round(seconds / calls * 1_000_000, 2),
+        "peak_bytes_per_call": peak_bytes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+    if args.calls < 1:
+        parser.error("--calls must be positive")
+
+    results = {
+        "calls": args.calls,
+        "legacy_parser": measure(legacy_parse_agent_input, args.calls),
+        "single_pass_parser": measure(parse_agent_input, args.calls),
+    }
+    before = results["legacy_parser"]["microseconds_per_call"]
+    after = results["single_pass_parser"]["microseconds_per_call"]
+    results["speedup"] = round(before / after, 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure memory and analysis throughput of slotted shipment records.
+
+Compares ``NormalizedShipment`` with an otherwise identical frozen dataclass
+that keeps a per-instance ``__dict__``, the layout used before records were
+slotted. Run from ``nzeroesg-api``::
+
+    python -m scripts.benchmark_records --rows 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+
+from domain.shipments.analysis import analyze_shipments
+from domain.shipments.models import NormalizedShipment
+
+_MODES = ("truck", "train", "plane", "ship")
+
+DictShipment = make_dataclass(
+    "DictShipment",
+    [(field.name, field.type) for field in fields(NormalizedShipment)],
+    frozen=True,
+)
+
+
+def _build(record_type: type, rows: int) -> list:
+    return [
+        record_type(
+            shipment_id=f"S-{row:07d}",
+            origin="Edmonton",
+            destination="Calgary",
+            weight_kg=float(row % 900 + 100),
+            distance_km=float(row % 2_000 + 50),
+            transport_method=_MODES[row % len(_MODES)],
+            source_row=row + 2,
+        )
+        for row in range(rows)
+    ]
+
+
+def measure(record_type: type, rows: int) -> dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    records = _build(record_type, rows)
+    build_seconds = time.perf_counter() - started
+    record_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    analysis = analyze_shipments(records)
+    analysis_seconds = time.perf_counter() - started
+    if analysis.shipment_count != rows:
+        raise RuntimeError("Analysis did not read every benchmark row.")
+    return {
+        "bytes_per_row": round(record_bytes / rows, 1),
+        "build_rows_per_second": round(rows / build_seconds),
+        "analysis_rows_per_second": round(rows / analysis_seconds),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    if args.rows < 1:
+        parser.error("--rows must be positive")
+
+    results = {
+        "rows": args.rows,
+        "dict_records": measure(DictShipment, args.rows),
+        "slotted_records": measure(NormalizedShipment, args.rows),
+    }
+    before = results["dict_records"]["bytes_per_row"]
+    after = results["slotted_records"]["bytes_per_row"]
+    results["memory_saved_percent"] = round((1 - after / before) * 100, 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from pathlib import Path
 from domain.evidence.evaluation import (
     RetrievalEvaluationCase,
     RetrievalEvaluationResult,
+    compare_retrieval,
     evaluate_retrieval,
 )
 
@@ -52,14 +53,24 @@ def main() -> None:
     parser.add_argument("results", type=Path)
     parser.add_argument("--cases", type=Path, default=DEFAULT_CASES)
     parser.add_argument("--k", type=int, default=5)
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="Report recall impact against another capture, e.g. full-precision storage.",
+    )
     args = parser.parse_args()
 
-    metrics = evaluate_retrieval(
-        _load_cases(args.cases),
-        _load_results(args.results),
-        k=args.k,
-    )
-    print(json.dumps(metrics.to_dict(), indent=2, sort_keys=True))
+    cases = _load_cases(args.cases)
+    if args.baseline:
+        report = compare_retrieval(
+            cases,
+            _load_results(args.baseline),
+            _load_results(args.results),
+            k=args.k,
+        ).to_dict()
+    else:
+        report = evaluate_retrieval(cases, _load_results(args.results), k=args.k).to_dict()
+    print(json.dumps(report, indent=2, sort_keys=True))
 
 
 if __name__ == "__main__":
@@ -14,6 +14,7 @@ from domain.evidence.embeddings import EmbeddingAdapter, build_embedding_adapter
 from domain.evidence.evaluation import RetrievalEvaluationCase, RetrievalEvaluationResult
 from domain.evidence.ingestion import extract_evidence
 from domain.evidence.models import EvidenceMatch, SupplierMetadata
+from domain.evidence.quantization import EmbeddingStorage
 from domain.evidence.retrieval import RetrievalMode, reciprocal_rank_fusion
 from domain.workspaces.sessions import SessionSigner
 from persistence.evidence import PostgresEvidenceRepository
@@ -124,6 +125,7 @@ def capture_results(
     cases: tuple[RetrievalEvaluationCase, ...],
     corpus: tuple[CorpusRecord, ...],
     provider_cost_usd: float,
+    storage: EmbeddingStorage = EmbeddingStorage.FULL,
 ) -> dict[str, object]:
     if provider_cost_usd < 0:
         raise ValueError("Provider cost cannot be negative.")
@@ -139,7 +141,7 @@ def capture_results(
 
     adapter = _embedding_adapter(mode)
     workspace_repository = build_workspace_repository(database_url)
-    evidence_repository = PostgresEvidenceRepository(database_url)
+    evidence_repository = PostgresEvidenceRepository(database_url, storage=storage)
     signer = SessionSigner(
         "carbonsage-retrieval-evaluation-only-secret",
         ttl_seconds=3_600,
@@ -210,6 +212,7 @@ def capture_results(
                 "provider": adapter.spec.provider if adapter else None,
                 "model": adapter.spec.model if adapter else None,
                 "dimensions": adapter.spec.dimensions if adapter else None,
+                "storage": storage.value,
                 "corpus_size": len(corpus),
                 "case_count": len(cases),
                 "indexing_latency_ms": round(indexing_latency_ms, 3),
@@ -228,6 +231,11 @@ def main() -> None:
     parser.add_argument("--cases", type=Path, default=DEFAULT_CASES)
     parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
     parser.add_argument("--provider-cost-usd", type=float, default=0.0)
+    parser.add_argument(
+        "--storage",
+        choices=tuple(EmbeddingStorage),
+        default=EmbeddingStorage.FULL.value,
+    )
     parser.add_argument("--output", type=Path, required=True)
     args = parser.parse_args()
     if not args.database_url:
@@ -239,6 +247,7 @@ def main() -> None:
         cases=_load_cases(args.cases),
         corpus=_load_corpus(args.corpus),
         provider_cost_usd=args.provider_cost_usd,
+        storage=EmbeddingStorage(args.storage),
     )
     args.output.parent.mkdir(parents=True, exist_ok=True)
     args.output.write_text(json.dumps(captured, indent=2) + "\n", encoding="utf-8")
@@ -1,7 +1,14 @@
+import json
+from dataclasses import replace
+
 import pytest
 from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessageChunk
 
+import api.emissions as emissions_api
 import api.evidence as evidence_api
+import api.reports as reports
+import api.routes as routes
 from domain.evidence.embeddings import (
     EMBEDDING_DIMENSIONS,
     EmbeddingProviderError,
@@ -102,6 +109,191 @@ def test_disabled_assistant_has_an_explicit_response():
     )
 
 
+class StreamingFixtureAgent:
+    completions = (
+        (
+            "select-tool",
+            ('Thought: compare modes\nAction:\n```\n{"action": "OptionComparer", ', "}\n```"),
+        ),
+        (
+            "final-answer",
+            (
+                'Thought: done\nAction:\n```\n{"action": "Final Answer", "action_input": "Tr',
+                'ain \\"',
+                "",
+                'rail\\u00e9\\" is lowest."}\n```',
+            ),
+        ),
+    )
+
+    async def astream_events(self, payload, version):
+        assert version == "v2"
+        yield {"event": "on_chain_start", "name": "AgentExecutor", "parent_ids": [], "data": {}}
+        yield {
+            "event": "on_tool_start",
+            "name": "OptionComparer",
+            "parent_ids": ["run"],
+            "data": {"input": {"weight_value": 1_000}},
+        }
+        yield {
+            "event": "on_tool_end",
+            "name": "OptionComparer",
+            "parent_ids": ["run"],
+            "data": {"output": {"lowest_emissions_method": "train"}},
+        }
+        for run_id, chunks in self.completions:
+            for text in chunks:
+                yield {
+                    "event": "on_chat_model_stream",
+                    "name": "ChatOpenAI",
+                    "run_id": run_id,
+                    "parent_ids": ["run"],
+                    "data": {"chunk": AIMessageChunk(content=text)},
+                }
+        yield {
+            "event": "on_chain_end",
+            "name": "AgentExecutor",
+            "parent_ids": [],
+            "data": {"output": {"output": "Train is lowest."}},
+        }
+
+
+def test_chat_stream_forwards_tools_and_tokens_then_a_summary(monkeypatch):
+    import agent
+
+    monkeypatch.setattr(routes, "settings", replace(routes.settings, assistant_enabled=True))
+    monkeypatch.setattr(agent, "get_agent", StreamingFixtureAgent)
+
+    response = client.post("/chat/stream", json={"message": "Compare rail and air."})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("data: ", 1)[1]))
+        for block in response.text.strip().split("\n\n")
+    ]
+    assert [name for name, _ in events] == ["tool_start", "tool_end"] + ["token"] * 3 + ["done"]
+    assert events[1][1]["output"] == {"lowest_emissions_method": "train"}
+    tokens = "".join(data["text"] for name, data in events if name == "token")
+    assert tokens == 'Train "rail\u00e9" is lowest.'
+    assert events[-1][1]["reply"] == "Train is lowest."
+    assert isinstance(events[-1][1]["processing_time_ms"], int)
+
+
+def test_chat_stream_reports_provider_failures_as_an_error_event(monkeypatch):
+    import agent
+
+    class FailingAgent(StreamingFixtureAgent):
+        async def astream_events(self, payload, version):
+            async for event in super().astream_events(payload, version):
+                yield event
+                if event["event"] == "on_tool_end":
+                    raise RuntimeError("provider disconnected")
+
+    monkeypatch.setattr(routes, "settings", replace(routes.settings, assistant_enabled=True))
+    monkeypatch.setattr(agent, "get_agent", FailingAgent)
+
+    response = client.post("/chat/stream", json={"message": "Compare rail and air."})
+
+    assert response.status_code == 200
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert [lines[0] for lines in events] == [
+        "event: tool_start",
+        "event: tool_end",
+        "event: error",
+    ]
+    assert json.loads(events[-1][1].removeprefix("data: ")) == {
+        "detail": "The assistant provider is temporarily unavailable."
+    }
+
+
+def test_structured_chat_questions_skip_the_agent(monkeypatch):
+    import agent
+
+    def unexpected_agent():
+        raise AssertionError("The fast path should not build the agent.")
+
+    monkeypatch.setattr(routes, "settings", replace(routes.settings, assistant_enabled=True))
+    monkeypatch.setattr(agent, "get_agent", unexpected_agent)
+
+    response = client.post(
+        "/chat",
+        json={"message": "What are the emissions of 500 kg from Edmonton to Calgary by train?"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["reply"].startswith(
+        "Shipping 500 kg from Edmonton to Calgary by train emits an estimated"
+    )
+
+
+def test_repeated_structured_questions_reuse_the_agent_reply(monkeypatch):
+    import agent
+    import agent.response_cache as response_cache
+
+    calls = []
+
+    class CountingAgent:
+        async def ainvoke(self, payload):
+            calls.append(payload["input"])
+            return {"output": "Rail is lower for this lane."}
+
+    monkeypatch.setattr(routes, "settings", replace(routes.settings, assistant_enabled=True))
+    monkeypatch.setattr(agent, "get_agent", CountingAgent)
+    monkeypatch.setattr(response_cache, "_cache", response_cache.ReplyCache())
+
+    messages = (
+        "Compare 2 tonnes from Edmonton to Smallville by truck and rail.",
+        "compare emissions, 2000 kg from edmonton to smallville, rail vs truck",
+    )
+    replies = [client.post("/chat", json={"message": message}).json() for message in messages]
+
+    assert [reply["reply"] for reply in replies] == ["Rail is lower for this lane."] * 2
+    assert calls == [messages[0]]
+
+    monkeypatch.setattr(
+        routes,
+        "settings",
+        replace(routes.settings, assistant_enabled=True, assistant_reply_cache=False),
+    )
+    client.post("/chat", json={"message": messages[0]})
+    assert len(calls) == 2
+
+
+def test_chat_parses_each_message_once(monkeypatch):
+    import agent
+    import agent.fast_path as fast_path
+    import agent.response_cache as response_cache
+
+    class FixtureAgent:
+        async def ainvoke(self, payload):
+            return {"output": "Rail is lower for this lane."}
+
+    parsed = []
+    parse_question = fast_path.parse_question
+
+    def counting_parse(message):
+        parsed.append(message)
+        return parse_question(message)
+
+    monkeypatch.setattr(routes, "settings", replace(routes.settings, assistant_enabled=True))
+    monkeypatch.setattr(agent, "get_agent", FixtureAgent)
+    monkeypatch.setattr(response_cache, "_cache", response_cache.ReplyCache())
+    monkeypatch.setattr(fast_path, "parse_question", counting_parse)
+
+    message = "Compare 2 tonnes from Edmonton to Smallville by truck and rail."
+    client.post("/chat", json={"message": message})
+    client.post("/chat/stream", json={"message": message})
+
+    assert parsed == [message, message]
+
+
+def test_disabled_assistant_refuses_to_stream():
+    response = client.post("/chat/stream", json={"message": "Compare rail and air."})
+
+    assert response.status_code == 503
+
+
 def test_chat_request_is_validated_before_provider_work():
     response = client.post("/chat", json={"message": ""})
 
@@ -148,6 +340,69 @@ def test_deterministic_comparison_endpoint_orders_modes_and_exposes_warnings():
     assert payload["details"]["ship"]["warnings"]
 
 
+def test_batch_emissions_endpoint_reports_per_item_results_for_one_quota_unit():
+    demo_client = authenticated_client()
+    item = {
+        "weight_value": 1,
+        "weight_unit": "mt",
+        "distance_value": 100,
+        "transport_method": "train",
+    }
+
+    array_response = demo_client.post(
+        "/emissions/calculate/batch",
+        json=[item] * 3 + [{**item, "transport_method": "submarine"}],
+    )
+    ndjson_response = demo_client.post(
+        "/emissions/calculate/batch",
+        content=f"{json.dumps(item)}\n\n{{not json\n"
+        + json.dumps({**item, "weight_value": float("inf")}),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert array_response.status_code == 200
+    payload = array_response.json()
+    assert (payload["item_count"], payload["succeeded"], payload["failed"]) == (4, 3, 1)
+    assert payload["items"][0]["result"]["emissions_kg"] == 2.2
+    assert payload["items"][3]["index"] == 3
+    assert payload["items"][3]["error"].startswith("transport_method:")
+    assert ndjson_response.status_code == 200
+    ndjson_items = ndjson_response.json()["items"]
+    assert [entry["error"] is None for entry in ndjson_items] == [True, False, False]
+    assert ndjson_items[0]["result"] == payload["items"][0]["result"]
+    assert ndjson_items[2]["error"] == "Weight must be a finite positive number"
+    quota = demo_client.get("/demo/session").json()["quotas"]["analysis_runs_per_day"]
+    assert quota == {"used": 2, "limit": 10}
+    assert demo_client.post("/emissions/calculate/batch", json=item).status_code == 422
+
+
+def test_batch_emissions_endpoint_refuses_oversized_bodies_while_reading(monkeypatch):
+    demo_client = authenticated_client()
+    monkeypatch.setattr(emissions_api, "MAX_BATCH_BYTES", 64)
+    line = json.dumps({"weight_value": 1, "distance_value": 100, "transport_method": "train"})
+
+    def chunks():
+        for _ in range(4):
+            yield f"{line}\n".encode()
+
+    declared = demo_client.post(
+        "/emissions/calculate/batch",
+        content=f"{line}\n",
+        headers={"Content-Type": "application/x-ndjson", "Content-Length": "65"},
+    )
+    streamed = demo_client.post(
+        "/emissions/calculate/batch",
+        content=chunks(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert declared.status_code == 413
+    assert streamed.status_code == 413
+    assert streamed.json()["detail"] == "Batch bodies are limited to 64 bytes."
+    quota = demo_client.get("/demo/session").json()["quotas"]["analysis_runs_per_day"]
+    assert quota["used"] == 0
+
+
 def test_emissions_endpoint_rejects_direct_calls_without_workspace_session():
     response = TestClient(app).post(
         "/emissions/calculate",
@@ -263,6 +518,46 @@ def test_shipment_records_are_workspace_isolated():
     assert second_client.get("/shipments").json()["accepted_rows"] == 0
 
 
+def test_shipment_rows_stream_as_ndjson_with_keyset_pagination():
+    demo_client = authenticated_client()
+    csv_content = (
+        "shipment_id,origin,destination,weight_value,weight_unit,distance_value,"
+        "distance_unit,transport_method\n"
+        "S-001,Edmonton,Calgary,1,mt,100,km,truck\n"
+        "S-002,Calgary,Regina,2,mt,700,km,train\n"
+        "S-003,Regina,Winnipeg,3,mt,570,km,truck\n"
+    )
+    demo_client.post(
+        "/shipments/upload",
+        files={"file": ("shipments.csv", csv_content, "text/csv")},
+    )
+
+    first_page = demo_client.get("/shipments/rows", params={"limit": 2})
+    first_rows = [json.loads(line) for line in first_page.text.splitlines()]
+    rest = demo_client.get("/shipments/rows", params={"after": first_rows[-1]["cursor"]})
+
+    assert first_page.status_code == 200
+    assert first_page.headers["content-type"] == "application/x-ndjson"
+    assert [row["shipment_id"] for row in first_rows] == ["S-001", "S-002"]
+    assert [json.loads(line)["shipment_id"] for line in rest.text.splitlines()] == ["S-003"]
+    assert demo_client.get("/shipments/rows", params={"after": "bad"}).status_code == 422
+
+
+def test_shipment_lanes_return_top_lanes_and_scenario_deltas():
+    demo_client = authenticated_client()
+    _upload_demo_shipments(demo_client)
+
+    lanes = demo_client.get("/shipments/lanes")
+    deltas = demo_client.get("/shipments/lanes", params={"alternative_mode": "train"})
+    invalid = demo_client.get("/shipments/lanes", params={"alternative_mode": "submarine"})
+
+    assert lanes.status_code == 200
+    assert lanes.json()["lanes"][0]["emissions_kg"] == 6.2
+    assert lanes.json()["scenario_deltas"] is None
+    assert deltas.json()["scenario_deltas"][0]["delta_kg"] == -4.0
+    assert invalid.status_code == 422
+
+
 def test_shipment_upload_requires_a_workspace_session():
     response = TestClient(app).post(
         "/shipments/upload",
@@ -485,6 +780,31 @@ def test_scenario_comparison_reconciles_with_the_stored_shipment_analysis():
     assert payload["shipment_results"][0]["delta_kg"] == -4.0
 
 
+def test_scenario_sweep_ranks_requested_scenarios_for_one_analysis_run():
+    demo_client = authenticated_client()
+    _upload_demo_shipments(demo_client)
+
+    response = demo_client.post(
+        "/scenarios/sweep",
+        json={
+            "scenarios": [
+                {"alternative_transport_method": "plane"},
+                {"alternative_transport_method": "train", "shift_percent": 50},
+                {"alternative_transport_method": "train", "min_distance_km": 500},
+            ]
+        },
+    )
+    session = demo_client.get("/demo/session").json()
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["baseline_total_kg"] == 6.2
+    assert [result["total_kg"] for result in payload["results"]] == [4.2, 6.2, 60.2]
+    assert payload["results"][0]["label"] == "50% to train"
+    assert payload["results"][1]["eligible_shipment_count"] == 0
+    assert session["quotas"]["analysis_runs_per_day"]["used"] == 2
+
+
 def test_report_preview_and_csv_export_share_current_workspace_state():
     demo_client = authenticated_client()
     _upload_demo_shipments(demo_client)
@@ -501,6 +821,155 @@ def test_report_preview_and_csv_export_share_current_workspace_state():
     assert "scenario,alternative_total_kg,2.2" in export.text
 
 
+def test_csv_export_streams_shipment_detail_rows_gzipped_when_accepted():
+    demo_client = authenticated_client()
+    _upload_demo_shipments(demo_client)
+
+    export = demo_client.get(
+        "/reports/export.csv",
+        params={"alternative_mode": "train", "detail": True},
+        headers={"Accept-Encoding": "br;q=1.0, gzip;q=0.8"},
+    )
+    identity = demo_client.get(
+        "/reports/export.csv",
+        params={"alternative_mode": "train", "detail": True},
+        headers={"Accept-Encoding": "gzip;q=0, identity"},
+    )
+
+    assert export.status_code == 200
+    assert export.headers["content-encoding"] == "gzip"
+    assert export.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] != export.headers["etag"]
+    assert identity.text == export.text
+    assert "shipment_analysis,total_emissions_kg,6.2" in export.text
+    assert "shipment:2,shipment_id,S-001" in export.text
+    assert "shipment:2,emissions_kg,6.2" in export.text
+    assert "shipment:2,factor_version,prototype-2026.1" in export.text
+    assert "shipment:2,alternative_emissions_kg,2.2" in export.text
+
+
+def test_csv_detail_export_pages_shipments_without_materializing_a_snapshot(monkeypatch):
+    demo_client = authenticated_client()
+    csv_content = (
+        "shipment_id,origin,destination,weight_value,weight_unit,distance_value,"
+        "distance_unit,transport_method\n"
+    ) + "".join(f"S-{row},Edmonton,Calgary,1,mt,100,km,truck\n" for row in range(1, 6))
+    upload = demo_client.post(
+        "/shipments/upload", files={"file": ("shipments.csv", csv_content, "text/csv")}
+    )
+    assert upload.status_code == 200
+    demo_client.get("/reports/export.csv")
+
+    def unexpected_snapshot(workspace_id):
+        raise AssertionError("Detail exports must not materialize the shipment snapshot.")
+
+    repository = reports.shipment_repository
+    monkeypatch.setattr(repository, "snapshot", unexpected_snapshot)
+    monkeypatch.setattr(reports, "STREAM_BATCH_ROWS", 2)
+    export = demo_client.get("/reports/export.csv", params={"detail": True})
+
+    assert export.status_code == 200
+    assert all(f"shipment:{row},shipment_id,S-{row - 1}" in export.text for row in range(2, 7))
+    assert "detail_truncated" not in export.text
+
+    pages = []
+    iter_for_workspace, data_version = repository.iter_for_workspace, repository.data_version
+
+    def paged(workspace_id, **options):
+        pages.append(options["after"])
+        return iter_for_workspace(workspace_id, **options)
+
+    monkeypatch.setattr(repository, "iter_for_workspace", paged)
+    monkeypatch.setattr(
+        repository,
+        "data_version",
+        lambda workspace_id: data_version(workspace_id) + (len(pages) > 1),
+    )
+    changed = demo_client.get("/reports/export.csv", params={"detail": True})
+
+    assert "shipment:3,shipment_id,S-2" in changed.text
+    assert "shipment:4,shipment_id" not in changed.text
+    assert "report,detail_truncated,Shipments changed during the export." in changed.text
+
+
+def test_stored_straight_line_distances_keep_their_method_after_upload():
+    demo_client = authenticated_client()
+    upload = demo_client.post(
+        "/shipments/upload",
+        files={
+            "file": (
+                "shipments.csv",
+                "shipment_id,origin,destination,weight_value,weight_unit,distance_value,"
+                "distance_unit,transport_method\n"
+                "S-001,Edmonton,Paris,1,mt,,km,truck\n",
+                "text/csv",
+            )
+        },
+    )
+    export = demo_client.get("/reports/export.csv", params={"detail": True})
+    preview = demo_client.get("/reports/preview")
+
+    assert upload.status_code == 200
+    assert "shipment:2,distance_method,straight_line" in export.text
+    assert any(
+        warning.startswith("Straight-line fallback distance")
+        for warning in preview.json()["methodology"]["warnings"]
+    )
+
+
+def test_report_snapshots_return_not_modified_until_workspace_data_changes():
+    demo_client = authenticated_client()
+    _upload_demo_shipments(demo_client)
+
+    preview = demo_client.get("/reports/preview", params={"alternative_mode": "train"})
+    etag = preview.headers["etag"]
+    unchanged = demo_client.get(
+        "/reports/preview",
+        params={"alternative_mode": "train"},
+        headers={"If-None-Match": etag},
+    )
+    other_mode = demo_client.get(
+        "/reports/preview",
+        params={"alternative_mode": "truck"},
+        headers={"If-None-Match": etag},
+    )
+    export = demo_client.get("/reports/export.csv", params={"alternative_mode": "train"})
+    _upload_demo_shipments(demo_client)
+    changed = demo_client.get(
+        "/reports/preview",
+        params={"alternative_mode": "train"},
+        headers={"If-None-Match": etag},
+    )
+
+    assert preview.headers["cache-control"] == "private, no-cache"
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == etag
+    assert unchanged.content == b""
+    assert other_mode.status_code == 200
+    assert export.headers["etag"] != etag
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["shipment_analysis"]["total_emissions_kg"] == 6.2
+
+
+def test_report_snapshots_are_bounded_by_cached_scenario_rows(monkeypatch):
+    demo_client = authenticated_client()
+    _upload_demo_shipments(demo_client)
+    monkeypatch.setattr(reports, "REPORT_SNAPSHOT_ROW_LIMIT", 0)
+
+    preview = demo_client.get("/reports/preview", params={"alternative_mode": "train"})
+    export = demo_client.get("/reports/export.csv", params={"alternative_mode": "train"})
+    cached = [snapshot for key, snapshot in reports._snapshots.items() if key[-1] == "train"]
+
+    assert preview.json()["scenario"]["shipment_results"]
+    assert export.status_code == 200
+    assert all(snapshot.cached_rows == 0 for snapshot in cached)
+    assert reports._snapshot_rows == sum(
+        snapshot.cached_rows for snapshot in reports._snapshots.values()
+    )
+
+
 def test_scenario_and_report_routes_require_a_workspace_session():
     response = TestClient(app).post(
         "/scenarios/compare",
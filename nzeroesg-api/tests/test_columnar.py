@@ -0,0 +1,112 @@
+import pytest
+
+from domain.scenarios.comparison import compare_shipment_modes
+from domain.scenarios.sweep import ScenarioSpec, sweep_shipment_scenarios
+from domain.shipments.analysis import analyze_shipments
+from domain.shipments.models import NormalizedShipment
+from persistence.shipments import (
+    ColumnarShipmentRepository,
+    InMemoryShipmentRepository,
+    build_shipment_repository,
+)
+
+pytest.importorskip("pyarrow")
+
+from domain.shipments.columnar import (  # noqa: E402
+    analyze_shipment_table,
+    compare_shipment_table,
+    iter_table_shipments,
+    shipment_table,
+    sweep_shipment_table,
+)
+
+SHIPMENTS = tuple(
+    NormalizedShipment(
+        shipment_id=f"S-{row:03d}",
+        origin="Edmonton" if row % 2 else "Calgary",
+        destination="Vancouver",
+        weight_kg=250.0 * (row % 5 + 1),
+        distance_km=90.0 * (row % 7 + 1),
+        transport_method=("truck", "train", "plane", "ship")[row % 4],
+        source_row=row,
+        distance_method="straight_line" if row % 9 == 0 else "route",
+    )
+    for row in range(2, 40)
+)
+
+
+def test_columnar_kernels_match_row_analysis_and_scenarios():
+    table = shipment_table(SHIPMENTS, batch_rows=16)
+    scenarios = (
+        ScenarioSpec(alternative_mode="train"),
+        ScenarioSpec(alternative_mode="ship", shift_share=0.25, min_distance_km=300),
+        ScenarioSpec(alternative_mode="truck", min_distance_km=200, min_weight_kg=500),
+    )
+
+    assert table.num_rows == len(SHIPMENTS)
+    assert len(table.to_batches()) == 3
+    assert tuple(iter_table_shipments(table)) == SHIPMENTS
+    assert analyze_shipment_table(table) == analyze_shipments(SHIPMENTS)
+    assert compare_shipment_table(table, alternative_mode="rail") == compare_shipment_modes(
+        SHIPMENTS, alternative_mode="rail"
+    )
+    assert sweep_shipment_table(table, scenarios) == sweep_shipment_scenarios(SHIPMENTS, scenarios)
+    assert analyze_shipment_table(shipment_table(())).shipment_count == 0
+
+
+def test_columnar_repository_tracks_versions_and_reloads_parquet_snapshots(tmp_path):
+    inner = InMemoryShipmentRepository()
+    repository = ColumnarShipmentRepository(inner, snapshot_dir=tmp_path)
+
+    repository.replace_for_workspace("workspace-a", SHIPMENTS)
+    first = repository.shipment_table("workspace-a")
+    inner.replace_for_workspace("workspace-a", SHIPMENTS[:3])
+    refreshed = repository.shipment_table("workspace-a")
+    restarted = ColumnarShipmentRepository(inner, snapshot_dir=tmp_path)
+
+    assert first.num_rows == len(SHIPMENTS)
+    assert refreshed.num_rows == 3
+    assert sorted(path.name for path in (tmp_path / "workspace-a").iterdir()) == [
+        "shipments-2.parquet"
+    ]
+    assert restarted.shipment_table("workspace-a").equals(refreshed)
+    assert repository.list_for_workspace("workspace-a") == SHIPMENTS[:3]
+    assert isinstance(build_shipment_repository(None, store="columnar"), ColumnarShipmentRepository)
+    with pytest.raises(ValueError, match="SHIPMENT_STORE"):
+        build_shipment_repository(None, store="parquet")
+
+
+def test_columnar_tables_are_labelled_with_the_version_their_upload_wrote(tmp_path):
+    class RacingRepository(InMemoryShipmentRepository):
+        def replace_for_workspace(self, workspace_id, shipments):
+            version = super().replace_for_workspace(workspace_id, shipments)
+            if len(shipments) > 1:
+                super().replace_for_workspace(workspace_id, shipments[:1])
+            return version
+
+    repository = ColumnarShipmentRepository(RacingRepository(), snapshot_dir=tmp_path)
+
+    assert repository.replace_for_workspace("workspace-a", SHIPMENTS) == 1
+    assert repository.versioned_table("workspace-a")[0] == 2
+    assert repository.shipment_table("workspace-a").num_rows == 1
+    assert sorted(path.name for path in (tmp_path / "workspace-a").iterdir()) == [
+        "shipments-2.parquet"
+    ]
+
+
+def test_columnar_repository_evicts_least_recent_tables_and_purges_snapshots(tmp_path):
+    inner = InMemoryShipmentRepository()
+    repository = ColumnarShipmentRepository(inner, snapshot_dir=tmp_path, cache_size=2)
+    for workspace_id in ("workspace-a", "workspace-b", "workspace-c"):
+        repository.replace_for_workspace(workspace_id, SHIPMENTS[:2])
+        repository.shipment_table("workspace-a")
+
+    assert list(repository._tables) == ["workspace-c", "workspace-a"]
+    assert not list(tmp_path.glob("*/*.tmp"))
+
+    repository.purge_workspaces(["workspace-a", "workspace-missing"])
+
+    assert list(repository._tables) == ["workspace-c"]
+    assert not (tmp_path / "workspace-a").exists()
+    assert (tmp_path / "workspace-b" / "shipments-1.parquet").exists()
+    assert repository.list_for_workspace("workspace-a") == ()
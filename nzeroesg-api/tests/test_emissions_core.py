@@ -1,10 +1,29 @@
+import math
+from dataclasses import FrozenInstanceError, replace
+
 import pytest
 
-from domain.emissions.calculator import calculate_emissions, compare_emissions
+from domain.emissions.bulk_distance import (
+    _haversine_loop,
+    bulk_distances_km,
+    geodesic_lane_km,
+)
+from domain.emissions.calculator import (
+    calculate_emissions,
+    calculation_cache_stats,
+    clear_calculation_cache,
+    compare_emissions,
+)
 from domain.emissions.distance import DistanceMethod
 from domain.emissions.factors import factor_for
-from domain.emissions.modes import FreightMode, normalize_mode
-from domain.emissions.units import normalize_distance_km, normalize_weight_kg
+from domain.emissions.modes import FreightMode, normalize_mode, normalize_modes
+from domain.emissions.units import (
+    DistanceUnit,
+    normalize_distance_km,
+    normalize_distances_km,
+    normalize_weight_kg,
+    normalize_weights_kg,
+)
 
 
 def test_unit_normalization_uses_canonical_base_units():
@@ -23,6 +42,27 @@ def test_invalid_units_and_values_fail_explicitly():
 def test_mode_aliases_resolve_to_canonical_modes():
     assert normalize_mode("air") is FreightMode.PLANE
     assert normalize_mode("ocean container") is FreightMode.SHIP
+    assert normalize_mode("  Ocean   CONTAINER ") is FreightMode.SHIP
+    with pytest.raises(ValueError, match="Unsupported transport mode"):
+        normalize_mode(None)
+
+
+def test_column_normalization_matches_scalar_results_and_marks_invalid_entries():
+    weights = [1.5, 2, 500]
+    units = ["mt", " LB ", "g"]
+
+    assert list(normalize_weights_kg(weights, units)) == [
+        normalize_weight_kg(value, unit) for value, unit in zip(weights, units, strict=True)
+    ]
+    assert list(normalize_distances_km([10, 1_000], DistanceUnit.MILE)) == [16.0934, 1609.34]
+    invalid = normalize_weights_kg([1, -1, None, 2], ["kg", "kg", "kg", "stone"])
+    assert invalid[0] == 1 and all(math.isnan(value) for value in invalid[1:])
+    assert normalize_modes(["rail", FreightMode.TRUCK, " RAIL ", "submarine"]) == (
+        FreightMode.TRAIN,
+        FreightMode.TRUCK,
+        FreightMode.TRAIN,
+        None,
+    )
 
 
 def test_factor_records_are_versioned_and_applicable():
@@ -109,3 +149,53 @@ def test_comparison_preserves_input_order_and_ranks_by_result():
     ]
     assert comparison.lowest.mode is FreightMode.SHIP
     assert comparison.to_dict()["lowest_emissions_method"] == "ship"
+
+
+def test_hot_records_are_slotted_and_keep_replace_and_to_dict():
+    result = calculate_emissions(weight_value=1, weight_unit="mt", distance_value=100, mode="truck")
+    moved = replace(result, distance=replace(result.distance, km=200.0))
+
+    for record in (result, result.distance, moved):
+        assert not hasattr(record, "__dict__")
+    assert moved.distance.to_dict()["distance_km"] == 200.0
+    assert moved.to_dict()["emissions_kg"] == result.emissions_kg
+    with pytest.raises(FrozenInstanceError):
+        result.emissions_kg = 0.0
+
+
+def test_repeated_normalized_inputs_are_served_from_the_calculation_cache():
+    clear_calculation_cache()
+
+    first = calculate_emissions(weight_value=1, weight_unit="mt", distance_value=100, mode="road")
+    repeated = calculate_emissions(
+        weight_value=1_000, weight_unit=" KG ", distance_value=100, mode="truck"
+    )
+    other_lane = calculate_emissions(
+        weight_value=1_000, distance_value=100, mode="truck", origin="Edmonton"
+    )
+    stats = calculation_cache_stats()
+
+    assert repeated is first
+    assert other_lane == replace(first, distance=replace(first.distance, origin="Edmonton"))
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 2)
+    assert stats.to_dict()["hit_rate"] == pytest.approx(1 / 3, abs=1e-4)
+
+
+def test_bulk_distances_match_per_lane_results_and_collapse_repeated_lanes():
+    edmonton, calgary, toronto = (53.5461, -113.4938), (51.0447, -114.0719), (43.6532, -79.3832)
+    origins = [edmonton, calgary, edmonton]
+    destinations = [calgary, toronto, calgary]
+
+    haversine = bulk_distances_km(origins, destinations)
+    assert list(haversine) == [
+        round(value, 6) for value in _haversine_loop(list(zip(origins, destinations, strict=True)))
+    ]
+    assert haversine[0] == haversine[2] == pytest.approx(280.9, abs=0.1)
+
+    geodesic_lane_km.cache_clear()
+    geodesic = bulk_distances_km(origins, destinations, method="geodesic")
+    assert geodesic[1] == pytest.approx(2_718, abs=1)
+    assert geodesic_lane_km.cache_info().misses == 2
+    assert bulk_distances_km([], []).tolist() == []
+    with pytest.raises(ValueError, match="same length"):
+        bulk_distances_km(origins, destinations[:1])
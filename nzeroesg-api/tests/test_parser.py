@@ -17,6 +17,54 @@ def test_natural_language_extracts_weight_route_and_modes():
     assert parsed["transport_method"] == ["train", "truck"]
 
 
+def test_natural_language_normalizes_imperial_and_metric_units():
+    parsed = parse_agent_input(
+        "Estimate 1,500 lbs from Vancouver, BC to Toronto by train, about 2,800 miles."
+    )
+
+    assert parsed == {
+        "weight_value": 680.388,
+        "origin": "vancouver, bc",
+        "destination": "toronto",
+        "transport_method": ["train"],
+        "distance_value": 4506.152,
+    }
+    assert parse_agent_input("20 mt over 1,250 km by sea")["weight_value"] == 20_000
+    assert parse_agent_input("20 mt over 1,250 km by sea")["distance_value"] == 1_250
+    assert parse_agent_input("500 g by air") == {"weight_value": 0.5, "transport_method": ["plane"]}
+
+
+def test_each_repeated_weight_or_route_starts_another_shipment():
+    parsed = parse_agent_input(
+        "Compare truck and rail for 2 t from Edmonton to Calgary and 3 tonnes "
+        "from Calgary to Regina; from Regina to Winnipeg, 800 kg by air."
+    )
+
+    assert parsed["weight_value"] == 2_000
+    assert [
+        (shipment["weight_value"], shipment["origin"], shipment["transport_method"])
+        for shipment in parsed["shipments"]
+    ] == [
+        (2_000, "edmonton", ["truck", "train"]),
+        (3_000, "calgary", ["truck", "train"]),
+        (800, "regina", ["plane"]),
+    ]
+
+
+def test_mode_words_used_as_verbs_are_not_read_as_modes():
+    assert parse_agent_input("How much CO2 to ship 500 kg from Paris to Berlin by truck?") == {
+        "weight_value": 500,
+        "origin": "paris",
+        "destination": "berlin",
+        "transport_method": ["truck"],
+    }
+    assert parse_agent_input("Compare truck and ship 500 kg")["transport_method"] == [
+        "truck",
+        "ship",
+    ]
+    assert parse_agent_input("500 kg by ship 900 km")["transport_method"] == ["ship"]
+
+
 def test_safe_tool_rejects_unparseable_input():
     wrapped = safe_tool(lambda **values: values)
 
@@ -11,6 +11,7 @@ from domain.evidence.embeddings import (
 )
 from domain.evidence.ingestion import extract_evidence
 from domain.evidence.models import SupplierMetadata
+from domain.evidence.quantization import EmbeddingStorage
 from domain.evidence.retrieval import RetrievalMode
 from domain.workspaces.sessions import SessionSigner
 from persistence.evidence import PostgresEvidenceRepository
@@ -127,6 +128,60 @@ def test_pgvector_storage_query_and_workspace_isolation():
         workspace_repository.revoke(second_workspace.workspace_id)
 
 
+@pytest.mark.parametrize("storage", (EmbeddingStorage.HALF, EmbeddingStorage.BINARY))
+def test_pgvector_compact_storage_modes_rank_like_full_precision(storage):
+    workspace_repository = build_workspace_repository(DATABASE_URL)
+    evidence_repository = PostgresEvidenceRepository(DATABASE_URL or "", storage=storage)
+    signer = SessionSigner("test-secret-that-is-at-least-32-characters", ttl_seconds=3_600)
+    workspace, _ = signer.issue(now=int(time.time()))
+    workspace_repository.create(workspace)
+    spec = EmbeddingSpec(provider="fixture", model="semantic-v1")
+    supplier = SupplierMetadata("Supplier ABC", "Canada", (), ("train",))
+    documents = [
+        extract_evidence(text.encode(), filename=filename, content_type="text/plain").document
+        for filename, text in (
+            ("rail.txt", "Supplier ABC shifts freight to rail."),
+            ("air.txt", "Supplier ABC uses urgent air freight."),
+        )
+    ]
+
+    try:
+        for index, document in enumerate(documents):
+            evidence_repository.store(workspace.workspace_id, supplier, document)
+            evidence_repository.store_embeddings(
+                workspace.workspace_id,
+                document.sha256,
+                spec,
+                (
+                    ChunkEmbedding(
+                        chunk_index=0,
+                        content_sha256=sha256(
+                            document.chunks[0].content.encode("utf-8")
+                        ).hexdigest(),
+                        values=unit_vector(index),
+                    ),
+                ),
+            )
+
+        matches = evidence_repository.search_semantic(
+            workspace.workspace_id,
+            unit_vector(0),
+            spec,
+        )
+
+        assert [match.filename for match in matches] == ["rail.txt", "air.txt"]
+        assert matches[0].score == pytest.approx(1.0, abs=1e-3)
+        assert (
+            PostgresEvidenceRepository(DATABASE_URL or "").list_unembedded_documents(
+                workspace.workspace_id,
+                spec,
+            )
+            != ()
+        )
+    finally:
+        workspace_repository.revoke(workspace.workspace_id)
+
+
 def test_lexical_evaluation_capture_uses_checked_in_corpus():
     captured = capture_results(
         database_url=DATABASE_URL or "",
@@ -13,6 +13,7 @@ from domain.evidence.embeddings import (
 )
 from domain.evidence.ingestion import extract_evidence
 from domain.evidence.models import EvidenceMatch, SupplierMetadata
+from domain.evidence.quantization import EmbeddingStorage, pack_vector
 from domain.evidence.retrieval import RetrievalMode, reciprocal_rank_fusion
 from persistence.evidence import InMemoryEvidenceRepository
 
@@ -109,6 +110,90 @@ def test_in_memory_semantic_search_is_workspace_and_model_scoped():
     )
 
 
+def test_compact_vectors_round_trip_within_storage_precision():
+    values = tuple((index % 7 - 3) / 10 for index in range(EMBEDDING_DIMENSIONS))
+
+    full = pack_vector(values, EmbeddingStorage.FULL)
+    half = pack_vector(values, EmbeddingStorage.HALF)
+    binary = pack_vector(values, EmbeddingStorage.BINARY)
+
+    assert full.nbytes == EMBEDDING_DIMENSIONS * 4
+    assert half.nbytes == EMBEDDING_DIMENSIONS * 2
+    assert half.values() == pytest.approx(values, abs=1e-3)
+    assert binary.values() == pytest.approx(values, abs=1e-6)
+    assert binary.code.bit_count() == sum(1 for value in values if value > 0)
+    with pytest.raises(EmbeddingProviderError, match="half precision"):
+        pack_vector((1e6,), EmbeddingStorage.HALF)
+
+
+@pytest.mark.parametrize("storage", tuple(EmbeddingStorage))
+def test_in_memory_compact_storage_preserves_semantic_ranking(storage):
+    repository = InMemoryEvidenceRepository(storage=storage)
+    spec = EmbeddingSpec(provider="fixture", model="semantic-v1")
+    supplier = SupplierMetadata("Supplier ABC", "Canada", (), ("train",))
+    documents = [
+        extract_evidence(
+            text.encode(),
+            filename=filename,
+            content_type="text/plain",
+        ).document
+        for filename, text in (
+            ("rail.txt", "Supplier ABC shifts freight to rail."),
+            ("air.txt", "Supplier ABC uses urgent air freight."),
+        )
+    ]
+    for index, document in enumerate(documents):
+        repository.store("workspace-a", supplier, document)
+        repository.store_embeddings(
+            "workspace-a",
+            document.sha256,
+            spec,
+            (
+                ChunkEmbedding(
+                    chunk_index=0,
+                    content_sha256=sha256(document.chunks[0].content.encode("utf-8")).hexdigest(),
+                    values=unit_vector(index),
+                ),
+            ),
+        )
+
+    matches = repository.search_semantic("workspace-a", unit_vector(0), spec)
+
+    assert [match.filename for match in matches] == ["rail.txt", "air.txt"]
+    assert matches[0].score == pytest.approx(1.0)
+
+
+def test_changing_storage_mode_marks_documents_for_reembedding():
+    repository = InMemoryEvidenceRepository()
+    spec = EmbeddingSpec(provider="fixture", model="semantic-v1")
+    document = extract_evidence(
+        b"Supplier ABC shifts freight to rail.",
+        filename="rail.txt",
+        content_type="text/plain",
+    ).document
+    repository.store("workspace-a", SupplierMetadata("Supplier ABC", None, (), ()), document)
+    repository.store_embeddings(
+        "workspace-a",
+        document.sha256,
+        spec,
+        (
+            ChunkEmbedding(
+                chunk_index=0,
+                content_sha256=sha256(document.chunks[0].content.encode("utf-8")).hexdigest(),
+                values=unit_vector(0),
+            ),
+        ),
+    )
+
+    repository.storage = EmbeddingStorage.HALF
+
+    assert [
+        pending.document_sha256
+        for pending in repository.list_unembedded_documents("workspace-a", spec)
+    ] == [document.sha256]
+    assert repository.search_semantic("workspace-a", unit_vector(0), spec) == ()
+
+
 def test_reciprocal_rank_fusion_preserves_citations_and_both_rank_signals():
     first = EvidenceMatch(
         supplier_name="Supplier ABC",
@@ -6,6 +6,7 @@ import pytest
 from domain.evidence.evaluation import (
     RetrievalEvaluationCase,
     RetrievalEvaluationResult,
+    compare_retrieval,
     evaluate_retrieval,
 )
 
@@ -118,6 +119,28 @@ def test_retrieval_metrics_penalize_missing_and_unsupported_answers():
     assert metrics.unsupported_answer_rate == 1.0
 
 
+def test_retrieval_comparison_reports_recall_impact_of_compact_storage():
+    cases = (
+        RetrievalEvaluationCase("first", "exact", "question", ("a",), True),
+        RetrievalEvaluationCase("second", "exact", "question", ("b",), True),
+    )
+    baseline = (
+        RetrievalEvaluationResult("first", ("a",), ("a",), 10.0),
+        RetrievalEvaluationResult("second", ("b",), ("b",), 10.0),
+    )
+    candidate = (
+        RetrievalEvaluationResult("first", ("a",), ("a",), 6.0),
+        RetrievalEvaluationResult("second", ("c",), ("c",), 6.0),
+    )
+
+    impact = compare_retrieval(cases, baseline, candidate).to_dict()
+
+    assert impact["recall_at_k_delta"] == -0.5
+    assert impact["citation_coverage_delta"] == -0.5
+    assert impact["mean_latency_ms_delta"] == -4.0
+    assert impact["baseline"]["recall_at_k"] == 1.0
+
+
 def test_retrieval_metrics_reject_inconsistent_supported_answer():
     cases = (RetrievalEvaluationCase("case", "exact", "question", ("doc",), True),)
     results = (
@@ -1,4 +1,7 @@
+import pytest
+
 from domain.scenarios.comparison import compare_shipment_modes
+from domain.scenarios.sweep import ScenarioSpec, sweep_shipment_scenarios
 from domain.shipments.models import NormalizedShipment
 
 
@@ -23,3 +26,95 @@ def test_scenario_reconciles_alternative_totals_to_the_same_calculator():
     assert scenario.delta_percent == -64.5161
     assert scenario.shipment_results[0].delta_kg == -4.0
     assert scenario.factor_version == "prototype-2026.1"
+
+
+def _shipment(row: int, weight_kg: float, distance_km: float, mode: str) -> NormalizedShipment:
+    return NormalizedShipment(
+        shipment_id=f"S-{row:03d}",
+        origin="Edmonton",
+        destination="Calgary",
+        weight_kg=weight_kg,
+        distance_km=distance_km,
+        transport_method=mode,
+        source_row=row,
+    )
+
+
+def test_sweep_ranks_threshold_and_partial_shifts_against_the_single_mode_comparison():
+    shipments = (
+        _shipment(2, 1_000, 100, "truck"),
+        _shipment(3, 2_000, 800, "truck"),
+        _shipment(4, 500, 1_500, "plane"),
+    )
+    scenarios = (
+        ScenarioSpec(alternative_mode="train"),
+        ScenarioSpec(alternative_mode="rail", min_distance_km=500),
+        ScenarioSpec(alternative_mode="train", shift_share=0.5),
+        ScenarioSpec(alternative_mode="train", min_distance_km=500, min_weight_kg=1_000),
+        ScenarioSpec(alternative_mode="plane", min_weight_kg=1_500),
+    )
+
+    sweep = sweep_shipment_scenarios(shipments, scenarios)
+    full_shift = compare_shipment_modes(shipments, alternative_mode="train")
+    by_label = {result.scenario.label: result for result in sweep.results}
+
+    assert sweep.shipment_count == 3
+    assert sweep.baseline_total_kg == full_shift.baseline_total_kg == 556.9
+    assert sweep.baseline_by_mode == {"plane": 451.5, "truck": 105.4}
+    assert by_label["100% to train"].total_kg == full_shift.alternative_total_kg
+    assert by_label["100% to train, distance >= 500 km"].total_kg == 57.9
+    assert by_label["100% to train, distance >= 500 km"].eligible_shipment_count == 2
+    assert by_label["50% to train"].total_kg == 305.4
+    half_shift = by_label["50% to train"]
+    assert half_shift.eligible_shipment_count == 3
+    assert half_shift.shifted_tonne_km == by_label["100% to train"].shifted_tonne_km / 2
+    assert half_shift.to_dict()["shift_share"] == 0.5
+    assert by_label["100% to train, distance >= 500 km, weight >= 1000 kg"].total_kg == 492.9
+    assert [result.rank for result in sweep.results] == [1, 2, 3, 4, 5]
+    assert [result.total_kg for result in sweep.results] == sorted(
+        result.total_kg for result in sweep.results
+    )
+    assert sweep.results[-1].scenario.alternative_mode == "plane"
+    assert sweep.results[-1].emissions_by_baseline_mode == {"plane": 451.5, "truck": 969.4}
+
+
+def test_sweep_defaults_to_every_mode_and_validates_scenarios():
+    sweep = sweep_shipment_scenarios((_shipment(2, 1_000, 100, "truck"),))
+
+    assert [result.scenario.alternative_mode for result in sweep.results] == [
+        "ship",
+        "train",
+        "truck",
+        "plane",
+    ]
+    with pytest.raises(ValueError, match="shift share"):
+        ScenarioSpec(alternative_mode="train", shift_share=1.5)
+    with pytest.raises(ValueError, match="at least one valid shipment"):
+        sweep_shipment_scenarios(())
+
+
+def test_sweep_thresholds_include_every_shipment_tied_at_the_threshold():
+    shipments = (
+        _shipment(2, 1_000, 500, "truck"),
+        _shipment(3, 1_000, 500, "rail"),
+        _shipment(4, 2_000, 500, "truck"),
+        _shipment(5, 1_000, 499.9, "truck"),
+    )
+    scenarios = (
+        ScenarioSpec(alternative_mode="ship", min_distance_km=500),
+        ScenarioSpec(alternative_mode="ship", min_weight_kg=1_000),
+        ScenarioSpec(alternative_mode="ship", min_distance_km=500, min_weight_kg=2_000),
+        ScenarioSpec(alternative_mode="ship", min_distance_km=500.1),
+    )
+
+    eligible = {
+        result.scenario.label: result.eligible_shipment_count
+        for result in sweep_shipment_scenarios(shipments, scenarios).results
+    }
+
+    assert eligible == {
+        "100% to ship, distance >= 500 km": 3,
+        "100% to ship, weight >= 1000 kg": 4,
+        "100% to ship, distance >= 500 km, weight >= 2000 kg": 1,
+        "100% to ship, distance >= 500.1 km": 0,
+    }
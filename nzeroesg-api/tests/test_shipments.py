@@ -1,9 +1,18 @@
+import pytest
+
+import persistence.shipments as shipment_store
+from domain.places import Place
+from domain.routing import network_route_distance, network_route_distances, route_network
 from domain.shipments.analysis import analyze_shipments
 from domain.shipments.ingestion import (
     MAX_FILE_BYTES,
     MAX_ROWS,
+    _fill_missing_distances,
     parse_shipments_csv,
 )
+from domain.shipments.lanes import lane_scenario_deltas
+from domain.shipments.models import NormalizedShipment
+from persistence.shipments import InMemoryShipmentRepository, PostgresShipmentRepository
 
 HEADER = (
     "shipment_id,origin,destination,weight_value,weight_unit,distance_value,"
@@ -49,6 +58,126 @@ def test_partial_csv_keeps_valid_rows_and_reports_row_level_errors():
     assert result.warnings == ("Some input rows were rejected; totals include accepted rows only.",)
 
 
+def test_every_row_with_an_unsupported_unit_or_mode_is_reported():
+    result = parse_shipments_csv(
+        (
+            HEADER
+            + "S-001,Edmonton,Calgary,1,stone,100,km,truck\n"
+            + "S-002,Edmonton,Calgary,1,mt,100,furlong,truck\n"
+            + "S-003,Edmonton,Calgary,1,stone,100,km,submarine\n"
+            + "S-004,Edmonton,Calgary,2,LB,100,KM,Rail\n"
+        ).encode()
+    )
+
+    assert [(issue.row_number, issue.field) for issue in result.errors] == [
+        (2, "weight_unit"),
+        (3, "distance_unit"),
+        (4, "weight_unit"),
+        (4, "transport_method"),
+    ]
+    assert [(row.weight_kg, row.transport_method) for row in result.rows] == [(0.907184, "train")]
+
+
+def test_rows_without_distance_use_network_routes_then_straight_lines():
+    result = parse_shipments_csv(
+        (
+            HEADER
+            + 'S-001,"Edmonton, AB",Calgary,1,mt,,,truck\n'
+            + "S-002,Calgary,Vancouver,500,kg,1000,km,plane\n"
+            + "S-003,Edmonton,Calgary,2,mt,,km,train\n"
+            + "S-004,Edmonton,Unknown Siding,2,mt,,km,train\n"
+            + "S-005,YEG,YYC,2,mt,,km,plane\n"
+            + "S-006,Edmonton,Paris,2,mt,,km,truck\n"
+        ).encode()
+    )
+
+    assert [row.shipment_id for row in result.rows] == ["S-001", "S-002", "S-003", "S-005", "S-006"]
+    assert [row.distance_km for row in result.rows[:3]] == [295, 1_000, 300]
+    assert result.rows[3].distance_km == pytest.approx(244, abs=0.5)
+    assert result.rows[4].distance_km == pytest.approx(7_200, abs=100)
+    assert [row.distance_method for row in result.rows] == [
+        "route",
+        "route",
+        "route",
+        "straight_line",
+        "straight_line",
+    ]
+    assert [(issue.row_number, issue.field) for issue in result.errors] == [(5, "distance_value")]
+    assert "2 rows without a distance use route distances" in result.warnings[0]
+    assert "2 rows without a distance use straight-line distances" in result.warnings[1]
+
+
+def test_rows_between_the_same_place_report_a_distance_issue_instead_of_zero():
+    result = parse_shipments_csv(
+        (
+            HEADER
+            + "S-001,Edmonton,Edmonton,1,mt,,km,plane\n"
+            + "S-002,Edmonton,edmonton,1,mt,,km,truck\n"
+            + "S-003,Edmonton,Calgary,1,mt,,km,plane\n"
+        ).encode()
+    )
+    same_spot = Place("Depot A", 53.5, -113.5, kind="city", source="test")
+    twin = Place("Depot B", 53.5, -113.5, kind="city", source="test")
+    rows = [
+        NormalizedShipment("S-1", "Depot A", "Depot B", 1_000, 0.0, "plane", 2),
+        NormalizedShipment("S-2", "Depot A", "Depot B", 1_000, 0.0, "plane", 3),
+    ]
+
+    warnings, errors = _fill_missing_distances(rows, [(0, (same_spot, twin))])
+
+    assert [row.shipment_id for row in result.rows] == ["S-003"]
+    assert [(issue.row_number, issue.field) for issue in result.errors] == [
+        (2, "distance_value"),
+        (3, "distance_value"),
+    ]
+    assert [row.shipment_id for row in rows] == ["S-2"]
+    assert [(issue.row_number, issue.field) for issue in errors] == [(2, "distance_value")]
+    assert warnings == []
+
+
+def test_route_networks_answer_lanes_from_landmark_and_batch_searches():
+    network = route_network("train")
+    assert route_network("plane") is None
+    assert network.shortest_km("Vancouver", "Toronto") == 4_325
+    assert network.shortest_km("Vancouver", "Busan") is None
+
+    lanes = [("Prince Rupert", "Chicago"), ("Vancouver, BC", "Halifax"), ("Edmonton", "Shanghai")]
+    distances = network_route_distances(lanes, "rail")
+    assert [distance and distance.km for distance in distances] == [
+        network.shortest_km(*lanes[0]),
+        network.shortest_km("Vancouver", "Halifax"),
+        None,
+    ]
+    assert distances[0].method.value == "route"
+    assert "simplified rail network" in distances[0].warnings[0]
+    assert network_route_distance("Port of Shanghai", "Port of Rotterdam", "ship").km == 19_500
+
+
+def test_same_node_lanes_are_unroutable_instead_of_zero_km_in_every_mode():
+    for mode in ("truck", "plane"):
+        assert network_route_distance("Edmonton", "edmonton", mode) is None
+        assert (
+            network_route_distances([("Edmonton", "Edmonton"), ("Edmonton", "Calgary")], mode)[0]
+            is None
+        )
+
+    result = parse_shipments_csv(
+        (
+            HEADER
+            + "S-001,Edmonton,Edmonton,1,mt,,km,truck\n"
+            + "S-002,Edmonton,Edmonton,1,mt,,km,plane\n"
+            + "S-003,Edmonton,Calgary,1,mt,,km,truck\n"
+        ).encode()
+    )
+
+    assert [row.shipment_id for row in result.rows] == ["S-003"]
+    assert result.rows[0].distance_km > 0
+    assert [(issue.row_number, issue.field) for issue in result.errors] == [
+        (2, "distance_value"),
+        (3, "distance_value"),
+    ]
+
+
 def test_analysis_returns_reconcilable_totals_breakdown_and_hotspots():
     parsed = parse_shipments_csv(
         (
@@ -90,3 +219,127 @@ def test_parser_rejects_oversized_and_over_row_limit_files():
     assert oversized.errors[0].message == "File exceeds the 10 MB limit."
     assert len(over_rows.rows) == MAX_ROWS
     assert over_rows.errors[-1].message == f"CSV cannot contain more than {MAX_ROWS} data rows."
+
+
+def test_upload_refreshes_lane_totals_and_lane_scenario_deltas():
+    result = parse_shipments_csv(
+        (
+            HEADER
+            + "S-001,Edmonton,Calgary,1,mt,100,km,truck\n"
+            + "S-002,edmonton , CALGARY,2,mt,100,km,road\n"
+            + "S-003,Calgary,Vancouver,1,mt,1000,km,plane\n"
+            + "S-004,Edmonton,Calgary,1,mt,100,km,train\n"
+        ).encode()
+    )
+    repository = InMemoryShipmentRepository()
+
+    repository.replace_for_workspace("workspace-a", result.rows)
+    lanes = repository.list_lanes("workspace-a")
+    deltas = lane_scenario_deltas(lanes, alternative_mode="rail", limit=2)
+
+    assert [(lane.origin, lane.transport_method, lane.shipment_count) for lane in lanes] == [
+        ("Calgary", "plane", 1),
+        ("Edmonton", "truck", 2),
+        ("Edmonton", "train", 1),
+    ]
+    assert lanes[1].tonne_km == 300
+    assert lanes[1].emissions_kg == 18.6
+    assert repository.list_lanes("workspace-a", limit=1) == lanes[:1]
+    assert [delta.delta_kg for delta in deltas] == [-580.0, -12.0]
+
+    repository.replace_for_workspace("workspace-a", result.rows[:1])
+
+    assert [lane.shipment_count for lane in repository.list_lanes("workspace-a")] == [1]
+    assert repository.list_lanes("workspace-b") == ()
+
+
+def test_in_memory_reads_share_one_immutable_snapshot_per_version():
+    rows = parse_shipments_csv(
+        (
+            HEADER
+            + "S-002,Calgary,Vancouver,1,mt,1000,km,plane\n"
+            + "S-001,Edmonton,Calgary,1,mt,100,km,truck\n"
+        ).encode()
+    ).rows
+    repository = InMemoryShipmentRepository()
+
+    assert repository.snapshot("workspace-a").version == 0
+    repository.replace_for_workspace("workspace-a", rows)
+    snapshot = repository.snapshot("workspace-a")
+    first_page = list(repository.iter_for_workspace("workspace-a", limit=1))
+
+    assert snapshot.version == repository.data_version("workspace-a") == 1
+    assert repository.list_for_workspace("workspace-a") is snapshot.shipments
+    assert repository.list_for_workspace("workspace-a") is repository.list_for_workspace(
+        "workspace-a"
+    )
+    assert snapshot.shipments[0] is rows[0]
+    assert [shipment for _, shipment in first_page] == [rows[0]]
+    assert first_page[0][0] is snapshot.cursors[0]
+    assert [
+        shipment
+        for _, shipment in repository.iter_for_workspace("workspace-a", after=first_page[0][0])
+    ] == [rows[1]]
+
+    repository.replace_for_workspace("workspace-a", rows[:1])
+
+    assert repository.snapshot("workspace-a").version == 2
+    assert snapshot.shipments == rows
+
+
+def test_postgres_row_stream_releases_its_connection_between_pages(monkeypatch):
+    stored = [
+        (
+            f"00000000-0000-0000-0000-00000000000{row}",
+            f"S-{row}",
+            "A",
+            "B",
+            1,
+            2,
+            "truck",
+            row,
+            "route",
+        )
+        for row in range(1, 6)
+    ]
+    open_connections = []
+
+    class PageCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, query, parameters):
+            _, source_row, _, page_size = parameters
+            self.rows = [row for row in stored if row[7] > source_row][:page_size]
+
+        def fetchall(self):
+            return self.rows
+
+    class PageConnection:
+        def __enter__(self):
+            open_connections.append(self)
+            return self
+
+        def __exit__(self, *exc):
+            open_connections.remove(self)
+            return False
+
+        def cursor(self):
+            return PageCursor()
+
+    monkeypatch.setattr(shipment_store, "STREAM_BATCH_ROWS", 2)
+    repository = PostgresShipmentRepository("postgresql://unused")
+    monkeypatch.setattr(repository, "_connect", PageConnection)
+
+    streamed = []
+    for cursor, shipment in repository.iter_for_workspace("workspace-a", limit=4):
+        assert open_connections == []
+        streamed.append((cursor.source_row, shipment.shipment_id))
+
+    assert streamed == [(row, f"S-{row}") for row in range(1, 5)]
+    assert [shipment.shipment_id for shipment in repository.list_for_workspace("w")] == [
+        f"S-{row}" for row in range(1, 6)
+    ]
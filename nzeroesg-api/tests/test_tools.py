@@ -1,15 +1,37 @@
+import asyncio
+import json
+import threading
+import time
 from dataclasses import replace
+from types import SimpleNamespace
 
+import httpx
 import pytest
+from pydantic import ValidationError
 
 import agent.tools as tools
+import persistence.geocodes as geocodes
+from agent.carbon_interface import (
+    BreakerState,
+    CarbonInterfaceClient,
+    CircuitBreaker,
+    ProviderTimeoutError,
+    ProviderUnavailableError,
+)
+from agent.fast_path import answer_structured, structured_question
+from agent.response_cache import ReplyCache, reply_cache_key
 from agent.tools import (
+    DistanceInput,
+    acompare_emissions,
     calculate_shipping_emissions,
     compare_emissions,
     fallback_emission_estimate,
     normalize_distance_km,
     normalize_weight_kg,
+    resolve_distance,
 )
+from domain.places import Place, lookup_place, place_key
+from persistence.geocodes import InMemoryGeocodeCache
 
 
 @pytest.fixture(autouse=True)
@@ -72,3 +94,448 @@ def test_comparison_orders_modes_by_calculated_emissions():
 def test_unsupported_units_fail_explicitly():
     with pytest.raises(ValueError, match="Unsupported weight unit"):
         normalize_weight_kg(10, "stone")
+
+
+class _CountingGeocoder:
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+
+    def geocode(self, query, timeout):
+        self.queries.append(query)
+        return SimpleNamespace(latitude=53.9171, longitude=-122.7497)
+
+
+@pytest.fixture
+def geocoder(monkeypatch):
+    fake = _CountingGeocoder()
+    monkeypatch.setattr(tools, "geocode_cache", InMemoryGeocodeCache())
+    monkeypatch.setattr(tools, "_network_geocoder", lambda: fake)
+    return fake
+
+
+def test_gazetteer_matches_spelling_variants_and_codes():
+    assert place_key("  Calgary,   AB ") == "calgary ab"
+    assert lookup_place("calgary, ab").name == "Calgary"
+    assert lookup_place("Calgary Alberta") is None
+    assert lookup_place("yyc").kind == "airport"
+    assert lookup_place("Port of Rotterdam").kind == "port"
+
+
+def test_bundled_lanes_resolve_without_network(geocoder):
+    result = resolve_distance("Edmonton, AB", "Calgary")
+
+    assert result["distance_km"] == pytest.approx(280, abs=5)
+    assert result["origin_source"] == result["destination_source"] == "gazetteer"
+    assert geocoder.queries == []
+
+
+def test_network_geocodes_are_cached_by_normalized_name(geocoder):
+    first = resolve_distance("Prince George", "Vancouver")
+    second = resolve_distance("prince  george", "Vancouver")
+
+    assert first["distance_km"] == second["distance_km"]
+    assert first["origin_source"] == "nominatim"
+    assert geocoder.queries == ["Prince George"]
+
+
+def test_unresolved_places_are_cached_as_misses_until_they_expire(geocoder, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(
+        tools, "geocode_cache", InMemoryGeocodeCache(miss_ttl_seconds=60, clock=lambda: now[0])
+    )
+    monkeypatch.setattr(geocoder, "geocode", lambda query, timeout: geocoder.queries.append(query))
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Could not resolve"):
+            resolve_distance("Nowhere Town", "Vancouver")
+    now[0] = 61
+    with pytest.raises(ValueError, match="Could not resolve"):
+        resolve_distance("nowhere  town", "Vancouver")
+
+    assert geocoder.queries == ["Nowhere Town", "nowhere  town"]
+
+
+def test_geocode_database_failures_degrade_to_cache_misses(monkeypatch):
+    psycopg = pytest.importorskip("psycopg")
+
+    def unavailable(database_url):
+        raise psycopg.OperationalError("database is unavailable")
+
+    monkeypatch.setattr(geocodes, "connect", unavailable)
+    cache = geocodes.PostgresGeocodeCache("postgresql://unused")
+    place = Place("Prince George", 53.9, -122.7, kind="geocoded", source="nominatim")
+
+    assert cache.get("Prince George") is None
+    cache.put("Prince George", place)
+    assert cache.get("prince george") is place
+
+
+def test_distance_tool_rejects_overlong_place_names():
+    with pytest.raises(ValidationError):
+        DistanceInput(origin="x" * 201, destination="Vancouver")
+
+
+def test_offline_geocoder_never_calls_the_network(geocoder, monkeypatch):
+    monkeypatch.setattr(tools, "settings", replace(tools.settings, geocoder="offline"))
+
+    assert resolve_distance("YEG", "YYZ")["distance_km"] > 2_500
+    with pytest.raises(ValueError, match="without network geocoding"):
+        resolve_distance("Prince George", "Vancouver")
+    assert geocoder.queries == []
+
+
+def _provider_response(request: httpx.Request) -> httpx.Response:
+    payload = json.loads(request.content)
+    carbon_kg = {"truck": 62.0, "train": 22.0, "plane": 602.0, "ship": 8.0}
+    return httpx.Response(
+        200,
+        json={
+            "data": {
+                "attributes": {
+                    "transport_method": payload["transport_method"],
+                    "carbon_kg": carbon_kg[payload["transport_method"]],
+                }
+            }
+        },
+    )
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    calls: list[str] = []
+
+    def handler(request):
+        calls.append(json.loads(request.content)["transport_method"])
+        return _provider_response(request)
+
+    async def slow_handler(request):
+        calls.append(json.loads(request.content)["transport_method"])
+        await asyncio.sleep(0.2)
+        return _provider_response(request)
+
+    client = CarbonInterfaceClient(
+        "test-key",
+        transport=httpx.MockTransport(handler),
+        async_transport=httpx.MockTransport(slow_handler),
+    )
+    monkeypatch.setattr(
+        tools, "settings", replace(tools.settings, carbon_interface_api_key="test-key")
+    )
+    monkeypatch.setattr(tools, "carbon_interface_client", lambda api_key, **_: client)
+    return calls
+
+
+def test_provider_estimates_are_cached_by_request_payload(provider):
+    first = calculate_shipping_emissions(1_000, 100, "truck")
+    second = calculate_shipping_emissions(1_000, 100, "truck")
+    calculate_shipping_emissions(1_000, 200, "truck")
+
+    assert first == second
+    assert first["source"] == "Carbon Interface API"
+    assert first["emissions_kg"] == 62
+    assert provider == ["truck", "truck"]
+
+
+def test_async_comparison_requests_every_mode_concurrently(provider):
+    started = time.perf_counter()
+    result = asyncio.run(
+        acompare_emissions(
+            weight_value=1_000,
+            distance_value=100,
+            transport_method=["plane", "truck", "train", "ship"],
+        )
+    )
+
+    assert time.perf_counter() - started < 0.6
+    assert result["lowest_emissions_method"] == "ship"
+    assert sorted(provider) == ["plane", "ship", "train", "truck"]
+
+
+def test_unusable_provider_responses_fall_back_to_the_deterministic_estimate(monkeypatch):
+    client = CarbonInterfaceClient(
+        "test-key", transport=httpx.MockTransport(lambda request: httpx.Response(503))
+    )
+    monkeypatch.setattr(
+        tools, "settings", replace(tools.settings, carbon_interface_api_key="test-key")
+    )
+    monkeypatch.setattr(tools, "carbon_interface_client", lambda api_key, **_: client)
+
+    result = compare_emissions(1_000, ["truck", "train"], distance_value=100)
+
+    assert result["details"]["train"]["emissions_kg"] == 2.2
+    assert result["details"]["truck"]["data_quality"] == "estimated"
+
+
+def test_circuit_opens_on_failures_and_probes_after_cooldown():
+    now = [0.0]
+    breaker = CircuitBreaker(
+        min_calls=3, failure_rate=0.5, cooldown_seconds=30, clock=lambda: now[0]
+    )
+    for succeeded, latency in ((True, 0.1), (False, 0.1), (True, 9.0)):
+        assert breaker.allow_request()
+        breaker.record(succeeded=succeeded, latency_seconds=latency)
+
+    stats = breaker.stats()
+    assert stats.state is BreakerState.OPEN
+    assert (stats.failures, stats.slow_calls) == (1, 1)
+    assert not breaker.allow_request()
+
+    now[0] = 31.0
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record(succeeded=True, latency_seconds=0.1)
+    assert breaker.stats().state is BreakerState.CLOSED
+
+
+def test_half_open_circuit_is_settled_only_by_its_probe():
+    now = [0.0]
+    breaker = CircuitBreaker(
+        min_calls=2, failure_rate=0.5, cooldown_seconds=30, clock=lambda: now[0]
+    )
+    stale = breaker.allow_request()
+    for _ in range(2):
+        breaker.record(succeeded=False, latency_seconds=0.1, admission=breaker.allow_request())
+    assert breaker.stats().state is BreakerState.OPEN
+
+    now[0] = 31.0
+    probe = breaker.allow_request()
+    breaker.record(succeeded=True, latency_seconds=0.1, admission=stale)
+    assert breaker.stats().state is BreakerState.HALF_OPEN
+    breaker.record(succeeded=False, latency_seconds=0.1, admission=probe)
+    assert breaker.stats().state is BreakerState.OPEN
+
+
+def test_hedged_provider_requests_are_refused_once_the_queue_is_full():
+    release = threading.Event()
+
+    def blocking_handler(request):
+        release.wait(2)
+        return _provider_response(request)
+
+    client = CarbonInterfaceClient(
+        "test-key", transport=httpx.MockTransport(blocking_handler), max_queued=1
+    )
+    payload = {"type": "shipping", "weight_value": 1_000, "transport_method": "truck"}
+    with pytest.raises(ProviderTimeoutError):
+        client.estimate(payload, budget_seconds=0.01)
+    with pytest.raises(ProviderUnavailableError, match="queue is full"):
+        client.estimate({**payload, "transport_method": "train"}, budget_seconds=0.01)
+
+    release.set()
+    time.sleep(0.1)
+    assert client.estimate(payload, budget_seconds=2)["carbon_kg"] == 62
+    assert client.estimate({**payload, "transport_method": "train"}, budget_seconds=2)
+    client.close()
+
+
+def test_async_hedged_provider_requests_are_refused_once_the_queue_is_full():
+    release = asyncio.Event()
+
+    async def blocking_handler(request):
+        await release.wait()
+        return _provider_response(request)
+
+    client = CarbonInterfaceClient(
+        "test-key", async_transport=httpx.MockTransport(blocking_handler), max_queued=1
+    )
+    payload = {"type": "shipping", "weight_value": 1_000, "transport_method": "truck"}
+
+    async def exhaust_then_recover():
+        with pytest.raises(ProviderTimeoutError):
+            await client.aestimate(payload, budget_seconds=0.01)
+        with pytest.raises(ProviderUnavailableError, match="queue is full"):
+            await client.aestimate({**payload, "transport_method": "train"}, budget_seconds=0.01)
+        release.set()
+        await asyncio.sleep(0.1)
+        assert (await client.aestimate(payload, budget_seconds=2))["carbon_kg"] == 62
+        return await client.aestimate({**payload, "transport_method": "train"}, budget_seconds=2)
+
+    assert asyncio.run(exhaust_then_recover())
+    client.close()
+
+
+def test_close_releases_the_async_client_of_each_event_loop(provider):
+    client = tools.carbon_interface_client("test-key")
+    loop = asyncio.new_event_loop()
+    try:
+        payload = {"type": "shipping", "weight_value": 1_000, "transport_method": "ship"}
+        loop.run_until_complete(client.aestimate(payload))
+        async_client = client._async_clients[loop]
+        client.close()
+        assert async_client.is_closed
+        assert client._async_clients == {}
+    finally:
+        loop.close()
+
+
+def test_open_circuit_skips_the_provider(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    client = CarbonInterfaceClient(
+        "test-key",
+        breaker=CircuitBreaker(min_calls=2, failure_rate=1.0),
+        transport=httpx.MockTransport(handler),
+    )
+    monkeypatch.setattr(
+        tools, "settings", replace(tools.settings, carbon_interface_api_key="test-key")
+    )
+    monkeypatch.setattr(tools, "carbon_interface_client", lambda api_key, **_: client)
+
+    results = [calculate_shipping_emissions(1_000, distance, "train") for distance in (1, 2, 3, 4)]
+
+    assert len(calls) == 2
+    assert client.breaker.stats().state is BreakerState.OPEN
+    assert {result["data_quality"] for result in results} == {"estimated"}
+
+
+def test_slow_provider_is_hedged_by_the_deterministic_estimate(monkeypatch):
+    async def slow_handler(request):
+        await asyncio.sleep(0.3)
+        return _provider_response(request)
+
+    def blocking_handler(request):
+        time.sleep(0.3)
+        return _provider_response(request)
+
+    client = CarbonInterfaceClient(
+        "test-key",
+        transport=httpx.MockTransport(blocking_handler),
+        async_transport=httpx.MockTransport(slow_handler),
+    )
+    monkeypatch.setattr(
+        tools,
+        "settings",
+        replace(
+            tools.settings,
+            carbon_interface_api_key="test-key",
+            provider_latency_budget_seconds=0.05,
+        ),
+    )
+    monkeypatch.setattr(tools, "carbon_interface_client", lambda api_key, **_: client)
+
+    started = time.perf_counter()
+    hedged = calculate_shipping_emissions(1_000, 100, "truck")
+    assert time.perf_counter() - started < 0.25
+    assert hedged["data_quality"] == "estimated"
+    time.sleep(0.4)
+    assert calculate_shipping_emissions(1_000, 100, "truck")["data_quality"] == "provider_estimate"
+
+    async def hedged_then_completed():
+        first = await tools.acalculate_shipping_emissions(1_000, 100, "ship")
+        await asyncio.sleep(0.4)
+        return first, await tools.acalculate_shipping_emissions(1_000, 100, "ship")
+
+    first, second = asyncio.run(hedged_then_completed())
+    assert first["data_quality"] == "estimated"
+    assert second["data_quality"] == "provider_estimate"
+
+
+def test_agent_executor_is_built_once_and_rebuilt_when_settings_change(monkeypatch):
+    import agent
+    import agent.llm as llm
+
+    enabled = replace(
+        llm.settings,
+        assistant_enabled=True,
+        llm_provider="openai",
+        openai_api_key="test-key",
+        openai_model="gpt-4o-mini",
+    )
+    monkeypatch.setattr(llm, "settings", enabled)
+    monkeypatch.setattr(agent, "_executor", None)
+
+    first = agent.get_agent()
+    assert agent.get_agent() is first
+    assert "Final Answer" in first.agent.runnable.get_prompts()[0].messages[0].prompt.template
+
+    monkeypatch.setattr(llm, "settings", replace(enabled, openai_model="gpt-4.1-mini"))
+    assert agent.get_agent() is not first
+
+
+def test_fast_path_answers_fully_specified_questions_from_the_calculator():
+    reply = answer_structured("Compare 2 tonnes from Edmonton to Calgary by rail and truck.")
+
+    assert reply.startswith("Train has the lowest estimated footprint for this shipment.")
+    assert "2,000 kg from Edmonton to Calgary" in reply
+    assert "train 13.2 kg CO2e (300 km route)" in reply
+    assert "truck 36.6 kg CO2e (295 km route)" in reply
+
+
+def test_fast_path_does_not_read_the_verb_ship_as_a_mode():
+    message = "How much CO2 to ship 500 kg from Paris to Berlin by truck?"
+
+    assert structured_question(message).modes == ("truck",)
+    assert answer_structured(message).startswith("Shipping 500 kg from Paris to Berlin by truck")
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Compare rail and air.",
+        "Why is rail lower for 2 tonnes from Edmonton to Calgary by rail and truck?",
+        "Estimate 2 tonnes from Edmonton to Atlantis by truck.",
+        "Book 2 tonnes from Edmonton to Calgary by truck.",
+        "Compare 2 tonnes from Edmonton to Calgary and 3 tonnes from Calgary to Regina by rail.",
+        "Compare 2 tonnes from Edmonton to Calgary by rail and truck in French.",
+    ],
+)
+def test_fast_path_leaves_incomplete_or_open_questions_to_the_agent(message):
+    assert answer_structured(message) is None
+
+
+def test_fast_path_reads_json_quantities_in_their_stated_units():
+    message = json.dumps(
+        {
+            "task": "estimate emissions",
+            "weight_value": 5,
+            "weight_unit": "mt",
+            "distance_value": 100,
+            "distance_unit": "mi",
+            "origin": "Edmonton",
+            "destination": "Calgary",
+            "transport_method": ["truck"],
+        }
+    )
+
+    question = structured_question(message)
+    assert (question.weight_kg, question.distance_km) == (5_000, 160.934)
+    assert "5,000 kg from Edmonton to Calgary" in answer_structured(message)
+    assert structured_question(message.replace('"mt"', '"stone"')) is None
+
+
+def test_reply_cache_key_ignores_wording_and_mode_order():
+    first = reply_cache_key("Compare 2 tonnes from Edmonton to Smallville by truck and rail")
+    second = reply_cache_key("compare emissions, 2000 kg from edmonton to smallville, rail/truck")
+    heavier = reply_cache_key("Compare 3 tonnes from Edmonton to Smallville by rail and truck")
+
+    assert first is not None
+    assert first == second
+    assert heavier != first
+    french = "Compare 2 tonnes from Edmonton to Smallville by truck and rail in French, please"
+    assert reply_cache_key(french) not in (None, first)
+    reworded = "Please compare, in French, 2 tonnes from Edmonton to Smallville by rail and truck"
+    assert reply_cache_key(reworded) == reply_cache_key(french)
+    route = "Compare 2 tonnes from Edmonton to Smallville by rail and truck"
+    assert reply_cache_key(f"{route} in French, not German") != reply_cache_key(
+        f"{route} in German, not French"
+    )
+    assert reply_cache_key("Why compare 2 tonnes from Edmonton to Smallville by truck?") is None
+    assert reply_cache_key("What is scope 3?") is None
+
+
+def test_reply_cache_expires_entries_after_the_ttl():
+    now = [0.0]
+    cache = ReplyCache(size=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", "first")
+    cache.put("b", "second")
+    cache.put("c", "third")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "second"
+    now[0] = 10.0
+    assert cache.get("c") is None
+    assert len(cache) == 1
@@ -1,11 +1,17 @@
 import os
+import threading
 import time
 
 import pytest
 
+import persistence.workspaces as workspaces
 from domain.workspaces.sessions import SessionSigner
+from persistence.database import HOT_QUERIES, connect, execute_hot, register_hot_query
 from persistence.workspaces import (
+    InMemoryWorkspaceRepository,
     QuotaExceededError,
+    WorkspaceNotFoundError,
+    WriteBehindWorkspaceRepository,
     build_workspace_repository,
 )
 
@@ -36,6 +42,162 @@ def test_repository_persists_isolated_quota_usage_and_revocation():
     assert repository.get(second.workspace_id) is not None
 
 
+def test_batch_quota_consumption_is_all_or_nothing():
+    repository = build_workspace_repository(os.getenv("DATABASE_URL"))
+    signer = SessionSigner("test-secret-that-is-at-least-32-characters", ttl_seconds=3_600)
+    session, _ = signer.issue(now=int(time.time()))
+    repository.create(session)
+
+    consumed = repository.consume_quotas(
+        session.workspace_id,
+        {"analysis_runs_per_day": 4, "assistant_requests_per_day": 1},
+    )
+    with pytest.raises(QuotaExceededError, match="assistant_requests_per_day"):
+        repository.consume_quotas(
+            session.workspace_id,
+            {"analysis_runs_per_day": 1, "assistant_requests_per_day": 3},
+        )
+
+    quotas = repository.get(session.workspace_id).quotas
+    assert consumed["analysis_runs_per_day"].used == 4
+    assert consumed["assistant_requests_per_day"].used == 1
+    assert quotas["analysis_runs_per_day"].used == 4
+    assert quotas["assistant_requests_per_day"].used == 1
+    with pytest.raises(WorkspaceNotFoundError):
+        repository.consume_quotas("missing-workspace", {"analysis_runs_per_day": 1})
+    with pytest.raises(ValueError, match="positive"):
+        repository.consume_quotas(session.workspace_id, {"analysis_runs_per_day": 0})
+
+
+class CountingRepository(InMemoryWorkspaceRepository):
+    def __init__(self) -> None:
+        super().__init__()
+        self.consume_calls = 0
+
+    def consume_quotas(self, workspace_id, amounts):
+        self.consume_calls += 1
+        return super().consume_quotas(workspace_id, amounts)
+
+
+def test_write_behind_quotas_are_enforced_locally_and_flushed_in_batches():
+    inner = CountingRepository()
+    repository = WriteBehindWorkspaceRepository(inner, flush_interval_seconds=60, max_unflushed=4)
+    signer = SessionSigner("test-secret-that-is-at-least-32-characters", ttl_seconds=3_600)
+    session, _ = signer.issue(now=int(time.time()))
+    repository.create(session)
+
+    records = [
+        repository.consume_quota(session.workspace_id, "analysis_runs_per_day") for _ in range(10)
+    ]
+    with pytest.raises(QuotaExceededError):
+        repository.consume_quota(session.workspace_id, "analysis_runs_per_day")
+
+    assert [record.used for record in records] == list(range(1, 11))
+    assert inner.consume_calls == 3
+    assert inner.get(session.workspace_id).quotas["analysis_runs_per_day"].used == 6
+    assert repository.get(session.workspace_id).quotas["analysis_runs_per_day"].used == 10
+
+    repository.close()
+
+    assert inner.consume_calls == 4
+    assert inner.get(session.workspace_id).quotas["analysis_runs_per_day"].used == 10
+
+
+def test_write_behind_overshoot_is_bounded_across_processes():
+    inner = InMemoryWorkspaceRepository()
+    processes = [
+        WriteBehindWorkspaceRepository(inner, flush_interval_seconds=60, max_unflushed=3)
+        for _ in range(2)
+    ]
+    signer = SessionSigner("test-secret-that-is-at-least-32-characters", ttl_seconds=3_600)
+    session, _ = signer.issue(now=int(time.time()))
+    inner.create(session)
+
+    admitted = 0
+    for _ in range(20):
+        for process in processes:
+            try:
+                process.consume_quota(session.workspace_id, "analysis_runs_per_day")
+            except QuotaExceededError:
+                continue
+            admitted += 1
+    for process in processes:
+        process.close()
+
+    assert 10 <= admitted <= 10 + len(processes) * 3
+    assert inner.get(session.workspace_id).quotas["analysis_runs_per_day"].used == 10
+
+
+class BlockingRepository(InMemoryWorkspaceRepository):
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: list[dict[str, int]] = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.fail = False
+
+    def consume_quotas(self, workspace_id, amounts):
+        if self.sent:
+            self.entered.set()
+            self.release.wait(timeout=5)
+            if self.fail:
+                raise OSError("database unavailable")
+        self.sent.append(dict(amounts))
+        return super().consume_quotas(workspace_id, amounts)
+
+
+def test_write_behind_flushes_never_send_units_twice_and_restore_failed_writes():
+    inner = BlockingRepository()
+    repository = WriteBehindWorkspaceRepository(inner, flush_interval_seconds=60, max_unflushed=5)
+    signer = SessionSigner("test-secret-that-is-at-least-32-characters", ttl_seconds=3_600)
+    session, _ = signer.issue(now=int(time.time()))
+    repository.create(session)
+    for _ in range(4):
+        repository.consume_quota(session.workspace_id, "analysis_runs_per_day")
+
+    background = threading.Thread(target=repository.flush)
+    background.start()
+    assert inner.entered.wait(timeout=5)
+    repository.flush()
+    assert repository.get(session.workspace_id).quotas["analysis_runs_per_day"].used == 4
+    inner.release.set()
+    background.join()
+
+    assert inner.sent == [{"analysis_runs_per_day": 1}, {"analysis_runs_per_day": 3}]
+    assert inner.get(session.workspace_id).quotas["analysis_runs_per_day"].used == 4
+
+    repository.consume_quota(session.workspace_id, "analysis_runs_per_day")
+    inner.fail = True
+    with pytest.raises(OSError):
+        repository.flush()
+    inner.fail = False
+    repository.flush()
+
+    assert inner.get(session.workspace_id).quotas["analysis_runs_per_day"].used == 5
+    assert repository.get(session.workspace_id).quotas["analysis_runs_per_day"].used == 5
+
+
+def test_write_behind_units_from_yesterday_are_not_charged_to_today(monkeypatch):
+    clock = [int(time.time())]
+    monkeypatch.setattr(
+        workspaces, "_now_timestamp", lambda now=None: clock[0] if now is None else now
+    )
+    inner = InMemoryWorkspaceRepository()
+    repository = WriteBehindWorkspaceRepository(inner, flush_interval_seconds=60, max_unflushed=5)
+    signer = SessionSigner("test-secret-that-is-at-least-32-characters", ttl_seconds=3 * 86_400)
+    session, _ = signer.issue(now=clock[0])
+    repository.create(session)
+    for _ in range(3):
+        repository.consume_quota(session.workspace_id, "analysis_runs_per_day")
+
+    clock[0] += 86_400
+    record = repository.consume_quota(session.workspace_id, "analysis_runs_per_day")
+    repository.close()
+
+    assert record.used == 1
+    assert inner.get(session.workspace_id).quotas["analysis_runs_per_day"].used == 1
+
+
 def test_repository_purges_expired_workspace_records():
     repository = build_workspace_repository(os.getenv("DATABASE_URL"))
     signer = SessionSigner("test-secret-that-is-at-least-32-characters", ttl_seconds=5)
@@ -43,5 +205,40 @@ def test_repository_purges_expired_workspace_records():
 
     repository.create(issued)
 
-    assert repository.purge_expired(now=int(time.time())) >= 1
+    assert issued.workspace_id in repository.purge_expired(now=int(time.time()))
     assert repository.get(issued.workspace_id) is None
+
+
+def test_hot_queries_are_registered_once_and_executed_as_prepared_statements():
+    class RecordingCursor:
+        def execute(self, query, parameters, *, prepare=None):
+            self.call = (query, parameters, prepare)
+
+    cursor = RecordingCursor()
+    workspace_get = HOT_QUERIES["workspace_get"]
+
+    execute_hot(cursor, workspace_get, ("workspace-a",))
+
+    assert {"workspace_get", "quota_consume"} <= set(HOT_QUERIES)
+    assert cursor.call == (workspace_get.sql, ("workspace-a",), True)
+    assert register_hot_query("workspace_get", workspace_get.sql) == workspace_get
+    with pytest.raises(ValueError, match="already registered"):
+        register_hot_query("workspace_get", "SELECT 1")
+
+
+@pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="PostgreSQL integration test")
+def test_pooled_connections_keep_hot_queries_prepared():
+    database_url = os.getenv("DATABASE_URL") or ""
+    build_workspace_repository(database_url)
+    workspace_get = HOT_QUERIES["workspace_get"]
+
+    with connect(database_url) as connection:
+        with connection.cursor() as cursor:
+            for _ in range(2):
+                execute_hot(cursor, workspace_get, ("missing", "2000-01-01", "2000-01-01"))
+                cursor.fetchall()
+            cursor.execute(
+                "SELECT COUNT(*) FROM pg_prepared_statements WHERE statement LIKE %s",
+                ("%FROM workspaces AS w%",),
+            )
+            assert cursor.fetchone()[0] == 1